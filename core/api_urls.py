@@ -1,8 +1,8 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import APIRootView, DefaultRouter
 
 from tecnicos.views import TecnicoViewSet, MisOrdenesView
-from ordenes.views import ClienteViewSet, OrdenTrabajoViewSet, DashboardStatsView, DashboardHistorialCSVView, DashboardPDFView
+from ordenes.views import ClienteViewSet, OrdenTrabajoViewSet, DashboardStatsView, DashboardHistorialCSVView, DashboardPDFView, DashboardCacheStatsView, DashboardDetalleView, EventosOrdenesView, InformesPDFView, InformePDFDetalleView, InformePDFDescargaView, InformesTecnicosZIPView, ExportarOrdenesNDJSONView, KanbanView, OrdenesLoteView
 from homeApp.views import SystemStateView
 
 
@@ -16,8 +16,14 @@ from homeApp.views import SystemStateView
 
 
 
+class RaizAPIView(APIRootView):
+    # Índice de la API (/api/v1/): no consulta la base
+    presupuesto_consultas = 0
+
+
 # El router crea automáticamente las URLs para la API (CRUDs)
 router = DefaultRouter()
+router.APIRootView = RaizAPIView
 router.register(r"tecnicos", TecnicoViewSet, basename="tecnicos")
 router.register(r"clientes", ClienteViewSet, basename="clientes")
 router.register(r"ordenes", OrdenTrabajoViewSet, basename="ordenes")
@@ -29,6 +35,26 @@ urlpatterns = [
     # URL final: /api/v1/dashboard-stats/
     path("dashboard-stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
 
+    # Detalle paginado de los modales del dashboard
+    # URL final: /api/v1/dashboard-detalle/?tipo=pendientes&cursor=...
+    path("dashboard-detalle/", DashboardDetalleView.as_view(), name="dashboard-detalle"),
+
+    # Contadores de la caché del dashboard (hits / misses)
+    # URL final: /api/v1/dashboard-cache/
+    path("dashboard-cache/", DashboardCacheStatsView.as_view(), name="dashboard-cache"),
+
+    # Tablero Kanban en una petición (?since=<token> para traer sólo los cambios)
+    # URL final: /api/v1/kanban/
+    path("kanban/", KanbanView.as_view(), name="kanban"),
+
+    # Asignaciones / cambios de estado en lote (despacho)
+    # URL final: /api/v1/ordenes/lote/  (antes del router: "lote" no es un id)
+    path("ordenes/lote/", OrdenesLoteView.as_view(), name="ordenes-lote"),
+
+    # Eventos en vivo (SSE) de órdenes para el dashboard y el tablero
+    # URL final: /api/v1/eventos/
+    path("eventos/", EventosOrdenesView.as_view(), name="eventos-ordenes"),
+
     # Endpoint para que un técnico vea sus propias órdenes
     # URL final: /api/v1/mis-ordenes/
     path("mis-ordenes/", MisOrdenesView.as_view(), name="mis-ordenes"),
@@ -40,9 +66,19 @@ urlpatterns = [
     # NUEVO: exportar historial a CSV
     path("dashboard-historial.csv", DashboardHistorialCSVView.as_view(), name="dashboard-historial-csv"),
 
+    # Exportación completa de órdenes (NDJSON gzip, reanudable con ?despues_de=)
+    path("exportar/ordenes.ndjson.gz", ExportarOrdenesNDJSONView.as_view(), name="exportar-ordenes-ndjson"),
+
     # 👇 NUEVO: Informe PDF completo
     path("dashboard-informe.pdf", DashboardPDFView.as_view(), name="dashboard-informe-pdf"),
 
+    # Informes PDF en segundo plano: crear trabajo, consultar estado y descargar
+    path("informes/", InformesPDFView.as_view(), name="informes-pdf"),
+    path("informes/<int:pk>/", InformePDFDetalleView.as_view(), name="informe-pdf-detalle"),
+    path("informes/<int:pk>/descargar/", InformePDFDescargaView.as_view(), name="informe-pdf-descarga"),
+    # Un PDF por técnico en un ZIP (pool de procesos)
+    path("informes/tecnicos.zip", InformesTecnicosZIPView.as_view(), name="informes-tecnicos-zip"),
+
     # --- RUTAS AUTOMÁTICAS DRF (al final) ---
     path("", include(router.urls)),
 ]
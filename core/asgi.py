@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Los streams SSE de /api/v1/eventos/ (ordenes.eventos) son vistas async:
+servidos por esta aplicación con un servidor ASGI (uvicorn, daphne, ...) cada
+conexión abierta es una corrutina en vez de un worker bloqueado.
 """
 
 import os
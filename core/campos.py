@@ -0,0 +1,141 @@
+"""
+Campos a pedido en la API (sparse fieldsets):
+
+    ?fields=id,estado,prioridad          sólo esos campos
+    ?expand=tecnico,cliente              agrega los objetos anidados
+    ?fields=id,cliente.nombre            anidado con sólo esos campos (implica expand)
+
+Sin ?fields= ni ?expand= la respuesta es la completa de siempre (con todos
+los anidados), así los clientes existentes no cambian. Sólo se aplica a GET:
+en las escrituras el serializer necesita todos sus campos para validar.
+
+La vista ajusta el queryset a la forma pedida: only() con las columnas
+necesarias y select_related() sólo de las relaciones expandidas.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _lista(request, parametro):
+    valores = []
+    for valor in request.query_params.getlist(parametro):
+        valores += [nombre.strip() for nombre in valor.split(",") if nombre.strip()]
+    return valores
+
+
+def forma_pedida(request, serializer_class):
+    """
+    (campos, expandir) pedidos para `serializer_class`, o None si no se pidió
+    forma (respuesta completa). `campos` es un set o None (todos los planos);
+    `expandir` es {relación: set de campos anidados o None (todos)}.
+    Lanza ValidationError si se piden campos o relaciones que no existen.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    pedidos, expand = _lista(request, "fields"), _lista(request, "expand")
+    if not pedidos and not expand:
+        return None
+
+    expandibles = getattr(serializer_class, "expandibles", {})
+    planos = set(serializer_class.Meta.fields) - set(expandibles.values())
+    desconocidos = sorted(set(expand) - set(expandibles))
+
+    campos = set() if pedidos else None
+    expandir = {relacion: None for relacion in expand if relacion in expandibles}
+    for nombre in pedidos:
+        relacion, _, anidado = nombre.partition(".")
+        if anidado and relacion in expandibles:
+            clase_anidada = type(serializer_class._declared_fields[expandibles[relacion]])
+            if anidado not in clase_anidada.Meta.fields:
+                desconocidos.append(nombre)
+            elif relacion not in expandir or expandir[relacion] is not None:
+                # (con ?expand=<relación> ya va completa)
+                expandir[relacion] = (expandir.get(relacion) or set()) | {anidado}
+        elif not anidado and nombre in planos:
+            campos.add(nombre)
+        else:
+            desconocidos.append(nombre)
+
+    if desconocidos:
+        raise serializers.ValidationError({
+            "fields": "Campos desconocidos: " + ", ".join(desconocidos)
+            + ". Válidos: " + ", ".join(sorted(planos))
+            + "; expandibles: " + ", ".join(sorted(expandibles)),
+        })
+    return campos, expandir
+
+
+class CamposDinamicosSerializerMixin:
+    """
+    Para ModelSerializer: recorta sus campos según ?fields= / ?expand= del
+    request del contexto. `expandibles` = {nombre en ?expand=: campo anidado}.
+    """
+
+    expandibles = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        forma = forma_pedida(self.context.get("request"), type(self))
+        if forma is None:
+            return
+        campos, expandir = forma
+        anidados = {campo: relacion for relacion, campo in self.expandibles.items()}
+
+        for nombre in list(self.fields):
+            if nombre in anidados:
+                relacion = anidados[nombre]
+                if relacion not in expandir:
+                    self.fields.pop(nombre)
+                elif expandir[relacion] is not None:
+                    anidado = self.fields[nombre]
+                    for sub in list(anidado.fields):
+                        if sub not in expandir[relacion]:
+                            anidado.fields.pop(sub)
+            elif campos is not None and nombre not in campos:
+                self.fields.pop(nombre)
+
+
+def _columna(modelo, fuente):
+    """`fuente` si es una columna de `modelo` (para only()), o None."""
+    try:
+        campo = modelo._meta.get_field(fuente)
+    except FieldDoesNotExist:
+        return None
+    return fuente if getattr(campo, "concrete", False) else None
+
+
+class CamposDinamicosViewMixin:
+    """
+    Para ViewSets con un CamposDinamicosSerializerMixin: con una forma pedida
+    el queryset carga sólo las columnas que se van a serializar (más
+    `campos_siempre`: orden del cursor, fecha del feed de cambios) y hace
+    JOIN sólo con las relaciones expandidas.
+    """
+
+    campos_siempre = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if forma_pedida(self.request, self.get_serializer_class()) is None:
+            return queryset
+
+        modelo = queryset.model
+        columnas = set(self.campos_siempre)
+        relaciones = []
+        for campo in self.get_serializer().fields.values():
+            if isinstance(campo, serializers.BaseSerializer):
+                relacion = campo.source
+                relaciones.append(relacion)
+                columnas.add(relacion)
+                relacionado = modelo._meta.get_field(relacion).related_model
+                for sub in campo.fields.values():
+                    if _columna(relacionado, sub.source):
+                        columnas.add(f"{relacion}__{sub.source}")
+            elif _columna(modelo, campo.source):
+                columnas.add(campo.source)
+
+        queryset = queryset.select_related(None)
+        if relaciones:  # select_related() sin argumentos seguiría todas las FK
+            queryset = queryset.select_related(*relaciones)
+        return queryset.only(*columnas)
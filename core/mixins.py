@@ -1,5 +1,10 @@
+import hashlib
+
+from django.db.models import Count, Max
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from rest_framework import status
+from rest_framework.response import Response
 
 
 class PermitsPositionMixin:
@@ -19,3 +24,84 @@ class PermitsPositionMixin:
         ):
             return super().dispatch(request, *args, **kwargs)
         return redirect(self.redirect_url)
+
+
+# ==========================================
+# GET condicional (ETag / If-None-Match) para la API
+# ==========================================
+
+def firma_queryset(queryset, campo_fecha="fecha_actualizacion"):
+    """
+    (cantidad, última modificación) de un queryset en una sola consulta.
+    La cantidad detecta eliminaciones; la fecha máxima, altas y ediciones.
+    """
+    datos = queryset.order_by().aggregate(total=Count("pk"), ultima=Max(campo_fecha))
+    return datos["total"], datos["ultima"]
+
+
+def calcular_etag(*partes):
+    """ETag débil a partir de cualquier combinación de valores."""
+    base = "|".join(str(parte) for parte in partes)
+    return 'W/"%s"' % hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def filtros_normalizados(request, *excluir):
+    """Querystring ordenada (y sin parámetros irrelevantes) para el ETag."""
+    return sorted(
+        (clave, tuple(sorted(valores)))
+        for clave, valores in request.query_params.lists()
+        if clave not in excluir
+    )
+
+
+def etag_coincide(request, etag):
+    """True si el cliente ya tiene la versión `etag` (If-None-Match)."""
+    cabecera = request.META.get("HTTP_IF_NONE_MATCH")
+    if not cabecera:
+        return False
+    if cabecera.strip() == "*":
+        return True
+    return etag in [valor.strip() for valor in cabecera.split(",")]
+
+
+def respuesta_condicional(request, etag, construir):
+    """
+    Devuelve 304 sin serializar si el ETag coincide; si no, llama a
+    `construir()` y le agrega la cabecera ETag.
+    """
+    if etag_coincide(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = construir()
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class ConditionalListMixin:
+    """
+    Mixin para ViewSets: el listado responde 304 Not Modified cuando los
+    datos filtrados no cambiaron. El validador se obtiene de COUNT + MAX de
+    `etag_campo_fecha` del queryset filtrado (una consulta indexada) y de los
+    querysets en `etag_relacionados` que se anidan en la respuesta.
+    """
+
+    etag_campo_fecha = "fecha_actualizacion"
+    etag_relacionados = ()
+
+    def get_etag(self, request):
+        partes = [
+            request.path,
+            filtros_normalizados(request),
+            firma_queryset(self.filter_queryset(self.get_queryset()), self.etag_campo_fecha),
+        ]
+        for queryset in self.etag_relacionados:
+            partes.append(firma_queryset(queryset.all()))
+        return calcular_etag(*partes)
+
+    def list(self, request, *args, **kwargs):
+        return respuesta_condicional(
+            request,
+            self.get_etag(request),
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+        )
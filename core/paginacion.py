@@ -0,0 +1,34 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class PaginacionCursorOpcional(CursorPagination):
+    """
+    Paginación por cursor de DRF que el cliente activa con ?page_size= o
+    siguiendo un ?cursor=. Sin esos parámetros el listado se devuelve
+    completo, como antes.
+
+    El cursor guarda sólo el primer campo de `ordering` (la fecha) más un
+    offset: cada página es WHERE fecha < cursor ORDER BY fecha, id LIMIT n
+    OFFSET k, donde k son las filas de la página anterior con esa misma fecha
+    (normalmente 0). El rango sobre el índice hace que la milésima página
+    cueste lo mismo que la primera; sólo muchas filas con la misma fecha
+    exacta alargarían el offset. El id de `ordering` únicamente fija el orden
+    de esos empates. Para una llave completa (fecha, id) ver
+    ordenes.stats.pagina_detalle.
+
+    Respuesta paginada: {"next": url, "previous": url, "results": [...]}.
+    """
+
+    ordering = ("-fecha_creacion", "-id")
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = settings.API_PAGINA_TAMANO
+        self.max_page_size = settings.API_PAGINA_MAXIMA
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not (request.query_params.get(self.cursor_query_param)
+                or request.query_params.get(self.page_size_query_param)):
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,143 @@
+"""
+Presupuesto de consultas SQL por endpoint.
+
+Cada vista de la API declara cuántas consultas puede hacer por petición:
+
+    class MiVista(APIView):
+        presupuesto_consultas = 4                      # cualquier método
+        presupuesto_consultas = {"GET": 4, "POST": 9}  # por método (los demás no se revisan)
+
+Un N+1 hace que la cantidad crezca con las filas y se pase del presupuesto.
+Se revisa de dos formas:
+- En los tests, con PresupuestoConsultasTestMixin.assertDentroDelPresupuesto().
+- En desarrollo, con PresupuestoConsultasMiddleware (PRESUPUESTO_CONSULTAS =
+  "advertir" o "error"): cuenta las consultas de cada vista, agrega la
+  cabecera X-Consultas-SQL y avisa en el log o falla si se pasa.
+
+Se cuentan sólo las consultas de la vista (desde process_view), no las de
+sesión / usuario que hacen los middlewares antes.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    pass
+
+
+def presupuesto_de(vista, metodo):
+    """
+    Presupuesto declarado por `vista` (función de la URL o clase) para el
+    método HTTP, o None si no declara uno.
+    """
+    clase = getattr(vista, "cls", None) or getattr(vista, "view_class", None) or vista
+    presupuesto = getattr(clase, "presupuesto_consultas", None)
+    if isinstance(presupuesto, dict):
+        return presupuesto.get(metodo.upper())
+    return presupuesto
+
+
+def mensaje_excedido(ruta, metodo, total, presupuesto):
+    return f"{metodo} {ruta}: {total} consultas SQL (presupuesto {presupuesto})"
+
+
+# =====================================================
+# Tests
+# =====================================================
+
+class PresupuestoConsultasTestMixin:
+    """Para TestCase: ejecuta una petición y revisa el presupuesto de su vista."""
+
+    def assertDentroDelPresupuesto(self, url, metodo="get", cliente=None, **kwargs):
+        cliente = cliente or self.client_api
+        presupuesto = presupuesto_de(resolve(url.split("?")[0]).func, metodo)
+        self.assertIsNotNone(presupuesto, f"{url} no declara presupuesto_consultas para {metodo.upper()}")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(cliente, metodo)(url, **kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        total = len(ctx.captured_queries)
+        self.assertLessEqual(
+            total, presupuesto,
+            mensaje_excedido(url, metodo.upper(), total, presupuesto) + "\n"
+            + "\n".join(consulta["sql"] for consulta in ctx.captured_queries),
+        )
+        return response
+
+
+# =====================================================
+# Middleware de desarrollo
+# =====================================================
+
+class _Contador:
+    """execute_wrapper que cuenta las consultas una vez activado."""
+
+    def __init__(self):
+        self.total = 0
+        self.presupuesto = None
+        self.activo = False
+
+    def activar(self, presupuesto):
+        self.total = 0
+        self.presupuesto = presupuesto
+        self.activo = True
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.activo:
+            self.total += 1
+        return execute(sql, params, many, context)
+
+
+class PresupuestoConsultasMiddleware:
+    """
+    Cuenta las consultas de cada vista con presupuesto declarado. Va al
+    final de MIDDLEWARE; se activa con PRESUPUESTO_CONSULTAS (ver settings).
+    Las respuestas en streaming se revisan al terminar de enviarse.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = _Contador()
+        request._contador_consultas = contador
+        with connection.execute_wrapper(contador):
+            response = self.get_response(request)
+
+        if contador.presupuesto is None:
+            return response
+        if response.streaming:
+            if not response.is_async:
+                response.streaming_content = self._revisar_al_terminar(request, contador, response.streaming_content)
+            return response
+
+        response["X-Consultas-SQL"] = f"{contador.total}/{contador.presupuesto}"
+        self.revisar(request, contador)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        contador = getattr(request, "_contador_consultas", None)
+        presupuesto = presupuesto_de(view_func, request.method)
+        if contador is not None and presupuesto is not None:
+            contador.activar(presupuesto)
+        return None
+
+    def _revisar_al_terminar(self, request, contador, contenido):
+        with connection.execute_wrapper(contador):
+            yield from contenido
+        self.revisar(request, contador)
+
+    def revisar(self, request, contador):
+        if contador.total <= contador.presupuesto:
+            return
+        mensaje = mensaje_excedido(request.path, request.method, contador.total, contador.presupuesto)
+        if settings.PRESUPUESTO_CONSULTAS == "error":
+            raise PresupuestoConsultasExcedido(mensaje)
+        logger.warning(mensaje)
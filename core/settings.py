@@ -88,6 +88,13 @@ MIDDLEWARE = [
     "homeApp.middleware.UpdateLastActivityMiddleware",
 ]
 
+# Presupuesto de consultas SQL por endpoint (core/presupuesto.py), para
+# desarrollo: "advertir" deja un warning en el log y "error" hace fallar la
+# petición cuando una vista se pasa del `presupuesto_consultas` que declara.
+PRESUPUESTO_CONSULTAS = env("PRESUPUESTO_CONSULTAS", default="")
+if PRESUPUESTO_CONSULTAS:
+    MIDDLEWARE.append("core.presupuesto.PresupuestoConsultasMiddleware")
+
 
 ROOT_URLCONF = "core.urls"
 
@@ -136,6 +143,60 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# La caché "dashboard" guarda las respuestas de dashboard-stats (el CSV se genera
+# en streaming y los PDF / CSV pregenerados quedan en disco, ver INFORMES_DIR).
+# LocMemCache sirve para un solo proceso; con varios workers en la misma
+# máquina usar FileBasedCache para que la invalidación llegue a todos:
+#   DASHBOARD_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   DASHBOARD_CACHE_LOCATION=/var/tmp/intercatv_dashboard
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "dashboard": {
+        "BACKEND": env(
+            "DASHBOARD_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": env("DASHBOARD_CACHE_LOCATION", default="intercatv-dashboard"),
+        "TIMEOUT": env.int("DASHBOARD_CACHE_TIMEOUT", default=600),
+    },
+}
+
+DASHBOARD_CACHE_ALIAS = "dashboard"
+
+# Eventos en vivo (SSE) del dashboard y el tablero: /api/v1/eventos/
+# Cada conexión revisa cada EVENTOS_INTERVALO_SEGUNDOS si cambió la generación
+# del dashboard (y sólo entonces, o tras un heartbeat, consulta EventoOrden),
+# manda un heartbeat si no hubo eventos y se cierra tras la duración máxima
+# (el navegador reconecta solo, reanudando con Last-Event-ID).
+# Costo: con ASGI (core/asgi.py) una conexión es una corrutina. Con WSGI una
+# conexión abierta tomaría un worker completo, así que ahí cada petición
+# responde lo pendiente y cierra: el navegador vuelve a preguntar cada ~3 s
+# (una petición corta por dashboard abierto).
+EVENTOS_INTERVALO_SEGUNDOS = env.float("EVENTOS_INTERVALO_SEGUNDOS", default=2.0)
+EVENTOS_HEARTBEAT_SEGUNDOS = env.float("EVENTOS_HEARTBEAT_SEGUNDOS", default=15.0)
+EVENTOS_DURACION_MAXIMA_SEGUNDOS = env.float("EVENTOS_DURACION_MAXIMA_SEGUNDOS", default=300.0)
+EVENTOS_RETENCION_HORAS = env.int("EVENTOS_RETENCION_HORAS", default=24)
+
+# Feed de cambios (/api/v1/<recurso>/cambios/): no se entregan cambios más
+# nuevos que este margen, para no saltar transacciones que aún no confirman.
+CAMBIOS_MARGEN_SEGUNDOS = env.float("CAMBIOS_MARGEN_SEGUNDOS", default=2.0)
+
+# Paginación por cursor de /api/v1/ordenes/ y /api/v1/clientes/ (opcional:
+# sólo con ?page_size= o ?cursor=; sin ellos se devuelve la lista completa).
+API_PAGINA_TAMANO = env.int("API_PAGINA_TAMANO", default=100)
+API_PAGINA_MAXIMA = env.int("API_PAGINA_MAXIMA", default=1000)
+
+# Teléfonos de clientes: los números nacionales se normalizan a E.164 con
+# este código de país. El webhook de WhatsApp recuerda en memoria el cliente
+# de los últimos WEBHOOK_CLIENTES_EN_CACHE números.
+TELEFONO_CODIGO_PAIS = env("TELEFONO_CODIGO_PAIS", default="56")
+WEBHOOK_CLIENTES_EN_CACHE = env.int("WEBHOOK_CLIENTES_EN_CACHE", default=1024)
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
@@ -189,6 +250,21 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Informes PDF/CSV del dashboard: se guardan en INFORMES_DIR por hash de
+# contenido (ordenes/almacen.py) y se ubican por la llave filtros + versión de
+# datos. `python manage.py pregenerar_informes` deja listos los períodos
+# estándar cada día. INFORMES_WORKER="hilo" genera los pedidos por la API en
+# un pool de INFORMES_HILOS hilos del mismo proceso; con "comando" quedan en
+# cola para `python manage.py procesar_informes`.
+INFORMES_DIR = env("INFORMES_DIR", default=os.path.join(MEDIA_ROOT, "informes"))
+INFORMES_WORKER = env("INFORMES_WORKER", default="hilo")
+INFORMES_HILOS = env.int("INFORMES_HILOS", default=2)
+# Un trabajo que lleva más que esto en PROCESANDO se da por muerto y vuelve a
+# la cola (al crear otro informe o en la próxima vuelta de procesar_informes)
+INFORMES_TIEMPO_MAXIMO_SEGUNDOS = env.int("INFORMES_TIEMPO_MAXIMO_SEGUNDOS", default=600)
+# Procesos para dibujar el lote de informes por técnico (informes/tecnicos.zip)
+INFORMES_PROCESOS = env.int("INFORMES_PROCESOS", default=os.cpu_count() or 1)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
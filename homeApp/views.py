@@ -62,6 +62,7 @@ class SystemStateView(APIView):
     API para consultar y activar/desactivar el Modo Emergencia.
     """
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 5
 
     def get(self, request, *args, **kwargs):
         state = SystemState.get_state()
@@ -1,14 +1,29 @@
 from django.contrib import admin
-from .models import Cliente, OrdenTrabajo
+from .models import Cliente, OrdenTrabajo, TransicionOrden
 
 @admin.register(Cliente)
 class ClienteAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'telefono', 'direccion')
     search_fields = ('nombre', 'telefono')
 
+class TransicionOrdenInline(admin.TabularInline):
+    model = TransicionOrden
+    extra = 0
+    can_delete = False
+    readonly_fields = ('estado_anterior', 'estado_nuevo', 'fecha', 'usuario')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(OrdenTrabajo)
 class OrdenTrabajoAdmin(admin.ModelAdmin):
     list_display = ('id', 'cliente', 'tecnico', 'prioridad', 'estado', 'fecha_creacion')
     list_filter = ('estado', 'prioridad', 'fecha_creacion')
     search_fields = ('cliente__nombre', 'descripcion')
-    list_editable = ('estado', 'tecnico') # ¡Para asignar rápido desde la lista!
\ No newline at end of file
+    list_editable = ('estado', 'tecnico') # ¡Para asignar rápido desde la lista!
+    readonly_fields = ('fecha_asignacion', 'fecha_cierre')
+    inlines = [TransicionOrdenInline]
+
+    def save_model(self, request, obj, form, change):
+        obj._usuario_cambio = request.user  # para la bitácora de estados
+        super().save_model(request, obj, form, change)
@@ -0,0 +1,110 @@
+"""
+Almacén en disco de informes generados (PDF y CSV), direccionado por contenido.
+
+Cada archivo se guarda como INFORMES_DIR/<ab>/<sha256>.<extensión> y la tabla
+ArchivoInforme relaciona la llave del informe (filtros + versión de los
+datos) con ese hash. Si dos llaves producen exactamente el mismo contenido
+(p. ej. el CSV vacío de varios técnicos sin órdenes) el archivo se guarda una
+sola vez. Los archivos se escriben en un temporal y se renombran, así nunca se
+sirve uno a medio escribir.
+"""
+import datetime
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ArchivoInforme, InformePDF
+
+
+def ruta_contenido(hash_contenido, extension):
+    return os.path.join(settings.INFORMES_DIR, hash_contenido[:2], f"{hash_contenido}.{extension}")
+
+
+def buscar(llave):
+    """Ruta del archivo ya generado para `llave`, o None."""
+    fila = ArchivoInforme.objects.filter(llave=llave).values_list('hash', 'extension').first()
+    if fila is None:
+        return None
+    ruta = ruta_contenido(*fila)
+    return ruta if os.path.exists(ruta) else None
+
+
+class _EscrituraConHash:
+    """Archivo binario que calcula el SHA-256 de lo escrito."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.sha256 = hashlib.sha256()
+        self.tamano = 0
+
+    def write(self, datos):
+        self.sha256.update(datos)
+        self.tamano += len(datos)
+        return self.archivo.write(datos)
+
+    def __getattr__(self, nombre):
+        return getattr(self.archivo, nombre)
+
+
+def guardar(llave, extension, escribir):
+    """
+    Llama a `escribir(archivo)` y guarda el resultado bajo su hash.
+    Devuelve (ruta, nuevo): `nuevo` es False si ese contenido ya existía.
+    """
+    os.makedirs(settings.INFORMES_DIR, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(suffix=f'.{extension}.tmp', dir=settings.INFORMES_DIR)
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            destino = _EscrituraConHash(archivo)
+            escribir(destino)
+        hash_contenido = destino.sha256.hexdigest()
+        ruta = ruta_contenido(hash_contenido, extension)
+        nuevo = not os.path.exists(ruta)
+        if nuevo:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            os.replace(temporal, ruta)
+        else:
+            os.remove(temporal)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    ArchivoInforme.objects.update_or_create(
+        llave=llave,
+        defaults={"hash": hash_contenido, "extension": extension, "tamano": destino.tamano},
+    )
+    return ruta, nuevo
+
+
+def guardar_bytes(llave, extension, contenido):
+    return guardar(llave, extension, lambda archivo: archivo.write(contenido))
+
+
+def purgar(dias):
+    """
+    Olvida las llaves de más de `dias` días y borra los archivos que ya no
+    usa ninguna llave ni ningún trabajo InformePDF. Devuelve cuántos archivos
+    se borraron.
+    """
+    limite = timezone.now() - datetime.timedelta(days=dias)
+    ArchivoInforme.objects.filter(fecha_creacion__lt=limite).delete()
+
+    en_uso = {
+        ruta_contenido(hash_contenido, extension)
+        for hash_contenido, extension in ArchivoInforme.objects.values_list('hash', 'extension')
+    }
+    en_uso.update(InformePDF.objects.exclude(archivo='').values_list('archivo', flat=True))
+
+    borrados = 0
+    for carpeta, _, archivos in os.walk(settings.INFORMES_DIR):
+        for nombre in archivos:
+            ruta = os.path.join(carpeta, nombre)
+            if nombre.endswith('.tmp') or ruta in en_uso:
+                continue
+            os.remove(ruta)
+            borrados += 1
+    return borrados
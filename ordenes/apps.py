@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class OrdenesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ordenes"
+
+    def ready(self):
+        from django.db.models.signals import post_migrate, pre_migrate
+
+        from . import signals
+
+        pre_migrate.connect(signals.quitar_triggers_busqueda, sender=self)
+        post_migrate.connect(signals.poner_triggers_busqueda, sender=self)
@@ -0,0 +1,72 @@
+"""
+Búsqueda de texto completo (?search=) con FTS5 de SQLite.
+
+La migración 0013 crea dos tablas virtuales FTS5, mantenidas al día por
+triggers de SQLite (así también cubren los update() y bulk_update() que no
+disparan señales; el SQL está en busqueda_sql.py):
+
+    ordenes_busqueda_orden    rowid = id de la orden: descripción, observaciones,
+                              nombre y dirección del cliente
+    ordenes_busqueda_cliente  rowid = id del cliente: nombre y teléfono (también
+                              sólo con dígitos, para buscar "569..." o "+56 9 ...")
+
+El tokenizador unicode61 con remove_diacritics ignora mayúsculas y tildes
+("chillan" encuentra "Chillán") y cada término se busca como prefijo. En
+otras bases de datos se usa el SearchFilter de DRF (LIKE) de siempre.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .busqueda_sql import TABLA_CLIENTES, TABLA_ORDENES
+
+
+# "+56 9 1234-5678": se busca como un solo número ("5691234...")
+PATRON_TELEFONO = re.compile(r'\+?[\d\s()-]+')
+
+
+def expresion_fts(terminos):
+    """
+    Consulta MATCH con todos los términos como prefijo: "chill"* AND "inter"*.
+    Entre comillas no se interpretan operadores de FTS5. None si ningún
+    término tiene letras o números.
+    """
+    frases = [
+        '"{}"*'.format(termino.replace('"', '""'))
+        for termino in terminos
+        if any(caracter.isalnum() for caracter in termino)
+    ]
+    return " AND ".join(frases) or None
+
+
+class BusquedaFTSFilter(SearchFilter):
+    """
+    ?search= sobre la tabla FTS5 `busqueda_fts` de la vista. Con
+    `busqueda_por_id`, un número solo (o #número) es una búsqueda por id;
+    un teléfono escrito con espacios o guiones se busca sólo con sus dígitos.
+    Sin SQLite o sin `busqueda_fts` se comporta como SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terminos = self.get_search_terms(request)
+        tabla = getattr(view, 'busqueda_fts', None)
+        if not terminos or tabla is None or connections[queryset.db].vendor != 'sqlite':
+            return super().filter_queryset(request, queryset, view)
+
+        if getattr(view, 'busqueda_por_id', False) and len(terminos) == 1:
+            numero = terminos[0].lstrip('#')
+            if numero.isascii() and numero.isdigit():
+                return queryset.filter(pk=int(numero))
+
+        busqueda = request.query_params.get(self.search_param, '').strip()
+        if PATRON_TELEFONO.fullmatch(busqueda):
+            terminos = [re.sub(r'\D', '', busqueda)]
+
+        expresion = expresion_fts(terminos)
+        if expresion is None:
+            return queryset
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s', [expresion])
+        )
@@ -0,0 +1,161 @@
+"""
+SQL de las tablas FTS5 de ?search= (ver ordenes/busqueda.py). Sólo SQLite.
+
+Los triggers de cada tabla leen la otra: los de ordenes_ordentrabajo toman
+nombre y dirección de ordenes_cliente, y los de ordenes_cliente reindexan
+las órdenes del cliente. SQLite revisa todos los triggers al renombrar una
+tabla, así que una migración que rehace ordenes_cliente u
+ordenes_ordentrabajo (AlterField, RemoveField...) fallaría con ellos
+puestos. Por eso no viven en las migraciones:
+
+    pre_migrate   quitar_triggers()   antes de aplicar migraciones
+    post_migrate  poner_triggers()    reindexa todo y vuelve a crearlos
+
+(ver ordenes/signals.py). Las migraciones corren sin triggers y los datos
+que muevan quedan en el índice al terminar `migrate`; ninguna migración
+necesita tocarlos. Las tablas FTS5 las crea y borra la migración 0013.
+"""
+
+
+TABLA_ORDENES = 'ordenes_busqueda_orden'
+TABLA_CLIENTES = 'ordenes_busqueda_cliente'
+
+TELEFONO_DIGITOS = "replace(replace(replace(replace(replace({t}, '+', ''), ' ', ''), '-', ''), '(', ''), ')', '')"
+
+
+def _telefono(alias):
+    # El teléfono tal cual y sólo con dígitos: "+56 9 1234 5678 56912345678"
+    telefono = f"coalesce({alias}.telefono, '')"
+    return f"{telefono} || ' ' || " + TELEFONO_DIGITOS.format(t=telefono)
+
+
+SQL_CREAR_TABLAS = [
+    f"""
+    CREATE VIRTUAL TABLE {TABLA_ORDENES} USING fts5(
+        descripcion, observaciones, cliente_nombre, cliente_direccion,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE {TABLA_CLIENTES} USING fts5(
+        nombre, telefono,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+]
+
+SQL_REINDEXAR = [
+    f"DELETE FROM {TABLA_ORDENES}",
+    f"DELETE FROM {TABLA_CLIENTES}",
+    f"""
+    INSERT INTO {TABLA_ORDENES} (rowid, descripcion, observaciones, cliente_nombre, cliente_direccion)
+    SELECT o.id, o.descripcion, coalesce(o.observaciones, ''), c.nombre, c.direccion
+    FROM ordenes_ordentrabajo o JOIN ordenes_cliente c ON c.id = o.cliente_id
+    """,
+    f"""
+    INSERT INTO {TABLA_CLIENTES} (rowid, nombre, telefono)
+    SELECT c.id, c.nombre, {_telefono('c')} FROM ordenes_cliente c
+    """,
+]
+
+SQL_TRIGGERS = [
+    # --- Órdenes ---
+    f"""
+    CREATE TRIGGER ordenes_busqueda_orden_ai AFTER INSERT ON ordenes_ordentrabajo BEGIN
+        INSERT INTO {TABLA_ORDENES} (rowid, descripcion, observaciones, cliente_nombre, cliente_direccion)
+        SELECT new.id, new.descripcion, coalesce(new.observaciones, ''), c.nombre, c.direccion
+        FROM ordenes_cliente c WHERE c.id = new.cliente_id;
+    END
+    """,
+    # save() reescribe todas las columnas: sólo se reindexa si cambió el texto
+    f"""
+    CREATE TRIGGER ordenes_busqueda_orden_au AFTER UPDATE OF descripcion, observaciones, cliente_id
+    ON ordenes_ordentrabajo
+    WHEN old.descripcion IS NOT new.descripcion
+        OR old.observaciones IS NOT new.observaciones
+        OR old.cliente_id IS NOT new.cliente_id
+    BEGIN
+        DELETE FROM {TABLA_ORDENES} WHERE rowid = old.id;
+        INSERT INTO {TABLA_ORDENES} (rowid, descripcion, observaciones, cliente_nombre, cliente_direccion)
+        SELECT new.id, new.descripcion, coalesce(new.observaciones, ''), c.nombre, c.direccion
+        FROM ordenes_cliente c WHERE c.id = new.cliente_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER ordenes_busqueda_orden_ad AFTER DELETE ON ordenes_ordentrabajo BEGIN
+        DELETE FROM {TABLA_ORDENES} WHERE rowid = old.id;
+    END
+    """,
+    # --- Clientes ---
+    f"""
+    CREATE TRIGGER ordenes_busqueda_cliente_ai AFTER INSERT ON ordenes_cliente BEGIN
+        INSERT INTO {TABLA_CLIENTES} (rowid, nombre, telefono)
+        VALUES (new.id, new.nombre, {_telefono('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER ordenes_busqueda_cliente_au AFTER UPDATE OF nombre, direccion, telefono ON ordenes_cliente
+    WHEN old.nombre IS NOT new.nombre
+        OR old.direccion IS NOT new.direccion
+        OR old.telefono IS NOT new.telefono
+    BEGIN
+        UPDATE {TABLA_CLIENTES} SET nombre = new.nombre, telefono = {_telefono('new')}
+        WHERE rowid = new.id;
+        UPDATE {TABLA_ORDENES} SET cliente_nombre = new.nombre, cliente_direccion = new.direccion
+        WHERE rowid IN (SELECT id FROM ordenes_ordentrabajo WHERE cliente_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER ordenes_busqueda_cliente_ad AFTER DELETE ON ordenes_cliente BEGIN
+        DELETE FROM {TABLA_CLIENTES} WHERE rowid = old.id;
+    END
+    """,
+]
+
+SQL_QUITAR_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS ordenes_busqueda_orden_ai",
+    "DROP TRIGGER IF EXISTS ordenes_busqueda_orden_au",
+    "DROP TRIGGER IF EXISTS ordenes_busqueda_orden_ad",
+    "DROP TRIGGER IF EXISTS ordenes_busqueda_cliente_ai",
+    "DROP TRIGGER IF EXISTS ordenes_busqueda_cliente_au",
+    "DROP TRIGGER IF EXISTS ordenes_busqueda_cliente_ad",
+]
+
+SQL_BORRAR_TABLAS = [
+    f"DROP TABLE IF EXISTS {TABLA_ORDENES}",
+    f"DROP TABLE IF EXISTS {TABLA_CLIENTES}",
+]
+
+
+def _ejecutar(connection, sentencias):
+    with connection.cursor() as cursor:
+        for sql in sentencias:
+            cursor.execute(sql)
+
+
+def hay_busqueda(connection):
+    """True si la base es SQLite y ya tiene las tablas FTS5 (migración 0013 aplicada)."""
+    if connection.vendor != 'sqlite':
+        return False  # en otras bases ?search= sigue usando LIKE
+    return TABLA_ORDENES in connection.introspection.table_names()
+
+
+def crear_tablas(connection):
+    if connection.vendor == 'sqlite':
+        _ejecutar(connection, SQL_CREAR_TABLAS + SQL_REINDEXAR)
+
+
+def borrar_tablas(connection):
+    if connection.vendor == 'sqlite':
+        _ejecutar(connection, SQL_QUITAR_TRIGGERS + SQL_BORRAR_TABLAS)
+
+
+def quitar_triggers(connection):
+    if hay_busqueda(connection):
+        _ejecutar(connection, SQL_QUITAR_TRIGGERS)
+
+
+def poner_triggers(connection):
+    """Reindexa desde las tablas (lo que se movió sin triggers) y los vuelve a crear."""
+    if hay_busqueda(connection):
+        _ejecutar(connection, SQL_QUITAR_TRIGGERS + SQL_REINDEXAR + SQL_TRIGGERS)
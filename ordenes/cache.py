@@ -0,0 +1,103 @@
+"""
+Caché de respuestas del dashboard (stats).
+
+Las entradas se guardan bajo una llave que incluye los filtros normalizados y
+un contador de "generación". Cualquier cambio en OrdenTrabajo o Tecnico
+incrementa la generación (ver ordenes/signals.py), por lo que las entradas
+viejas dejan de ser alcanzables y nunca se sirven datos obsoletos.
+
+El backend se configura en settings.CACHES[DASHBOARD_CACHE_ALIAS].
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+LLAVE_GENERACION = 'dashboard:generacion'
+LLAVE_HITS = 'dashboard:hits'
+LLAVE_MISSES = 'dashboard:misses'
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _incrementar(llave, inicial=0):
+    cache = _cache()
+    try:
+        return cache.incr(llave)
+    except ValueError:
+        # La llave no existe (primera vez o fue desalojada)
+        cache.add(llave, inicial + 1, timeout=None)
+        return cache.get(llave, inicial + 1)
+
+
+def generacion():
+    """Generación actual de los datos del dashboard."""
+    cache = _cache()
+    valor = cache.get(LLAVE_GENERACION)
+    if valor is None:
+        # Partimos desde el reloj: si la llave se pierde, la nueva generación
+        # nunca coincide con una anterior.
+        cache.add(LLAVE_GENERACION, time.time_ns(), timeout=None)
+        valor = cache.get(LLAVE_GENERACION)
+    return valor
+
+
+def invalidar():
+    """Incrementa la generación: todas las entradas existentes quedan obsoletas."""
+    _incrementar(LLAVE_GENERACION, inicial=time.time_ns())
+
+
+def llave_filtros(filtros, **extra):
+    """Representación normalizada (e independiente del orden) de los filtros."""
+    normalizado = {
+        "periodo": filtros.get('periodo'),
+        "tecnicos": sorted(set(filtros.get('tecnicos_ids') or [])),
+        "desde": str(filtros['desde']),
+        "hasta": str(filtros['hasta']),
+    }
+    normalizado.update(extra)
+    return hashlib.sha1(
+        json.dumps(normalizado, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+def obtener_o_calcular(nombre, filtros, calcular, **extra):
+    """
+    Devuelve (valor, hit) para `nombre` + filtros en la generación actual.
+    Si no está en caché, llama a `calcular()` y guarda el resultado.
+    """
+    cache = _cache()
+    llave = f"dashboard:{nombre}:{generacion()}:{llave_filtros(filtros, **extra)}"
+
+    valor = cache.get(llave)
+    if valor is not None:
+        _incrementar(LLAVE_HITS)
+        return valor, True
+
+    _incrementar(LLAVE_MISSES)
+    valor = calcular()
+    cache.set(llave, valor)
+    return valor, False
+
+
+def estadisticas():
+    """Contadores de aciertos / fallos y la generación actual."""
+    cache = _cache()
+    hits = cache.get(LLAVE_HITS, 0)
+    misses = cache.get(LLAVE_MISSES, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "ratio": round(hits * 100 / total, 1) if total else 0.0,
+        "generacion": generacion(),
+    }
+
+
+def reiniciar_contadores():
+    _cache().delete_many([LLAVE_HITS, LLAVE_MISSES])
@@ -0,0 +1,171 @@
+"""
+Feed de cambios (CDC) de órdenes, clientes y técnicos para sincronizar BI.
+
+GET /api/v1/<ordenes|clientes|tecnicos>/cambios/?updated_since=<ISO 8601>
+devuelve los registros modificados desde esa fecha (orden: fecha de
+actualización, id) y las bajas ocurridas en el mismo lapso (RegistroBaja).
+La respuesta trae `siguiente`: un cursor opaco que se manda como ?cursor=
+para pedir la página siguiente o, al terminar, para la próxima
+sincronización. Sin updated_since ni cursor se recorre todo (carga inicial)
+y sólo se informan las bajas posteriores a ese momento.
+
+Las dos listas se recorren por llave (fecha, id) sobre índices de
+fecha_actualizacion / (modelo, fecha), así cada página cuesta lo mismo sin
+importar cuántas filas tenga la tabla.
+"""
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from tecnicos.models import Tecnico
+from .models import Cliente, OrdenTrabajo, RegistroBaja
+
+
+CAMBIOS_LIMITE = 500
+CAMBIOS_LIMITE_MAXIMO = 5000
+
+MODELOS_BAJA = {
+    OrdenTrabajo: 'orden',
+    Cliente: 'cliente',
+    Tecnico: 'tecnico',
+}
+
+
+# =====================================================
+# Lápidas (desde las señales)
+# =====================================================
+
+def registrar_baja(instance):
+    """Deja constancia de que `instance` fue eliminado."""
+    return RegistroBaja.objects.create(modelo=MODELOS_BAJA[type(instance)], objeto_id=instance.pk)
+
+
+# =====================================================
+# Cursor
+# =====================================================
+
+def codificar_posicion(cambios, bajas):
+    """Cursor opaco con la última posición (fecha, id) de cada lista."""
+    datos = {
+        "c": [cambios[0].isoformat(), cambios[1]] if cambios else None,
+        "b": [bajas[0].isoformat(), bajas[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(datos).encode('utf-8')).decode('ascii')
+
+
+def decodificar_posicion(cursor):
+    """Inversa de codificar_posicion; ValueError si el cursor no es válido."""
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        posiciones = []
+        for clave in ("c", "b"):
+            valor = datos[clave]
+            if valor is None and clave == "c":
+                posiciones.append(None)
+                continue
+            fecha = parse_datetime(valor[0])
+            if fecha is None:
+                raise ValueError
+            posiciones.append((fecha, int(valor[1])))
+        return tuple(posiciones)
+    except (ValueError, TypeError, KeyError, IndexError, UnicodeError, json.JSONDecodeError):
+        raise ValueError("cursor inválido")
+
+
+def posicion_desde_request(request):
+    """
+    (posición de cambios, posición de bajas) según ?cursor= o ?updated_since=.
+    ValueError con un mensaje para el cliente si los parámetros no sirven.
+    """
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        return decodificar_posicion(cursor)
+
+    desde = request.query_params.get('updated_since')
+    if desde:
+        fecha = parse_datetime(desde)
+        if fecha is None:
+            raise ValueError("updated_since debe ser una fecha ISO 8601")
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+        # id 0: incluye lo modificado exactamente en esa fecha
+        return (fecha, 0), (fecha, 0)
+
+    # Carga inicial: todos los registros y sólo las bajas de aquí en adelante
+    return None, (timezone.now(), 0)
+
+
+def _despues_de(posicion, campo_fecha):
+    # fecha >= X (rango sobre el índice) menos lo ya entregado en fecha == X
+    fecha, pk = posicion
+    return Q(**{f"{campo_fecha}__gte": fecha}) & ~Q(**{campo_fecha: fecha, "pk__lte": pk})
+
+
+# =====================================================
+# Página del feed
+# =====================================================
+
+def pagina_cambios(queryset, posicion, limite=CAMBIOS_LIMITE):
+    """
+    Registros de `queryset` y bajas de su modelo posteriores a `posicion`.
+    Devuelve (objetos, bajas, cursor siguiente, hay_mas).
+
+    Se omiten los cambios de los últimos CAMBIOS_MARGEN_SEGUNDOS: una
+    transacción que aún no confirma puede traer una fecha anterior a la de
+    filas ya visibles, y el cursor la saltaría.
+    """
+    pos_cambios, pos_bajas = posicion
+    tope = timezone.now() - datetime.timedelta(seconds=settings.CAMBIOS_MARGEN_SEGUNDOS)
+
+    cambios = queryset.filter(fecha_actualizacion__lte=tope)
+    if pos_cambios:
+        cambios = cambios.filter(_despues_de(pos_cambios, 'fecha_actualizacion'))
+    objetos = list(cambios.order_by('fecha_actualizacion', 'pk')[:limite + 1])
+
+    bajas = list(
+        RegistroBaja.objects.filter(modelo=MODELOS_BAJA[queryset.model], fecha__lte=tope)
+        .filter(_despues_de(pos_bajas, 'fecha'))
+        .order_by('fecha', 'pk')
+        .values('pk', 'objeto_id', 'fecha')[:limite + 1]
+    )
+
+    hay_mas = len(objetos) > limite or len(bajas) > limite
+    objetos, bajas = objetos[:limite], bajas[:limite]
+    if objetos:
+        pos_cambios = (objetos[-1].fecha_actualizacion, objetos[-1].pk)
+    if bajas:
+        pos_bajas = (bajas[-1]['fecha'], bajas[-1]['pk'])
+    return objetos, bajas, codificar_posicion(pos_cambios, pos_bajas), hay_mas
+
+
+class FeedCambiosMixin:
+    """
+    Agrega /<recurso>/cambios/ a un ViewSet. Las relaciones anidadas llegan
+    con el select_related del queryset del ViewSet.
+    """
+
+    @action(detail=False, methods=['get'])
+    def cambios(self, request, *args, **kwargs):
+        try:
+            posicion = posicion_desde_request(request)
+            limite = min(int(request.query_params.get('limit', CAMBIOS_LIMITE)), CAMBIOS_LIMITE_MAXIMO)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if limite < 1:
+            return Response({"error": "limit debe ser mayor que 0"}, status=400)
+
+        objetos, bajas, siguiente, hay_mas = pagina_cambios(self.get_queryset(), posicion, limite)
+
+        return Response({
+            "resultados": self.get_serializer(objetos, many=True).data,
+            "eliminados": [{"id": baja['objeto_id'], "fecha": baja['fecha']} for baja in bajas],
+            "siguiente": siguiente,
+            "hay_mas": hay_mas,
+        })
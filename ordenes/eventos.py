@@ -0,0 +1,189 @@
+"""
+Eventos en vivo de órdenes (Server-Sent Events) para el dashboard y el tablero.
+
+Las señales de OrdenTrabajo escriben un EventoOrden compacto por cada alta,
+cambio o baja (con la variación de KPIs que produce). El endpoint
+/api/v1/eventos/ mantiene la conexión abierta y envía los eventos nuevos a
+medida que aparecen, con un heartbeat periódico. Al reconectar, el navegador
+manda Last-Event-ID y el stream continúa desde ahí; si esos eventos ya se
+purgaron se envía `reset` para que el cliente recargue todo.
+
+Funciona con el servidor ASGI (core/asgi.py), donde cada conexión sólo ocupa
+una corrutina. Con WSGI (runserver, gunicorn sync) una conexión abierta
+ocuparía un worker entero, así que ahí cada petición manda lo pendiente y
+cierra: el navegador reconecta tras `retry` (sondeo de a RECONEXION_MS).
+
+Cada vuelta consulta EventoOrden sólo si cambió la generación del dashboard
+(cache.py, la incrementa todo cambio de órdenes) o si ya pasó un heartbeat
+desde la última lectura, por si esa caché no es compartida entre procesos.
+"""
+import asyncio
+import datetime
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from . import cache as dashboard_cache
+from .models import EventoOrden
+from .resumen import grupo_estado
+
+
+LOTE_EVENTOS = 100
+RECONEXION_MS = 3000
+
+
+# =====================================================
+# Publicación (desde las señales)
+# =====================================================
+
+def variacion_kpis(estado_anterior, estado_nuevo):
+    """Cambio en los contadores del dashboard al pasar de un estado a otro."""
+    delta = {}
+    if not estado_anterior:
+        delta['total'] = 1
+    if not estado_nuevo:
+        delta['total'] = -1
+    anterior, nuevo = grupo_estado(estado_anterior), grupo_estado(estado_nuevo)
+    if anterior != nuevo:
+        if anterior:
+            delta[anterior] = -1
+        if nuevo:
+            delta[nuevo] = 1
+    return delta
+
+
+def _evento(orden, tipo, estado_anterior=''):
+    estado = '' if tipo == 'eliminada' else orden.estado
+    if tipo == 'eliminada':
+        estado_anterior = orden.estado
+    return EventoOrden(
+        tipo=tipo,
+        orden_id=orden.pk,
+        estado=estado,
+        estado_anterior=estado_anterior,
+        tecnico_id=orden.tecnico_id,
+        kpis=variacion_kpis(estado_anterior, estado),
+    )
+
+
+def publicar_evento(orden, tipo, estado_anterior=''):
+    """Registra el cambio de `orden` para los clientes conectados."""
+    evento = _evento(orden, tipo, estado_anterior)
+    evento.save()
+    return evento
+
+
+def publicar_eventos(cambios):
+    """Varios publicar_evento() en un INSERT: `cambios` = [(orden, tipo, estado_anterior)]."""
+    return EventoOrden.objects.bulk_create([_evento(*cambio) for cambio in cambios])
+
+
+def purgar_eventos(horas=None):
+    """Borra los eventos más antiguos que la retención. Devuelve cuántos."""
+    horas = horas or settings.EVENTOS_RETENCION_HORAS
+    limite = timezone.now() - datetime.timedelta(hours=horas)
+    borrados, _ = EventoOrden.objects.filter(fecha__lt=limite).delete()
+    return borrados
+
+
+# =====================================================
+# Lectura del stream
+# =====================================================
+
+def formato_evento(evento):
+    datos = {
+        "orden": evento['orden_id'],
+        "tipo": evento['tipo'],
+        "estado": evento['estado'],
+        "estado_anterior": evento['estado_anterior'],
+        "tecnico": evento['tecnico_id'],
+        "kpis": evento['kpis'],
+    }
+    return f"id: {evento['id']}\nevent: orden\ndata: {json.dumps(datos)}\n\n"
+
+
+class CursorEventos:
+    """
+    Posición de un cliente en el stream. `abrir()` y `leer()` son síncronos
+    (consultan la base); los generadores de abajo sólo los intercalan con
+    esperas, en versión async (ASGI) o con time.sleep (WSGI).
+    """
+
+    def __init__(self, ultimo_id=None):
+        self.ultimo_id = ultimo_id
+        self.inicio = time.monotonic()
+        self.ultimo_envio = self.inicio
+        self.ultima_lectura = self.inicio
+        self.generacion = None
+
+    @property
+    def terminado(self):
+        return time.monotonic() - self.inicio >= settings.EVENTOS_DURACION_MAXIMA_SEGUNDOS
+
+    def abrir(self):
+        lineas = [f"retry: {RECONEXION_MS}\n\n"]
+        rango = EventoOrden.objects.aggregate(primero=Min('id'), ultimo=Max('id'))
+        ultimo_existente = rango['ultimo'] or 0
+
+        if self.ultimo_id is None:
+            # Conexión nueva: sólo interesa lo que pase desde ahora. El `id`
+            # (sin datos) queda como Last-Event-ID para la reconexión
+            self.ultimo_id = ultimo_existente
+            lineas.append(f"id: {ultimo_existente}\n\n")
+        elif self.ultimo_id > ultimo_existente or (
+            rango['primero'] is not None and self.ultimo_id < rango['primero'] - 1
+        ):
+            # Los eventos intermedios ya no existen: el cliente debe recargar
+            lineas.append(f"id: {ultimo_existente}\nevent: reset\ndata: {{}}\n\n")
+            self.ultimo_id = ultimo_existente
+        return lineas
+
+    def hay_cambios(self):
+        """
+        Si vale la pena consultar la tabla de eventos: cambió la generación
+        del dashboard o pasó un heartbeat desde la última lectura.
+        """
+        generacion = dashboard_cache.generacion()
+        ahora = time.monotonic()
+        if generacion != self.generacion or ahora - self.ultima_lectura >= settings.EVENTOS_HEARTBEAT_SEGUNDOS:
+            self.generacion = generacion
+            self.ultima_lectura = ahora
+            return True
+        return False
+
+    def leer(self):
+        if not self.hay_cambios():
+            return []
+        eventos = list(
+            EventoOrden.objects.filter(id__gt=self.ultimo_id)
+            .order_by('id')
+            .values('id', 'tipo', 'orden_id', 'estado', 'estado_anterior', 'tecnico_id', 'kpis')[:LOTE_EVENTOS]
+        )
+        ahora = time.monotonic()
+        if eventos:
+            self.ultimo_id = eventos[-1]['id']
+            self.ultimo_envio = ahora
+            return [formato_evento(evento) for evento in eventos]
+        if ahora - self.ultimo_envio >= settings.EVENTOS_HEARTBEAT_SEGUNDOS:
+            self.ultimo_envio = ahora
+            return [": heartbeat\n\n"]
+        return []
+
+
+async def stream_async(cursor):
+    for linea in await sync_to_async(cursor.abrir)():
+        yield linea
+    while not cursor.terminado:
+        for linea in await sync_to_async(cursor.leer)():
+            yield linea
+        await asyncio.sleep(settings.EVENTOS_INTERVALO_SEGUNDOS)
+
+
+def stream_sync(cursor):
+    """Una sola vuelta y se cierra: con WSGI no se retiene el worker."""
+    yield from cursor.abrir()
+    yield from cursor.leer()
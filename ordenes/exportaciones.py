@@ -0,0 +1,210 @@
+"""
+Exportaciones en streaming (CSV del historial y NDJSON completo de órdenes).
+
+Las filas se leen con values_list + .iterator(chunk_size) —nombres de técnico
+y cliente con JOIN en la misma consulta— y se escriben por bloques, así la
+memoria usada no depende de la cantidad de órdenes exportadas. Opcionalmente
+la salida se comprime con gzip al vuelo.
+
+El NDJSON (una orden por línea, con su cliente y técnico anidados) recorre
+las órdenes por id en lotes y cada lote es un miembro gzip completo: un
+archivo cortado se puede leer hasta el último lote entero y la exportación
+se reanuda con ?despues_de=<último id recibido>.
+"""
+import csv
+import gzip
+import json
+import zlib
+
+from django.utils import timezone
+
+from .models import OrdenTrabajo
+from .resumen import ESTADOS_TERMINADOS
+from .stats import ordenes_periodo
+
+
+CHUNK_FILAS = 2000   # filas por lectura a la base (iterator)
+FILAS_POR_BLOQUE = 500  # filas por bloque enviado al cliente
+
+ENCABEZADO_HISTORIAL = [
+    'ID',
+    'Técnico',
+    'Cliente',
+    'Estado',
+    'Fecha creación',
+    'Fecha cierre',
+]
+
+ESTADOS_DISPLAY = dict(OrdenTrabajo.ESTADO_CHOICES)
+
+
+class _Eco:
+    """'Archivo' cuyo write devuelve lo escrito (para csv.writer en streaming)."""
+
+    def write(self, valor):
+        return valor
+
+
+def _fecha(valor):
+    return timezone.localtime(valor).strftime("%Y-%m-%d %H:%M") if valor else ''
+
+
+def filas_historial(filtros, chunk_size=CHUNK_FILAS):
+    """
+    Genera las filas del historial de órdenes terminadas del período (más
+    nuevas primero) sin instanciar modelos.
+    """
+    filas = (
+        ordenes_periodo(filtros['desde'], filtros['hasta'], filtros['tecnicos_ids'])
+        .filter(estado__in=ESTADOS_TERMINADOS)
+        .order_by('-fecha_creacion')
+        .values_list(
+            'id',
+            'tecnico__nombre', 'tecnico__especialidad',
+            'cliente__nombre', 'cliente__telefono',
+            'estado', 'fecha_creacion', 'fecha_cierre',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for (pk, tecnico, especialidad, cliente, telefono,
+         estado, creacion, cierre) in filas:
+        yield [
+            pk,
+            # Mismo formato que Tecnico.__str__ / Cliente.__str__
+            f"{tecnico} ({especialidad})" if tecnico is not None else '',
+            f"{cliente} - {telefono}",
+            ESTADOS_DISPLAY.get(estado, estado),
+            _fecha(creacion),
+            _fecha(cierre or creacion),
+        ]
+
+
+def csv_en_stream(encabezado, filas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Bloques de texto CSV (BOM UTF-8 + ';' para Excel en español) a partir de
+    un iterable de filas.
+    """
+    writer = csv.writer(_Eco(), delimiter=';')
+    bloque = ['\ufeff', writer.writerow(encabezado)]
+    for fila in filas:
+        bloque.append(writer.writerow(fila))
+        if len(bloque) >= filas_por_bloque:
+            yield ''.join(bloque).encode('utf-8')
+            bloque = []
+    if bloque:
+        yield ''.join(bloque).encode('utf-8')
+
+
+def comprimir_gzip(bloques, nivel=6):
+    """Comprime al vuelo un iterable de bytes en formato gzip."""
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+# =====================================================
+# NDJSON de órdenes (carga a bodega de datos)
+# =====================================================
+
+LOTE_NDJSON = 1000  # órdenes por lote (= por miembro gzip)
+
+CAMPOS_ORDEN_NDJSON = (
+    'id', 'descripcion', 'prioridad', 'estado', 'ubicacion_servicio',
+    'fecha_creacion', 'fecha_actualizacion', 'fecha_asignacion', 'fecha_cierre',
+    'evidencia_url', 'observaciones',
+)
+CAMPOS_CLIENTE_NDJSON = ('id', 'nombre', 'direccion', 'telefono', 'correo', 'fecha_registro', 'fecha_actualizacion')
+CAMPOS_TECNICO_NDJSON = ('id', 'nombre', 'rut', 'telefono', 'especialidad', 'disponible', 'fecha_actualizacion')
+
+
+def _valores_ndjson():
+    return (
+        list(CAMPOS_ORDEN_NDJSON)
+        + [f'cliente__{campo}' for campo in CAMPOS_CLIENTE_NDJSON]
+        + [f'tecnico__{campo}' for campo in CAMPOS_TECNICO_NDJSON]
+    )
+
+
+def _anidar(fila):
+    orden = {campo: fila[campo] for campo in CAMPOS_ORDEN_NDJSON}
+    orden['cliente'] = {campo: fila[f'cliente__{campo}'] for campo in CAMPOS_CLIENTE_NDJSON}
+    orden['tecnico'] = (
+        {campo: fila[f'tecnico__{campo}'] for campo in CAMPOS_TECNICO_NDJSON}
+        if fila['tecnico__id'] is not None else None
+    )
+    return orden
+
+
+def lotes_ordenes(despues_de=0, lote=LOTE_NDJSON):
+    """
+    Lotes de órdenes (dicts con cliente y técnico anidados) en orden de id,
+    desde el id siguiente a `despues_de`. Cada lote es una consulta por llave
+    (id > último) con JOIN, así que nunca se carga toda la tabla.
+    """
+    valores = _valores_ndjson()
+    ultimo = despues_de
+    while True:
+        filas = list(
+            OrdenTrabajo.objects.filter(pk__gt=ultimo)
+            .order_by('pk')
+            .values(*valores)[:lote]
+        )
+        if not filas:
+            return
+        yield [_anidar(fila) for fila in filas]
+        ultimo = filas[-1]['id']
+        if len(filas) < lote:
+            return
+
+
+def ndjson_gzip(despues_de=0, lote=LOTE_NDJSON, nivel=6):
+    """Un miembro gzip (bytes) por lote de órdenes en NDJSON."""
+    for ordenes in lotes_ordenes(despues_de, lote):
+        lineas = ''.join(
+            json.dumps(orden, ensure_ascii=False, default=str, separators=(',', ':')) + '\n'
+            for orden in ordenes
+        )
+        yield gzip.compress(lineas.encode('utf-8'), compresslevel=nivel, mtime=0)
+
+
+def ultimo_lote_completo(archivo, bloque=1 << 20):
+    """
+    Recorre un .ndjson.gz (posiblemente cortado) miembro por miembro, leyendo
+    de a `bloque` bytes. Devuelve (bytes válidos, id de la última orden
+    entera): truncar el archivo en esa posición y continuar con
+    despues_de=id deja un gzip válido.
+    """
+    valido, ultimo_id = 0, 0
+    leidos = 0
+    descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    cola, ultima_linea = b'', None
+
+    while True:
+        datos = archivo.read(bloque)
+        if not datos:
+            return valido, ultimo_id
+        while datos:
+            try:
+                lineas = (cola + descompresor.decompress(datos)).split(b'\n')
+            except zlib.error:
+                return valido, ultimo_id
+            cola = lineas.pop()
+            if lineas:
+                ultima_linea = lineas[-1]
+
+            if not descompresor.eof:
+                leidos += len(datos)
+                break
+
+            # Fin de un miembro (= lote completo): avanzar al siguiente
+            resto = descompresor.unused_data
+            leidos += len(datos) - len(resto)
+            valido = leidos
+            if ultima_linea:
+                ultimo_id = json.loads(ultima_linea)['id']
+            descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            cola, ultima_linea = b'', None
+            datos = resto
@@ -0,0 +1,541 @@
+"""
+Informe gerencial en PDF del dashboard.
+
+- datos_informe(): calcula y formatea lo que muestra el informe; el dibujo con
+  ReportLab está en pdf.py (sin Django, para poder usarlo en otros procesos).
+  Con ?anexo=1 se agregan todas las órdenes cerradas del período, leídas y
+  dibujadas por bloques (ver pdf.tablas_anexo).
+- generar_pdf() / generar_csv(): caché en disco (almacen.py). La llave del
+  informe = filtros + versión de los datos (stats.firma_datos) apunta al
+  archivo guardado por su hash, así que el mismo período sin cambios se sirve
+  directo desde disco y los contenidos idénticos se guardan una sola vez.
+- InformePDF + procesar_informe(): trabajo en segundo plano. La API crea el
+  trabajo y un worker lo procesa: un hilo del mismo proceso
+  (INFORMES_WORKER="hilo") o `python manage.py procesar_informes`
+  (INFORMES_WORKER="comando").
+- instantanea_tecnicos() + zip_informes_tecnicos(): un PDF por técnico. Las
+  estadísticas de todos salen de una sola instantánea (consultas constantes)
+  y los PDF se dibujan en paralelo en un pool de procesos.
+- pregenerar_informes(): deja listos los períodos estándar (global y por
+  técnico) al cerrar cada día (`python manage.py pregenerar_informes`).
+"""
+import datetime
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.text import slugify
+
+from tecnicos.models import Tecnico
+from . import almacen
+from . import cache as dashboard_cache
+from .exportaciones import ENCABEZADO_HISTORIAL, csv_en_stream, filas_historial
+from .models import InformePDF
+from .pdf import dibujar_pdf, pdf_en_bytes
+from .resumen import ESTADOS_PENDIENTES, ESTADOS_TERMINADOS, por_tecnico, ranking_desde_resumen, resumen_periodo
+from .stats import (
+    SLA_HOURS,
+    SOBRECARGA_UMBRAL,
+    calcular_estadisticas,
+    fecha_cierre,
+    filtros_desde_request,
+    firma_datos,
+    kpis_desde_totales,
+    ordenes_periodo,
+    rango_fechas,
+    tecnicos_sobrecarga,
+)
+
+logger = logging.getLogger(__name__)
+
+
+HISTORIAL_INFORME = 30  # últimas órdenes cerradas que lista cada informe
+
+
+# =====================================================
+# Datos del informe
+# =====================================================
+
+@functools.lru_cache(maxsize=1)
+def logo_bytes():
+    """Contenido del logo de la empresa, o None si no existe el archivo."""
+    logo_path = os.path.join(settings.BASE_DIR, "static", "img", "logo_intercatv.jpg")
+    if not os.path.exists(logo_path):
+        return None
+    with open(logo_path, "rb") as archivo:
+        return archivo.read()
+
+
+def _texto_tecnicos(nombres):
+    if nombres is None:
+        return None
+    if not nombres:
+        return "Técnicos filtrados: (no encontrados)"
+    if len(nombres) == 1:
+        return f"Técnico filtrado: {nombres[0]}"
+    return "Técnicos filtrados: " + ", ".join(nombres)
+
+
+def preparar_datos(desde, hasta, stats, nombres=None):
+    """
+    Datos listos para pdf.dibujar_pdf() a partir de calcular_estadisticas()
+    (o de una entrada de instantanea_tecnicos()). Sólo tipos simples, para
+    poder enviarlos a otro proceso.
+    """
+    # -------- ALERTAS OPERACIONALES (resumen) --------
+    alertas = []
+
+    num_vencidas = stats['pendientes_vencidas']
+    if num_vencidas > 0:
+        alertas.append(
+            f"Hay {num_vencidas} órdenes pendientes hace más de {SLA_HOURS} horas."
+        )
+
+    sobrecarga = [
+        f"{item['nombre']} ({item['cantidad']} órdenes)"
+        for item in stats['tecnicos_sobrecarga']
+    ]
+    if sobrecarga:
+        alertas.append(
+            f"Técnicos con alta carga de trabajo (≥{SOBRECARGA_UMBRAL} órdenes activas): "
+            + ", ".join(sobrecarga)
+        )
+
+    return {
+        "logo": logo_bytes(),
+        "titulo": "Informe Gerencial de Órdenes",
+        "periodo": f"Período: {desde.strftime('%d-%m-%Y')} a {hasta.strftime('%d-%m-%Y')}",
+        "generado": f"Generado el {timezone.localtime().strftime('%d-%m-%Y %H:%M')}",
+        "tecnicos": _texto_tecnicos(nombres),
+        "kpis": [
+            ["Total de órdenes", str(stats['total'])],
+            ["Pendientes", f"{stats['pendientes']} ({stats['porcentaje_pendientes']}%)"],
+            ["En ejecución", f"{stats['en_proceso']} ({stats['porcentaje_en_proceso']}%)"],
+            ["Terminadas", f"{stats['terminadas']} ({stats['porcentaje_terminadas']}%)"],
+            ["Productividad técnica", f"{stats['productividad_tecnica']}%"],
+            ["Tiempo prom. cierre", f"{stats['tiempo_promedio_cierre_horas']:.1f} h"],
+            ["SLA OK", f"{stats['sla_porcentaje']}%"],
+            ["Fuera de SLA", str(stats['sla_fuera'])],
+        ],
+        "grafico": (stats['categorias_tecnicos'], stats['valores_tecnicos']),
+        "ranking": [
+            [
+                r["nombre"],
+                str(r["terminadas"]),
+                f"{r['sla_porcentaje']}%",
+                f"{r['tiempo_promedio_cierre_horas']:.1f}",
+            ]
+            for r in stats['ranking_tecnicos']
+        ],
+        "historial": [
+            [
+                ot['id'],
+                ot['tecnico'],
+                ot['cliente'],
+                ot['fecha_cierre'].strftime("%d-%m-%Y %H:%M") if ot['fecha_cierre'] else "",
+            ]
+            for ot in stats['historial']
+        ],
+        "alertas": alertas,
+    }
+
+
+def datos_informe(filtros):
+    """Estadísticas (motor compartido) del período, formateadas para el PDF."""
+    desde = filtros['desde']
+    hasta = filtros['hasta']
+    tecnicos_ids = filtros['tecnicos_ids']
+
+    stats = calcular_estadisticas(desde, hasta, tecnicos_ids, historial_limite=HISTORIAL_INFORME)
+
+    nombres = None
+    if tecnicos_ids:
+        nombres = list(
+            Tecnico.objects.filter(pk__in=tecnicos_ids)
+            .values_list('nombre', flat=True)
+        )
+    return preparar_datos(desde, hasta, stats, nombres)
+
+
+def construir_pdf(filtros, destino):
+    """
+    Escribe en `destino` (ruta o archivo binario) el informe del período. Con
+    filtros['anexo'] agrega todas las órdenes cerradas, leídas por bloques.
+    """
+    anexo = None
+    if filtros.get('anexo'):
+        anexo = (ENCABEZADO_HISTORIAL, filas_historial(filtros))
+    dibujar_pdf(datos_informe(filtros), destino, anexo)
+
+
+def filtros_informe_desde_request(request):
+    """Filtros del dashboard + ?anexo=1 (listado completo de cerradas)."""
+    filtros = filtros_desde_request(request)
+    filtros['anexo'] = request.query_params.get('anexo') in ('1', 'true')
+    return filtros
+
+
+# =====================================================
+# Caché en disco
+# =====================================================
+
+def filtros_a_json(filtros):
+    return {
+        "periodo": filtros.get('periodo'),
+        "tecnicos_ids": list(filtros.get('tecnicos_ids') or []),
+        "desde": filtros['desde'].isoformat(),
+        "hasta": filtros['hasta'].isoformat(),
+        "anexo": bool(filtros.get('anexo')),
+    }
+
+
+def filtros_desde_json(datos):
+    return {
+        "periodo": datos.get('periodo'),
+        "tecnicos_ids": datos.get('tecnicos_ids') or [],
+        "desde": datetime.date.fromisoformat(datos['desde']),
+        "hasta": datetime.date.fromisoformat(datos['hasta']),
+        "anexo": bool(datos.get('anexo')),
+    }
+
+
+def llave_informe(filtros, formato='pdf'):
+    """Filtros normalizados + formato + versión actual de los datos del período."""
+    extra = {"informe": formato}
+    if formato == 'pdf':
+        extra["anexo"] = bool(filtros.get('anexo'))
+    base = f"{dashboard_cache.llave_filtros(filtros, **extra)}|{firma_datos(filtros)}"
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+def nombre_descarga(filtros):
+    sufijo = "_anexo" if filtros.get('anexo') else ""
+    return f"informe_dashboard_{filtros['desde'].strftime('%Y%m%d')}_{filtros['hasta'].strftime('%Y%m%d')}{sufijo}.pdf"
+
+
+def generar_pdf(filtros, llave=None):
+    """
+    Devuelve la ruta del PDF para estos filtros, generándolo sólo si no está
+    en disco.
+    """
+    llave = llave or llave_informe(filtros)
+    ruta = almacen.buscar(llave)
+    if ruta is None:
+        ruta, _ = almacen.guardar(llave, 'pdf', lambda archivo: construir_pdf(filtros, archivo))
+    return ruta
+
+
+def escribir_csv(filtros, archivo):
+    for bloque in csv_en_stream(ENCABEZADO_HISTORIAL, filas_historial(filtros)):
+        archivo.write(bloque)
+
+
+def generar_csv(filtros, llave=None):
+    """Como generar_pdf(), para el CSV del historial de órdenes terminadas."""
+    llave = llave or llave_informe(filtros, 'csv')
+    ruta = almacen.buscar(llave)
+    if ruta is None:
+        ruta, _ = almacen.guardar(llave, 'csv', lambda archivo: escribir_csv(filtros, archivo))
+    return ruta
+
+
+# =====================================================
+# Trabajos en segundo plano
+# =====================================================
+
+# Mensaje para la API: el detalle del error queda en el log, no en la respuesta
+ERROR_INFORME = "No se pudo generar el informe. Intenta de nuevo más tarde."
+
+
+def reencolar_vencidos():
+    """
+    Devuelve a la cola los trabajos que llevan más de
+    INFORMES_TIEMPO_MAXIMO_SEGUNDOS en PROCESANDO (el worker o el proceso
+    murió a medias y nadie más los iba a tomar). Devuelve cuántos.
+    """
+    limite = timezone.now() - datetime.timedelta(seconds=settings.INFORMES_TIEMPO_MAXIMO_SEGUNDOS)
+    return InformePDF.objects.filter(estado='PROCESANDO', fecha_inicio__lt=limite).update(
+        estado='PENDIENTE', fecha_inicio=None,
+    )
+
+
+def crear_informe(usuario, filtros):
+    """
+    Crea el trabajo del informe. Si el PDF de estos filtros y datos ya está
+    en disco queda LISTO de inmediato; si no, se encola para el worker. De
+    paso reencola los trabajos trabados (ver reencolar_vencidos).
+    """
+    if reencolar_vencidos() and settings.INFORMES_WORKER == 'hilo':
+        transaction.on_commit(lambda: _executor().submit(_procesar_pendientes_en_hilo))
+
+    llave = llave_informe(filtros)
+    ruta = almacen.buscar(llave)
+    if ruta is not None:
+        ahora = timezone.now()
+        return InformePDF.objects.create(
+            usuario=usuario, filtros=filtros_a_json(filtros), llave=llave,
+            estado='LISTO', archivo=ruta, fecha_inicio=ahora, fecha_fin=ahora,
+        )
+
+    informe = InformePDF.objects.create(usuario=usuario, filtros=filtros_a_json(filtros), llave=llave)
+    if settings.INFORMES_WORKER == 'hilo':
+        transaction.on_commit(lambda: _executor().submit(_procesar_en_hilo, informe.pk))
+    return informe
+
+
+def procesar_informe(pk):
+    """
+    Genera el PDF de un trabajo PENDIENTE. El cambio a PROCESANDO es un
+    UPDATE condicional, así dos workers nunca procesan el mismo trabajo.
+    Devuelve True si este worker lo procesó.
+    """
+    tomado = InformePDF.objects.filter(pk=pk, estado='PENDIENTE').update(
+        estado='PROCESANDO', fecha_inicio=timezone.now(),
+    )
+    if not tomado:
+        return False
+
+    informe = InformePDF.objects.get(pk=pk)
+    try:
+        # La llave se recalcula: los datos pudieron cambiar mientras esperaba
+        filtros = filtros_desde_json(informe.filtros)
+        llave = llave_informe(filtros)
+        ruta = generar_pdf(filtros, llave)
+    except Exception:
+        logger.exception("Error al generar el informe PDF #%s", pk)
+        InformePDF.objects.filter(pk=pk).update(estado='ERROR', error=ERROR_INFORME, fecha_fin=timezone.now())
+    else:
+        InformePDF.objects.filter(pk=pk).update(
+            estado='LISTO', llave=llave, archivo=ruta, fecha_fin=timezone.now(),
+        )
+    return True
+
+
+def procesar_pendientes():
+    """
+    Procesa todos los trabajos en cola (del más antiguo al más nuevo),
+    incluidos los trabados que se reencolan.
+    """
+    reencolar_vencidos()
+    pendientes = InformePDF.objects.filter(estado='PENDIENTE').order_by('fecha_creacion', 'pk')
+    return sum(procesar_informe(pk) for pk in pendientes.values_list('pk', flat=True))
+
+
+@functools.lru_cache(maxsize=1)
+def _executor():
+    return ThreadPoolExecutor(max_workers=settings.INFORMES_HILOS, thread_name_prefix='informes-pdf')
+
+
+def _procesar_en_hilo(pk):
+    try:
+        procesar_informe(pk)
+    finally:
+        # Cada hilo abre su propia conexión: cerrarla al terminar
+        connection.close()
+
+
+def _procesar_pendientes_en_hilo():
+    try:
+        procesar_pendientes()
+    finally:
+        connection.close()
+
+
+# =====================================================
+# Lote: un PDF por técnico (pool de procesos)
+# =====================================================
+
+def instantanea_tecnicos(filtros):
+    """
+    {tecnico_id: (nombre, datos del PDF)} para los técnicos del filtro (todos
+    si no hay filtro). Se calcula una sola vez con consultas constantes:
+      1. técnicos
+      2. totales por técnico (un GROUP BY sobre el resumen)
+      3. pendientes vencidas por técnico (un GROUP BY)
+      4. últimas cerradas de cada técnico (ROW_NUMBER por técnico)
+    Cada entrada es igual a lo que daría datos_informe() filtrando sólo ese
+    técnico.
+    """
+    desde = filtros['desde']
+    hasta = filtros['hasta']
+
+    tecnicos = Tecnico.objects.order_by('nombre', 'pk')
+    if filtros['tecnicos_ids']:
+        tecnicos = tecnicos.filter(pk__in=filtros['tecnicos_ids'])
+    tecnicos = list(tecnicos.values_list('pk', 'nombre'))
+    if not tecnicos:
+        return {}
+    ids = [pk for pk, _ in tecnicos]
+
+    filas = {fila['tecnico_id']: fila for fila in por_tecnico(resumen_periodo(desde, hasta, ids))}
+
+    qs = ordenes_periodo(desde, hasta, ids)
+    limite_vencida = timezone.now() - datetime.timedelta(hours=SLA_HOURS)
+    vencidas = dict(
+        qs.filter(estado__in=ESTADOS_PENDIENTES, fecha_creacion__lte=limite_vencida)
+        .order_by()
+        .values('tecnico_id')
+        .annotate(cantidad=Count('id'))
+        .values_list('tecnico_id', 'cantidad')
+    )
+
+    historiales = {pk: [] for pk in ids}
+    cerradas = (
+        qs.filter(estado__in=ESTADOS_TERMINADOS)
+        .select_related('tecnico', 'cliente')
+        .annotate(posicion=Window(
+            RowNumber(),
+            partition_by=F('tecnico_id'),
+            order_by=F('fecha_creacion').desc(),
+        ))
+        .filter(posicion__lte=HISTORIAL_INFORME)
+        .order_by('tecnico_id', '-fecha_creacion')
+    )
+    for ot in cerradas:
+        historiales[ot.tecnico_id].append({
+            "id": ot.id,
+            "tecnico": str(ot.tecnico),
+            "cliente": str(ot.cliente),
+            "fecha_cierre": fecha_cierre(ot),
+        })
+
+    instantanea = {}
+    for pk, nombre in tecnicos:
+        fila = filas.get(pk)
+        filas_tecnico = [fila] if fila else []
+        fila = fila or {}
+        totales = {
+            clave: fila.get(campo) or 0
+            for clave, campo in (
+                ("total", 'total'),
+                ("pendientes", 'pendientes'),
+                ("en_proceso", 'activas'),
+                ("terminadas", 'terminadas'),
+                ("suma_horas", 'suma_horas'),
+                ("en_sla", 'en_sla'),
+            )
+        }
+        stats = kpis_desde_totales(totales)
+        stats.update({
+            "categorias_tecnicos": [(item['tecnico__nombre'] or 'Sin técnico') for item in filas_tecnico],
+            "valores_tecnicos": [item['total'] for item in filas_tecnico],
+            "ranking_tecnicos": ranking_desde_resumen(filas_tecnico),
+            "tecnicos_sobrecarga": tecnicos_sobrecarga(filas_tecnico),
+            "pendientes_vencidas": vencidas.get(pk, 0),
+            "historial": historiales[pk],
+        })
+        instantanea[pk] = (nombre, preparar_datos(desde, hasta, stats, [nombre]))
+    return instantanea
+
+
+def dibujar_pdfs(lista_datos, procesos=None):
+    """
+    Dibuja varios informes y devuelve sus bytes en el mismo orden. Con más de
+    un proceso se usa un ProcessPoolExecutor ("spawn": los procesos sólo
+    importan pdf.py, sin Django ni conexiones heredadas).
+    """
+    procesos = min(procesos or settings.INFORMES_PROCESOS, len(lista_datos))
+    if procesos <= 1:
+        return [pdf_en_bytes(datos) for datos in lista_datos]
+
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+        return list(pool.map(pdf_en_bytes, lista_datos))
+
+
+def nombre_pdf_tecnico(pk, nombre, filtros):
+    return (
+        f"informe_{slugify(nombre) or 'tecnico'}_{pk}_"
+        f"{filtros['desde'].strftime('%Y%m%d')}_{filtros['hasta'].strftime('%Y%m%d')}.pdf"
+    )
+
+
+def nombre_zip_tecnicos(filtros):
+    return f"informes_tecnicos_{filtros['desde'].strftime('%Y%m%d')}_{filtros['hasta'].strftime('%Y%m%d')}.zip"
+
+
+def zip_informes_tecnicos(filtros, destino, procesos=None):
+    """
+    Escribe en `destino` (ruta o archivo binario) un ZIP con un PDF por
+    técnico. Devuelve la cantidad de informes.
+    """
+    instantanea = instantanea_tecnicos(filtros)
+    pdfs = dibujar_pdfs([datos for _, datos in instantanea.values()], procesos)
+
+    # Los PDF ya vienen comprimidos: se guardan sin volver a comprimir
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as archivo_zip:
+        for (pk, (nombre, _)), contenido in zip(instantanea.items(), pdfs):
+            archivo_zip.writestr(nombre_pdf_tecnico(pk, nombre, filtros), contenido)
+    return len(pdfs)
+
+
+# =====================================================
+# Pregeneración programada
+# =====================================================
+
+PERIODOS_PREGENERADOS = ('hoy', 'semana', 'mes', 'anio')
+
+
+def _pregenerar(llave, formato, escribir, resultado):
+    if almacen.buscar(llave) is not None:
+        resultado['existentes'] += 1
+        return
+    _, nuevo = almacen.guardar(llave, formato, escribir)
+    resultado['generados' if nuevo else 'deduplicados'] += 1
+
+
+def pregenerar_informes(hoy=None, procesos=None, periodos=PERIODOS_PREGENERADOS):
+    """
+    Genera el PDF y el CSV de cada período estándar para la vista global y
+    para cada técnico, con las mismas llaves que usan las descargas (así
+    DashboardPDFView / DashboardHistorialCSVView los sirven sin calcular).
+    Lo ya guardado para la versión actual de los datos se salta.
+
+    Devuelve un dict con la cantidad de archivos generados, deduplicados
+    (contenido igual a otro ya guardado) y existentes (llave ya guardada).
+    """
+    # Mismo "hoy" que filtros_desde_request
+    hoy = hoy or timezone.now().date()
+    resultado = {"generados": 0, "deduplicados": 0, "existentes": 0}
+    tecnicos = list(Tecnico.objects.order_by('pk').values_list('pk', flat=True))
+
+    for periodo in periodos:
+        desde, hasta = rango_fechas(periodo, hoy)
+        base = {"periodo": periodo, "tecnicos_ids": [], "desde": desde, "hasta": hasta, "anexo": False}
+
+        # --- Vista global ---
+        _pregenerar(llave_informe(base, 'pdf'), 'pdf', lambda archivo: construir_pdf(base, archivo), resultado)
+        _pregenerar(llave_informe(base, 'csv'), 'csv', lambda archivo: escribir_csv(base, archivo), resultado)
+
+        # --- Por técnico: CSV directo, PDF en lote (una instantánea + pool) ---
+        faltantes = []
+        for pk in tecnicos:
+            filtros = dict(base, tecnicos_ids=[pk])
+            _pregenerar(
+                llave_informe(filtros, 'csv'), 'csv',
+                lambda archivo, filtros=filtros: escribir_csv(filtros, archivo), resultado,
+            )
+            llave = llave_informe(filtros, 'pdf')
+            if almacen.buscar(llave) is not None:
+                resultado['existentes'] += 1
+            else:
+                faltantes.append((pk, llave))
+
+        if faltantes:
+            instantanea = instantanea_tecnicos(dict(base, tecnicos_ids=[pk for pk, _ in faltantes]))
+            faltantes = [(pk, llave) for pk, llave in faltantes if pk in instantanea]
+            pdfs = dibujar_pdfs([instantanea[pk][1] for pk, _ in faltantes], procesos)
+            for (_, llave), contenido in zip(faltantes, pdfs):
+                _, nuevo = almacen.guardar_bytes(llave, 'pdf', contenido)
+                resultado['generados' if nuevo else 'deduplicados'] += 1
+
+    return resultado
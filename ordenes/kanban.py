@@ -0,0 +1,114 @@
+"""
+Tablero Kanban en una sola respuesta: /api/v1/kanban/
+
+Devuelve las tarjetas de cada columna (sólo lo que muestra la tarjeta), los
+contadores de las columnas y la flota de técnicos, con un número fijo de
+consultas. La respuesta trae un `token`; con ?since=<token> sólo vienen las
+tarjetas cuya fecha_actualizacion avanzó (en su columna actual) y en
+`salidas` los ids que dejaron el tablero (terminadas, cerradas o
+eliminadas). Una tarjeta que cambió de columna viene en la nueva: el cliente
+la quita de donde estaba por su id.
+
+El token es el mismo cursor (fecha, id) del feed de cambios (cambios.py),
+así que hereda su margen para transacciones que confirman tarde.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from tecnicos.models import Tecnico
+from .cambios import codificar_posicion, decodificar_posicion, pagina_cambios
+from .models import OrdenTrabajo
+
+
+COLUMNAS_KANBAN = ('PENDIENTE', 'ASIGNADA', 'EN_CAMINO', 'EN_PROCESO')
+
+# Con más cambios que esto desde el token se manda el tablero completo
+KANBAN_DELTA_MAXIMO = 500
+
+CAMPOS_TARJETA = (
+    'estado', 'prioridad', 'descripcion', 'fecha_creacion', 'fecha_actualizacion',
+    'tecnico', 'tecnico__nombre', 'cliente', 'cliente__nombre',
+)
+CAMPOS_FLOTA = ('id', 'nombre', 'especialidad', 'disponible', 'ubicacion_actual')
+
+
+def _ordenes():
+    return OrdenTrabajo.objects.select_related('tecnico', 'cliente').only(*CAMPOS_TARJETA)
+
+
+def tarjeta(orden):
+    """Misma forma que /api/v1/ordenes/?fields=id,prioridad,...,cliente.nombre,tecnico.nombre."""
+    return {
+        "id": orden.pk,
+        "estado": orden.estado,
+        "prioridad": orden.prioridad,
+        "descripcion": orden.descripcion,
+        "tecnico": orden.tecnico_id,
+        "tecnico_detalle": {"nombre": orden.tecnico.nombre} if orden.tecnico_id else None,
+        "cliente_detalle": {"nombre": orden.cliente.nombre},
+    }
+
+
+def conteos_columnas():
+    filas = (
+        OrdenTrabajo.objects.filter(estado__in=COLUMNAS_KANBAN)
+        .order_by()
+        .values('estado')
+        .annotate(cantidad=Count('id'))
+    )
+    conteos = dict.fromkeys(COLUMNAS_KANBAN, 0)
+    conteos.update({fila['estado']: fila['cantidad'] for fila in filas})
+    return conteos
+
+
+def flota():
+    return list(Tecnico.objects.order_by('nombre', 'pk').values(*CAMPOS_FLOTA))
+
+
+def tablero_completo():
+    # Lo que cambie desde `tope` vuelve a llegar en el próximo delta (repetir
+    # una tarjeta no hace daño; saltarse una sí)
+    tope = timezone.now() - datetime.timedelta(seconds=settings.CAMBIOS_MARGEN_SEGUNDOS)
+    columnas = {estado: [] for estado in COLUMNAS_KANBAN}
+    for orden in _ordenes().filter(estado__in=COLUMNAS_KANBAN).order_by('-fecha_creacion', '-id'):
+        columnas[orden.estado].append(tarjeta(orden))
+    return {
+        "completo": True,
+        "token": codificar_posicion((tope, 0), (tope, 0)),
+        "columnas": columnas,
+        "salidas": [],
+        "conteos": {estado: len(tarjetas) for estado, tarjetas in columnas.items()},
+        "flota": flota(),
+    }
+
+
+def tablero(since=None):
+    """
+    Tablero completo, o sólo lo cambiado desde el token `since`. ValueError
+    si el token no es válido.
+    """
+    if since:
+        objetos, bajas, siguiente, hay_mas = pagina_cambios(
+            _ordenes(), decodificar_posicion(since), KANBAN_DELTA_MAXIMO,
+        )
+        if not hay_mas:
+            columnas = {estado: [] for estado in COLUMNAS_KANBAN}
+            salidas = []
+            for orden in reversed(objetos):  # la más recién cambiada primero
+                if orden.estado in columnas:
+                    columnas[orden.estado].append(tarjeta(orden))
+                else:
+                    salidas.append(orden.pk)
+            salidas += [baja['objeto_id'] for baja in bajas]
+            return {
+                "completo": False,
+                "token": siguiente,
+                "columnas": columnas,
+                "salidas": salidas,
+                "conteos": conteos_columnas(),
+                "flota": flota(),
+            }
+    return tablero_completo()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from ordenes.pronostico import actualizar_pronostico
+
+
+class Command(BaseCommand):
+    help = (
+        "Ajusta el pronóstico de demanda con los días cerrados y guarda las "
+        "predicciones (programar una vez al día, p. ej. con cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Reajusta toda la historia en vez de sólo los días nuevos.",
+        )
+
+    def handle(self, *args, **options):
+        resultado = actualizar_pronostico(completo=options["completo"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Pronóstico actualizado: {resultado['series']} series, "
+            f"{resultado['dias']} días ajustados en {resultado['segundos']:.3f} s."
+        ))
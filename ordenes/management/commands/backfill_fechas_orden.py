@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from ordenes.models import OrdenTrabajo, TransicionOrden
+from ordenes.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = (
+        "Completa fecha_asignacion / fecha_cierre de órdenes existentes usando la "
+        "bitácora de transiciones (o la última actualización si no hay bitácora) "
+        "y reconstruye el ResumenDiario."
+    )
+
+    def handle(self, *args, **options):
+        transiciones = TransicionOrden.objects.filter(orden=OuterRef('pk'))
+
+        primera_asignacion = Subquery(
+            transiciones.filter(estado_nuevo='ASIGNADA').order_by('fecha').values('fecha')[:1]
+        )
+        ultimo_cierre = Subquery(
+            transiciones.filter(estado_nuevo__in=OrdenTrabajo.ESTADOS_CIERRE)
+            .order_by('-fecha').values('fecha')[:1]
+        )
+
+        # update() no dispara señales ni toca fecha_actualizacion (auto_now)
+        asignadas = OrdenTrabajo.objects.filter(
+            tecnico__isnull=False, fecha_asignacion__isnull=True
+        ).update(fecha_asignacion=Coalesce(primera_asignacion, F('fecha_actualizacion')))
+
+        cerradas = OrdenTrabajo.objects.filter(
+            estado__in=OrdenTrabajo.ESTADOS_CIERRE, fecha_cierre__isnull=True
+        ).update(fecha_cierre=Coalesce(ultimo_cierre, F('fecha_actualizacion')))
+
+        celdas = reconstruir_resumen()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fechas completadas: {asignadas} asignaciones, {cerradas} cierres. "
+            f"Resumen reconstruido: {celdas} celdas."
+        ))
@@ -0,0 +1,91 @@
+import datetime
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table
+
+from ordenes.exportaciones import ENCABEZADO_HISTORIAL
+from ordenes.pdf import ESTILO_TABLA_ANEXO, dibujar_pdf
+
+
+DATOS_BASE = {
+    "logo": None,
+    "titulo": "Informe Gerencial de Órdenes",
+    "periodo": "Período: benchmark",
+    "generado": "Generado el -",
+    "tecnicos": None,
+    "kpis": [],
+    "grafico": ([], []),
+    "ranking": [],
+    "historial": [],
+    "alertas": [],
+}
+
+
+def filas_sinteticas(cantidad):
+    fecha = datetime.datetime(2025, 1, 1)
+    for i in range(cantidad):
+        yield [
+            i + 1,
+            f"Técnico {i % 40} (Fibra)",
+            f"Cliente {i} - +56900000000",
+            "Trabajo Terminado",
+            fecha.strftime("%Y-%m-%d %H:%M"),
+            fecha.strftime("%Y-%m-%d %H:%M"),
+        ]
+
+
+def medir(funcion):
+    """(segundos, MB pico) de funcion(); la memoria se mide en una segunda corrida."""
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 1024 / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el anexo del informe PDF (tablas por página) con filas "
+        "sintéticas: tiempo, µs por fila y memoria pico según la cantidad de filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, nargs="+", default=[5000, 20000, 50000])
+        parser.add_argument(
+            "--tabla-unica",
+            type=int,
+            default=0,
+            help="Compara también con una sola Table (como el historial) hasta esta cantidad de filas.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'modo':<12} {'filas':>7} {'segundos':>9} {'µs/fila':>8} {'MB pico':>8}")
+
+        for cantidad in options["filas"]:
+            def anexo():
+                with tempfile.TemporaryFile() as destino:
+                    dibujar_pdf(DATOS_BASE, destino, (ENCABEZADO_HISTORIAL, filas_sinteticas(cantidad)))
+
+            self.escribir("anexo", cantidad, *medir(anexo))
+
+            if cantidad <= options["tabla_unica"]:
+                def tabla_unica():
+                    with tempfile.TemporaryFile() as destino:
+                        tabla = Table([ENCABEZADO_HISTORIAL] + list(filas_sinteticas(cantidad)), repeatRows=1)
+                        tabla.setStyle(ESTILO_TABLA_ANEXO)
+                        SimpleDocTemplate(destino, pagesize=A4).build([tabla])
+
+                self.escribir("tabla única", cantidad, *medir(tabla_unica))
+
+    def escribir(self, modo, cantidad, segundos, megas):
+        self.stdout.write(
+            f"{modo:<12} {cantidad:>7} {segundos:>9.2f} {segundos * 1e6 / cantidad:>8.1f} {megas:>8.1f}"
+        )
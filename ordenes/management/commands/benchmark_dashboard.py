@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ordenes.stats import SECCIONES, rango_fechas
+from ordenes.views import DashboardStatsView
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de cada sección de dashboard-stats (?sections=): "
+        "consultas SQL y tiempo promedio, sin pasar por la caché."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--periodo", default="mes", help="hoy, semana, mes o anio (por defecto: mes)")
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    def handle(self, *args, **options):
+        desde, hasta = rango_fechas(options["periodo"], timezone.now().date())
+        filtros = {"periodo": options["periodo"], "tecnicos_ids": [], "desde": desde, "hasta": hasta}
+        repeticiones = max(1, options["repeticiones"])
+        vista = DashboardStatsView()
+
+        self.stdout.write(f"Período {desde} → {hasta}, {repeticiones} repeticiones por sección\n")
+        self.stdout.write(f"{'sección':<12} {'consultas':>9} {'ms/llamada':>11}")
+
+        for nombre, secciones in [(s, (s,)) for s in SECCIONES] + [("(todas)", SECCIONES)]:
+            with CaptureQueriesContext(connection) as ctx:
+                vista.construir_datos(filtros, secciones)
+            consultas = len(ctx.captured_queries)
+
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                vista.construir_datos(filtros, secciones)
+            ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+
+            self.stdout.write(f"{nombre:<12} {consultas:>9} {ms:>11.2f}")
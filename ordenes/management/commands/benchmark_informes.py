@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ordenes.informes import dibujar_pdfs, instantanea_tecnicos
+from ordenes.stats import rango_fechas
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el lote de informes por técnico: consultas y tiempo de la "
+        "instantanea de estadísticas, y throughput del dibujo con 1..N procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--periodo", default="mes", help="hoy, semana, mes o anio (por defecto: mes)")
+        parser.add_argument("--procesos-max", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--copias", type=int, default=1, help="Repite el lote para tener más informes por medición.")
+
+    def handle(self, *args, **options):
+        desde, hasta = rango_fechas(options["periodo"], timezone.now().date())
+        filtros = {"periodo": options["periodo"], "tecnicos_ids": [], "desde": desde, "hasta": hasta}
+
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            instantanea = instantanea_tecnicos(filtros)
+        ms = (time.perf_counter() - inicio) * 1000
+        lote = [datos for _, datos in instantanea.values()] * max(1, options["copias"])
+
+        self.stdout.write(
+            f"Período {desde} → {hasta}: {len(instantanea)} técnicos, instantánea en "
+            f"{len(ctx.captured_queries)} consultas / {ms:.1f} ms; {len(lote)} informes por medición\n"
+        )
+        if not lote:
+            return
+
+        self.stdout.write(f"{'procesos':>8} {'segundos':>9} {'pdf/s':>8} {'aceleración':>11}")
+        base = None
+        for procesos in range(1, max(1, options["procesos_max"]) + 1):
+            inicio = time.perf_counter()
+            dibujar_pdfs(lote, procesos)
+            segundos = time.perf_counter() - inicio
+            base = base or segundos
+            self.stdout.write(f"{procesos:>8} {segundos:>9.2f} {len(lote) / segundos:>8.1f} {base / segundos:>10.2f}x")
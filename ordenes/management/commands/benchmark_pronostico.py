@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ordenes.pronostico import ajustar, estado_inicial
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo (segundos) de `repeticiones` corridas de funcion()."""
+    mejor = float("inf")
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el ajuste Holt-Winters del pronóstico con series sintéticas: todas "
+        "las series juntas (vectorizado, como actualizar_pronostico) contra una "
+        "serie por vez, según los años de historia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, default=30, help="Series a ajustar (total + técnicos).")
+        parser.add_argument("--anios", type=int, nargs="+", default=[1, 2, 4])
+        parser.add_argument("--repeticiones", type=int, default=3)
+        parser.add_argument("--semilla", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["semilla"])
+        self.stdout.write(f"{'series':>6} {'días':>6} {'vectorizado s':>13} {'por serie s':>11} {'aceleración':>11}")
+
+        for anios in options["anios"]:
+            valores = rng.poisson(5, size=(max(1, options["series"]), 365 * anios)).astype(float)
+            dias_semana = np.arange(valores.shape[1]) % 7
+
+            def vectorizado():
+                ajustar(valores, dias_semana, *estado_inicial(valores, dias_semana))
+
+            def por_serie():
+                for fila in valores:
+                    serie = fila[None, :]
+                    ajustar(serie, dias_semana, *estado_inicial(serie, dias_semana))
+
+            juntas = medir(vectorizado, options["repeticiones"])
+            separadas = medir(por_serie, options["repeticiones"])
+            self.stdout.write(
+                f"{valores.shape[0]:>6} {valores.shape[1]:>6} {juntas:>13.3f} {separadas:>11.3f} "
+                f"{separadas / juntas:>10.1f}x"
+            )
@@ -0,0 +1,169 @@
+import os
+import queue
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from ordenes.models import Cliente, OrdenTrabajo
+from ordenes.transiciones import ConflictoEstado, cambiar_estado
+from tecnicos.models import Tecnico
+
+
+ALTERNAR = {'ASIGNADA': 'EN_CAMINO', 'EN_CAMINO': 'ASIGNADA'}
+
+
+# --- Camino anterior: leer la orden, cambiarla en memoria y save() ---
+
+def _alternar_con_save(pk, tecnico_id):
+    orden = OrdenTrabajo.objects.get(pk=pk)
+    orden.estado = ALTERNAR[orden.estado]
+    orden.save()
+    return 0
+
+
+def _reasignar_con_save(pk, tecnico_id):
+    orden = OrdenTrabajo.objects.get(pk=pk)
+    orden.estado = ALTERNAR[orden.estado]
+    orden.tecnico_id = tecnico_id
+    orden.save()
+    return 0
+
+
+# --- cambiar_estado: UPDATE condicional; ante un conflicto se relee y reintenta ---
+
+def _alternar_condicional(pk, tecnico_id, reasignar=False):
+    reintentos = 0
+    while True:
+        visto = OrdenTrabajo.objects.values_list('estado', flat=True).get(pk=pk)
+        extra = {'tecnico_id': tecnico_id} if reasignar else {}
+        try:
+            cambiar_estado(pk, ALTERNAR[visto], esperado=visto, **extra)
+            return reintentos
+        except ConflictoEstado:
+            reintentos += 1
+
+
+def _reasignar_condicional(pk, tecnico_id):
+    return _alternar_condicional(pk, tecnico_id, reasignar=True)
+
+
+CAMINOS = {
+    'save': (_alternar_con_save, _reasignar_con_save),
+    'condicional': (_alternar_condicional, _reasignar_condicional),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga concurrente de cambios de estado sobre una base SQLite temporal "
+        "(en archivo): varios hilos alternan ASIGNADA ↔ EN_CAMINO las mismas "
+        "órdenes (una vez por orden reasignándola de paso). Compara latencia y "
+        "actualizaciones perdidas del camino anterior (leer + save()) con "
+        "transiciones.cambiar_estado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ordenes", type=int, default=20)
+        parser.add_argument("--hilos", type=int, default=8)
+        parser.add_argument("--cambios", type=int, default=10, help="Cambios de estado por orden (además del que reasigna).")
+        parser.add_argument("--semilla", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("El benchmark crea su propia base SQLite temporal; requiere el backend sqlite3.")
+
+        ajustes = connections.settings['default']
+        originales = {'NAME': ajustes['NAME'], 'OPTIONS': ajustes.get('OPTIONS', {})}
+        with tempfile.TemporaryDirectory() as directorio:
+            connection.close()
+            # IMMEDIATE: las transacciones que leen y luego escriben esperan el
+            # lock (timeout) en vez de fallar al subir de lectura a escritura
+            ajustes['NAME'] = os.path.join(directorio, 'benchmark.sqlite3')
+            ajustes['OPTIONS'] = {**originales['OPTIONS'], 'timeout': 30, 'transaction_mode': 'IMMEDIATE'}
+            try:
+                call_command('migrate', verbosity=0)
+                self.stdout.write(
+                    f"{options['ordenes']} órdenes, {options['hilos']} hilos, "
+                    f"{options['cambios']} cambios de estado + 1 con reasignación por orden\n"
+                )
+                self.stdout.write(
+                    f"{'camino':<12} {'ops/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8} "
+                    f"{'reintentos':>10} {'errores':>8} {'perdidas':>9}"
+                )
+                for camino in CAMINOS:
+                    self.medir(camino, options)
+            finally:
+                connection.close()
+                ajustes.update(originales)
+
+    def medir(self, camino, options):
+        alternar, reasignar = CAMINOS[camino]
+        cliente = Cliente.objects.create(nombre='Benchmark', direccion='-', telefono=f'+5690000{len(camino):04d}')
+        antes = Tecnico.objects.create(nombre='Antes', rut=f'{camino}-1', telefono='+56900000001', especialidad='-')
+        despues = Tecnico.objects.create(nombre='Después', rut=f'{camino}-2', telefono='+56900000002', especialidad='-')
+        ordenes = [
+            OrdenTrabajo.objects.create(
+                cliente=cliente, tecnico=antes, estado='ASIGNADA', descripcion='benchmark', ubicacion_servicio='-',
+            ).pk
+            for _ in range(options['ordenes'])
+        ]
+
+        operaciones = [(reasignar, pk) for pk in ordenes]
+        operaciones += [(alternar, pk) for pk in ordenes for _ in range(options['cambios'])]
+        random.Random(options['semilla']).shuffle(operaciones)
+        pendientes = queue.Queue()
+        for operacion in operaciones:
+            pendientes.put(operacion)
+
+        latencias, cambios_hechos = [], dict.fromkeys(ordenes, 0)
+        totales = {'reintentos': 0, 'errores': 0}
+        candado = threading.Lock()
+
+        def trabajar():
+            try:
+                while True:
+                    try:
+                        funcion, pk = pendientes.get_nowait()
+                    except queue.Empty:
+                        return
+                    inicio = time.perf_counter()
+                    try:
+                        reintentos = funcion(pk, despues.pk)
+                    except Exception:
+                        with candado:
+                            totales['errores'] += 1
+                        continue
+                    with candado:
+                        latencias.append(time.perf_counter() - inicio)
+                        totales['reintentos'] += reintentos
+                        cambios_hechos[pk] += 1
+            finally:
+                connection.close()
+
+        inicio = time.perf_counter()
+        hilos = [threading.Thread(target=trabajar) for _ in range(max(1, options['hilos']))]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        # Perdida: la reasignación no quedó, o el estado final no coincide con
+        # la cantidad de cambios confirmados (uno se escribió sobre otro que no vio)
+        perdidas = 0
+        for pk, estado, tecnico_id in OrdenTrabajo.objects.filter(pk__in=ordenes).values_list('pk', 'estado', 'tecnico_id'):
+            esperado = 'ASIGNADA' if cambios_hechos[pk] % 2 == 0 else 'EN_CAMINO'
+            perdidas += (tecnico_id != despues.pk) + (estado != esperado)
+
+        ms = sorted(latencia * 1000 for latencia in latencias) or [0.0]
+        self.stdout.write(
+            f"{camino:<12} {len(latencias) / segundos:>7.1f} {statistics.median(ms):>8.1f} "
+            f"{ms[int(len(ms) * 0.95) - 1 if len(ms) > 1 else 0]:>8.1f} {ms[-1]:>8.1f} "
+            f"{totales['reintentos']:>10} {totales['errores']:>8} {perdidas:>9}"
+        )
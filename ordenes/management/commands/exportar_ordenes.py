@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ordenes.exportaciones import ndjson_gzip, ultimo_lote_completo
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta todas las órdenes (con cliente y técnico) a NDJSON comprimido "
+        "con gzip, en orden de id. Con --reanudar continúa un archivo cortado "
+        "desde el último lote completo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("salida", help="Archivo destino (.ndjson.gz)")
+        parser.add_argument("--reanudar", action="store_true", help="Continúa el archivo existente en vez de reescribirlo.")
+        parser.add_argument("--despues-de", type=int, default=0, help="Exporta sólo órdenes con id mayor a este.")
+
+    def handle(self, *args, **options):
+        salida = options["salida"]
+        despues_de = options["despues_de"]
+        modo = "wb"
+
+        if options["reanudar"] and os.path.exists(salida):
+            if despues_de:
+                raise CommandError("Use --reanudar o --despues-de, no ambos.")
+            with open(salida, "rb") as archivo:
+                valido, despues_de = ultimo_lote_completo(archivo)
+            with open(salida, "r+b") as archivo:
+                archivo.truncate(valido)
+            modo = "ab"
+            self.stdout.write(f"Reanudando después de la orden #{despues_de} ({valido} bytes válidos).")
+
+        lotes = 0
+        with open(salida, modo) as archivo:
+            for miembro in ndjson_gzip(despues_de):
+                archivo.write(miembro)
+                archivo.flush()
+                lotes += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Exportación terminada: {lotes} lotes nuevos en {salida}."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ordenes.informes import nombre_zip_tecnicos, zip_informes_tecnicos
+from ordenes.stats import rango_fechas
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un ZIP con un informe PDF por técnico (todos o los indicados), "
+        "dibujando los PDF en paralelo en un pool de procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--periodo", default="mes", help="hoy, semana, mes, anio o personalizado (por defecto: mes)")
+        parser.add_argument("--inicio", help="Fecha inicial YYYY-MM-DD (periodo personalizado)")
+        parser.add_argument("--fin", help="Fecha final YYYY-MM-DD (periodo personalizado)")
+        parser.add_argument("--tecnicos", type=int, nargs="*", default=[], help="IDs de técnicos (por defecto todos)")
+        parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto settings.INFORMES_PROCESOS)")
+        parser.add_argument("--salida", help="Ruta del ZIP (por defecto informes_tecnicos_<desde>_<hasta>.zip)")
+
+    def handle(self, *args, **options):
+        desde, hasta = rango_fechas(options["periodo"], timezone.now().date(), options["inicio"], options["fin"])
+        filtros = {"periodo": options["periodo"], "tecnicos_ids": options["tecnicos"], "desde": desde, "hasta": hasta}
+        salida = options["salida"] or nombre_zip_tecnicos(filtros)
+
+        inicio = time.perf_counter()
+        cantidad = zip_informes_tecnicos(filtros, salida, options["procesos"])
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{cantidad} informes ({desde} → {hasta}) en {salida} ({segundos:.2f} s)."
+        ))
@@ -0,0 +1,54 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ordenes import almacen
+from ordenes.informes import pregenerar_informes
+
+
+class Command(BaseCommand):
+    help = (
+        "Programador de informes: al cerrar cada día genera los PDF y CSV de "
+        "hoy / semana / mes / año (global y por técnico) para que las "
+        "descargas se sirvan desde disco. Sin broker: dejarlo corriendo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Genera ahora y termina.")
+        parser.add_argument("--hora", default="00:15", help="Hora local (HH:MM) en que se genera cada día.")
+        parser.add_argument("--intervalo", type=float, default=60.0, help="Segundos entre revisiones del reloj.")
+        parser.add_argument("--procesos", type=int, default=None, help="Procesos para dibujar los PDF por técnico.")
+        parser.add_argument(
+            "--retencion-dias", type=int, default=7,
+            help="Días que se conservan los informes guardados antes de purgarlos.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            hora = datetime.datetime.strptime(options["hora"], "%H:%M").time()
+        except ValueError:
+            raise CommandError("--hora debe tener el formato HH:MM")
+
+        ultimo_dia = None
+        while True:
+            ahora = timezone.localtime()
+            if options["una_vez"] or (ahora.date() != ultimo_dia and ahora.time() >= hora):
+                self.generar(options)
+                ultimo_dia = ahora.date()
+            if options["una_vez"]:
+                break
+            time.sleep(options["intervalo"])
+
+    def generar(self, options):
+        close_old_connections()
+        inicio = time.perf_counter()
+        resultado = pregenerar_informes(procesos=options["procesos"])
+        borrados = almacen.purgar(options["retencion_dias"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Informes pregenerados en {time.perf_counter() - inicio:.1f} s: "
+            f"{resultado['generados']} nuevos, {resultado['deduplicados']} deduplicados, "
+            f"{resultado['existentes']} ya existentes; {borrados} archivos purgados."
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ordenes.informes import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de informes PDF del dashboard: genera los trabajos en cola "
+        "(usar con INFORMES_WORKER=comando)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Procesa la cola actual y termina.")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre revisiones de la cola.")
+
+    def handle(self, *args, **options):
+        while True:
+            procesados = procesar_pendientes()
+            if procesados:
+                self.stdout.write(f"Informes generados: {procesados}")
+            if options["una_vez"]:
+                break
+            time.sleep(options["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS("Cola de informes procesada."))
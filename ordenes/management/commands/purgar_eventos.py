@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ordenes.eventos import purgar_eventos
+
+
+class Command(BaseCommand):
+    help = "Borra los eventos de órdenes (SSE) más antiguos que la retención configurada."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horas",
+            type=int,
+            default=None,
+            help="Retención en horas (por defecto settings.EVENTOS_RETENCION_HORAS).",
+        )
+
+    def handle(self, *args, **options):
+        borrados = purgar_eventos(options["horas"])
+        self.stdout.write(self.style.SUCCESS(f"Eventos borrados: {borrados}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ordenes.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero la tabla ResumenDiario a partir de OrdenTrabajo."
+
+    def handle(self, *args, **options):
+        celdas = reconstruir_resumen()
+        self.stdout.write(self.style.SUCCESS(f"Resumen reconstruido: {celdas} celdas."))
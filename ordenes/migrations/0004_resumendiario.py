@@ -0,0 +1,109 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Value
+from django.db.models.functions import TruncDate
+
+
+def poblar_resumen(apps, schema_editor):
+    OrdenTrabajo = apps.get_model("ordenes", "OrdenTrabajo")
+    ResumenDiario = apps.get_model("ordenes", "ResumenDiario")
+    filas = (
+        OrdenTrabajo.objects.order_by()
+        .annotate(dia=TruncDate("fecha_creacion"))
+        .values("dia", "tecnico_id", "estado", "prioridad")
+        .annotate(
+            cantidad=Count("id"),
+            horas_cierre=Value(0.0),
+            dentro_sla=Count(
+                "id", filter=Q(estado__in=["Trabajo Terminado", "TERMINADO"])
+            ),
+        )
+    )
+    ResumenDiario.objects.bulk_create(
+        [ResumenDiario(**fila) for fila in filas], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0003_systemstate"),
+        ("tecnicos", "0002_tecnico_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenDiario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dia", models.DateField(verbose_name="Día de creación")),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente de Asignación"),
+                            ("ASIGNADA", "Asignada a Técnico"),
+                            ("EN_CAMINO", "Técnico en Camino"),
+                            ("EN_PROCESO", "En Proceso"),
+                            ("TERMINADO", "Trabajo Terminado"),
+                            ("CERRADA", "Cerrada por Administración"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "prioridad",
+                    models.CharField(
+                        choices=[
+                            ("ALTA", "Alta"),
+                            ("MEDIA", "Media"),
+                            ("BAJA", "Baja"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "cantidad",
+                    models.IntegerField(default=0, verbose_name="Cantidad de órdenes"),
+                ),
+                (
+                    "horas_cierre",
+                    models.FloatField(
+                        default=0, verbose_name="Suma de horas hasta el cierre"
+                    ),
+                ),
+                (
+                    "dentro_sla",
+                    models.IntegerField(
+                        default=0, verbose_name="Órdenes cerradas dentro del SLA"
+                    ),
+                ),
+                (
+                    "tecnico",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="resumenes_diarios",
+                        to="tecnicos.tecnico",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen diario de órdenes",
+                "verbose_name_plural": "Resúmenes diarios de órdenes",
+                "unique_together": {("dia", "tecnico", "estado", "prioridad")},
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0004_resumendiario"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ordentrabajo",
+            name="fecha_asignacion",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Fecha de asignación"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ordentrabajo",
+            name="fecha_cierre",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Fecha de cierre"
+            ),
+        ),
+        migrations.CreateModel(
+            name="TransicionOrden",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "estado_anterior",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("PENDIENTE", "Pendiente de Asignación"),
+                            ("ASIGNADA", "Asignada a Técnico"),
+                            ("EN_CAMINO", "Técnico en Camino"),
+                            ("EN_PROCESO", "En Proceso"),
+                            ("TERMINADO", "Trabajo Terminado"),
+                            ("CERRADA", "Cerrada por Administración"),
+                        ],
+                        default="",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "estado_nuevo",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente de Asignación"),
+                            ("ASIGNADA", "Asignada a Técnico"),
+                            ("EN_CAMINO", "Técnico en Camino"),
+                            ("EN_PROCESO", "En Proceso"),
+                            ("TERMINADO", "Trabajo Terminado"),
+                            ("CERRADA", "Cerrada por Administración"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "fecha",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Fecha del cambio",
+                    ),
+                ),
+                (
+                    "orden",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="transiciones",
+                        to="ordenes.ordentrabajo",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="transiciones_orden",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Realizado por",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Transición de estado",
+                "verbose_name_plural": "Transiciones de estado",
+                "ordering": ["fecha", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["orden", "fecha"], name="transicion_orden_fecha_idx"
+                    )
+                ],
+            },
+        ),
+    ]
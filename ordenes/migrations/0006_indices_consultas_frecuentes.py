@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0005_transiciones_fechas_cierre"),
+        ("tecnicos", "0003_tecnico_fecha_actualizacion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ordentrabajo",
+            index=models.Index(fields=["fecha_creacion"], name="orden_creacion_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ordentrabajo",
+            index=models.Index(
+                fields=["estado", "fecha_creacion"], name="orden_estado_creacion_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ordentrabajo",
+            index=models.Index(
+                fields=["tecnico", "estado", "fecha_actualizacion"],
+                name="orden_tecnico_estado_act_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ordentrabajo",
+            index=models.Index(
+                fields=["fecha_actualizacion"], name="orden_actualizacion_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0006_indices_consultas_frecuentes"),
+        ("tecnicos", "0003_tecnico_fecha_actualizacion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EstadoPronostico",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ultimo_dia", models.DateField(verbose_name="Último día ajustado")),
+                ("nivel", models.FloatField()),
+                ("tendencia", models.FloatField()),
+                (
+                    "estacionalidad",
+                    models.JSONField(
+                        help_text="Componente estacional por día de la semana (lunes = 0)"
+                    ),
+                ),
+                (
+                    "tecnico",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tecnicos.tecnico",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Estado del pronóstico",
+                "verbose_name_plural": "Estados del pronóstico",
+            },
+        ),
+        migrations.CreateModel(
+            name="PrediccionDemanda",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dia", models.DateField(verbose_name="Día")),
+                ("cantidad", models.FloatField(verbose_name="Órdenes esperadas")),
+                (
+                    "tecnico",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="predicciones_demanda",
+                        to="tecnicos.tecnico",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Predicción de demanda",
+                "verbose_name_plural": "Predicciones de demanda",
+                "indexes": [
+                    models.Index(
+                        fields=["tecnico", "dia"], name="prediccion_tecnico_dia_idx"
+                    )
+                ],
+            },
+        ),
+    ]
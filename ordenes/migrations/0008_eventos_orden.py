@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0007_pronostico_demanda"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventoOrden",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "fecha",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("creada", "Creada"),
+                            ("actualizada", "Actualizada"),
+                            ("eliminada", "Eliminada"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("orden_id", models.IntegerField(verbose_name="Orden")),
+                ("estado", models.CharField(blank=True, default="", max_length=20)),
+                (
+                    "estado_anterior",
+                    models.CharField(blank=True, default="", max_length=20),
+                ),
+                (
+                    "tecnico_id",
+                    models.IntegerField(blank=True, null=True, verbose_name="Técnico"),
+                ),
+                (
+                    "kpis",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Variación de los KPIs: {'pendientes': -1, 'en_proceso': 1}",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Evento de orden",
+                "verbose_name_plural": "Eventos de órdenes",
+                "ordering": ["id"],
+            },
+        ),
+    ]
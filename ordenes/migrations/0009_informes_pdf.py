@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0008_eventos_orden"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InformePDF",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "En cola"),
+                            ("PROCESANDO", "Generando"),
+                            ("LISTO", "Listo"),
+                            ("ERROR", "Error"),
+                        ],
+                        db_index=True,
+                        default="PENDIENTE",
+                        max_length=12,
+                    ),
+                ),
+                (
+                    "filtros",
+                    models.JSONField(
+                        help_text="periodo, tecnicos_ids, desde y hasta del informe"
+                    ),
+                ),
+                (
+                    "llave",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Filtros + versión de los datos (nombre del archivo en caché)",
+                        max_length=40,
+                    ),
+                ),
+                (
+                    "archivo",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=255,
+                        verbose_name="Ruta del PDF",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, default="")),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_inicio", models.DateTimeField(blank=True, null=True)),
+                ("fecha_fin", models.DateTimeField(blank=True, null=True)),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="informes_pdf",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Informe PDF",
+                "verbose_name_plural": "Informes PDF",
+                "ordering": ["-fecha_creacion"],
+            },
+        ),
+    ]
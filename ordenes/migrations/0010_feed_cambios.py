@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0009_informes_pdf"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegistroBaja",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "modelo",
+                    models.CharField(
+                        choices=[
+                            ("orden", "Orden de trabajo"),
+                            ("cliente", "Cliente"),
+                            ("tecnico", "Técnico"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("objeto_id", models.IntegerField(verbose_name="ID eliminado")),
+                ("fecha", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Registro de baja",
+                "verbose_name_plural": "Registros de bajas",
+                "ordering": ["fecha", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="cliente",
+            name="fecha_actualizacion",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Última actualización",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="cliente",
+            index=models.Index(
+                fields=["fecha_actualizacion"], name="cliente_actualizacion_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="registrobaja",
+            index=models.Index(
+                fields=["modelo", "fecha"], name="baja_modelo_fecha_idx"
+            ),
+        ),
+    ]
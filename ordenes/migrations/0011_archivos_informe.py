@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0010_feed_cambios"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivoInforme",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("llave", models.CharField(max_length=40, unique=True)),
+                ("extension", models.CharField(max_length=10)),
+                (
+                    "hash",
+                    models.CharField(
+                        db_index=True,
+                        max_length=64,
+                        verbose_name="SHA-256 del contenido",
+                    ),
+                ),
+                (
+                    "tamano",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Tamaño (bytes)"
+                    ),
+                ),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+            ],
+            options={
+                "verbose_name": "Archivo de informe",
+                "verbose_name_plural": "Archivos de informes",
+            },
+        ),
+        migrations.AlterField(
+            model_name="informepdf",
+            name="llave",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Filtros + versión de los datos (ver ArchivoInforme)",
+                max_length=40,
+            ),
+        ),
+    ]
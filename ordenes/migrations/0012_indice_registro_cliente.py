@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0011_archivos_informe"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cliente",
+            index=models.Index(fields=["fecha_registro"], name="cliente_registro_idx"),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Tablas FTS5 para ?search= (ver ordenes/busqueda.py). Sólo en SQLite.
+# Los triggers que las mantienen al día se ponen al terminar `migrate`
+# (ver ordenes/busqueda_sql.py).
+
+from django.db import migrations
+
+from ordenes import busqueda_sql
+
+
+def crear_busqueda(apps, schema_editor):
+    busqueda_sql.crear_tablas(schema_editor.connection)
+
+
+def borrar_busqueda(apps, schema_editor):
+    busqueda_sql.borrar_tablas(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0012_indice_registro_cliente"),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_busqueda, borrar_busqueda),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:29
+
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def normalizar_telefono(telefono):
+    """
+    Copia de ordenes.telefonos.normalizar_telefono tal como estaba al escribir
+    esta migración: si la normalización cambia después, esto no cambia.
+    """
+    if not telefono:
+        return None
+    texto = telefono.strip()
+    if texto.startswith("whatsapp:"):
+        texto = texto[len("whatsapp:"):]
+    digitos = re.sub(r"\D", "", texto)
+    codigo = getattr(settings, "TELEFONO_CODIGO_PAIS", "56")
+
+    if texto.startswith("+"):
+        numero = digitos
+    elif digitos.startswith("00"):
+        numero = digitos[2:]
+    elif len(digitos) == 9:
+        numero = codigo + digitos
+    elif len(digitos) == len(codigo) + 9 and digitos.startswith(codigo):
+        numero = digitos
+    else:
+        return None
+
+    if not 8 <= len(numero) <= 15 or numero.startswith("0"):
+        return None
+    return "+" + numero
+
+
+def normalizar_y_fusionar(apps, schema_editor):
+    """
+    Llena telefono_e164 y fusiona los clientes con el mismo número: sus
+    órdenes pasan al cliente que se conserva (el registrado más antiguo; los
+    "Cliente +569..." los crea el webhook antes del registro) y los demás se
+    eliminan, dejando su lápida para el feed de cambios.
+    """
+    Cliente = apps.get_model("ordenes", "Cliente")
+    OrdenTrabajo = apps.get_model("ordenes", "OrdenTrabajo")
+    RegistroBaja = apps.get_model("ordenes", "RegistroBaja")
+
+    por_telefono = defaultdict(list)
+    for cliente in Cliente.objects.order_by("id").only("id", "nombre", "telefono", "correo").iterator():
+        e164 = normalizar_telefono(cliente.telefono)
+        if e164:
+            por_telefono[e164].append(cliente)
+
+    ahora = timezone.now()
+    conservados = []
+    for e164, clientes in por_telefono.items():
+        conservado = min(clientes, key=lambda cliente: (cliente.nombre.startswith("Cliente "), cliente.id))
+        duplicados = [cliente for cliente in clientes if cliente.id != conservado.id]
+        conservado.telefono_e164 = e164
+        conservados.append(conservado)
+        if not duplicados:
+            continue
+
+        ids = [cliente.id for cliente in duplicados]
+        correo = conservado.correo or next((cliente.correo for cliente in duplicados if cliente.correo), None)
+        Cliente.objects.filter(id=conservado.id).update(correo=correo, fecha_actualizacion=ahora)
+        OrdenTrabajo.objects.filter(cliente_id__in=ids).update(cliente_id=conservado.id, fecha_actualizacion=ahora)
+        Cliente.objects.filter(id__in=ids).delete()
+        RegistroBaja.objects.bulk_create([RegistroBaja(modelo="cliente", objeto_id=pk, fecha=ahora) for pk in ids])
+
+    Cliente.objects.bulk_update(conservados, ["telefono_e164"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ordenes", "0013_busqueda_fts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cliente",
+            name="telefono_e164",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=16,
+                null=True,
+                verbose_name="Teléfono E.164",
+            ),
+        ),
+        migrations.RunPython(normalizar_y_fusionar, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="cliente",
+            name="telefono_e164",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=16,
+                null=True,
+                unique=True,
+                verbose_name="Teléfono E.164",
+            ),
+        ),
+    ]
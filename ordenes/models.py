@@ -1,18 +1,48 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
 from tecnicos.models import Tecnico # Importamos el modelo Técnico para relacionarlo
+from .telefonos import normalizar_telefono
 
 class Cliente(models.Model):
     nombre = models.CharField(max_length=200, verbose_name="Nombre Cliente")
     direccion = models.CharField(max_length=255, verbose_name="Dirección física")
     telefono = models.CharField(max_length=20, verbose_name="Teléfono/WhatsApp")
+    # Forma normalizada de `telefono` (ver ordenes/telefonos.py); None si no se pudo interpretar
+    telefono_e164 = models.CharField(max_length=16, unique=True, null=True, blank=True, editable=False, verbose_name="Teléfono E.164")
     correo = models.EmailField(blank=True, null=True, verbose_name="Correo electrónico (opcional)")
     fecha_registro = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de registro")
     chat_state = models.CharField(max_length=50, default='START', null=True, blank=True, verbose_name="Estado del Chat")
     temp_data = models.JSONField(default=dict, null=True, blank=True, verbose_name="Datos Temporales del Chat")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
 
     def __str__(self):
         return f"{self.nombre} - {self.telefono}"
 
+    def clean(self):
+        super().clean()
+        # Mismo número escrito de otra forma ("+56 9 ..." / "9...") = mismo
+        # cliente; lo validan el admin (ModelForm) y ClienteSerializer
+        e164 = normalizar_telefono(self.telefono)
+        if e164 and Cliente.objects.filter(telefono_e164=e164).exclude(pk=self.pk).exists():
+            raise ValidationError({'telefono': "Ya existe un cliente con este teléfono."})
+
+    def save(self, *args, **kwargs):
+        self.telefono_e164 = normalizar_telefono(self.telefono)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'telefono' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'telefono_e164'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Feed de cambios (?updated_since=) y ETag de órdenes
+            models.Index(fields=['fecha_actualizacion'], name='cliente_actualizacion_idx'),
+            # Paginación por cursor de /api/v1/clientes/ (fecha_registro, id)
+            models.Index(fields=['fecha_registro'], name='cliente_registro_idx'),
+        ]
+
 class OrdenTrabajo(models.Model):
     # Definimos las opciones estandarizadas según tu tesis
     PRIORIDAD_CHOICES = [
@@ -30,6 +60,9 @@ class OrdenTrabajo(models.Model):
         ('CERRADA', 'Cerrada por Administración'),
     ]
 
+    # Estados que cierran la orden (se registra fecha_cierre)
+    ESTADOS_CIERRE = ['TERMINADO', 'CERRADA']
+
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='ordenes')
     tecnico = models.ForeignKey(Tecnico, on_delete=models.SET_NULL, null=True, blank=True, related_name='ordenes_asignadas', verbose_name="Técnico asignado")
     
@@ -41,6 +74,8 @@ class OrdenTrabajo(models.Model):
     
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+    fecha_asignacion = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de asignación")
+    fecha_cierre = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de cierre")
     
     evidencia_url = models.URLField(blank=True, null=True, verbose_name="Link a evidencia (foto/doc)")
     observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones finales")
@@ -52,6 +87,207 @@ class OrdenTrabajo(models.Model):
         verbose_name = "Orden de Trabajo"
         verbose_name_plural = "Órdenes de Trabajo"
         ordering = ['-fecha_creacion'] # Las más nuevas primero
+        indexes = [
+            # Dashboard / exportaciones: rango de fechas, con o sin estado
+            models.Index(fields=['fecha_creacion'], name='orden_creacion_idx'),
+            models.Index(fields=['estado', 'fecha_creacion'], name='orden_estado_creacion_idx'),
+            # Kanban del técnico (MisOrdenesView) y firmas para ETag
+            models.Index(fields=['tecnico', 'estado', 'fecha_actualizacion'], name='orden_tecnico_estado_act_idx'),
+            models.Index(fields=['fecha_actualizacion'], name='orden_actualizacion_idx'),
+        ]
+
+class TransicionOrden(models.Model):
+    """
+    Bitácora compacta de cambios de estado de una orden.
+    estado_anterior vacío = creación de la orden.
+    """
+    orden = models.ForeignKey(OrdenTrabajo, on_delete=models.CASCADE, related_name='transiciones')
+    estado_anterior = models.CharField(max_length=20, blank=True, default='', choices=OrdenTrabajo.ESTADO_CHOICES)
+    estado_nuevo = models.CharField(max_length=20, choices=OrdenTrabajo.ESTADO_CHOICES)
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha del cambio")
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='transiciones_orden', verbose_name="Realizado por")
+
+    def __str__(self):
+        return f"OT #{self.orden_id}: {self.estado_anterior or '-'} → {self.estado_nuevo}"
+
+    class Meta:
+        verbose_name = "Transición de estado"
+        verbose_name_plural = "Transiciones de estado"
+        ordering = ['fecha', 'id']
+        indexes = [
+            models.Index(fields=['orden', 'fecha'], name='transicion_orden_fecha_idx'),
+        ]
+
+class ResumenDiario(models.Model):
+    """
+    Tabla de resumen (rollup) de órdenes agrupadas por día de creación,
+    técnico, estado y prioridad. Se mantiene incrementalmente con señales
+    (ver ordenes/signals.py) y se reconstruye con:
+        python manage.py reconstruir_resumen
+    """
+    dia = models.DateField(verbose_name="Día de creación")
+    tecnico = models.ForeignKey(Tecnico, on_delete=models.SET_NULL, null=True, blank=True, related_name='resumenes_diarios')
+    estado = models.CharField(max_length=20, choices=OrdenTrabajo.ESTADO_CHOICES)
+    prioridad = models.CharField(max_length=10, choices=OrdenTrabajo.PRIORIDAD_CHOICES)
+
+    cantidad = models.IntegerField(default=0, verbose_name="Cantidad de órdenes")
+    horas_cierre = models.FloatField(default=0, verbose_name="Suma de horas hasta el cierre")
+    dentro_sla = models.IntegerField(default=0, verbose_name="Órdenes cerradas dentro del SLA")
+
+    def __str__(self):
+        return f"{self.dia} - {self.tecnico_id} - {self.estado}/{self.prioridad}: {self.cantidad}"
+
+    class Meta:
+        verbose_name = "Resumen diario de órdenes"
+        verbose_name_plural = "Resúmenes diarios de órdenes"
+        unique_together = ('dia', 'tecnico', 'estado', 'prioridad')
+
+class EventoOrden(models.Model):
+    """
+    Registro de cambios de órdenes que se envía por SSE (ver ordenes/eventos.py).
+    El id autoincremental es el id del evento (Last-Event-ID). No tiene FK a
+    la orden para conservar también los eventos de órdenes eliminadas.
+    """
+    TIPO_CHOICES = [
+        ('creada', 'Creada'),
+        ('actualizada', 'Actualizada'),
+        ('eliminada', 'Eliminada'),
+    ]
+
+    fecha = models.DateTimeField(default=timezone.now, db_index=True)
+    tipo = models.CharField(max_length=12, choices=TIPO_CHOICES)
+    orden_id = models.IntegerField(verbose_name="Orden")
+    estado = models.CharField(max_length=20, blank=True, default='')
+    estado_anterior = models.CharField(max_length=20, blank=True, default='')
+    tecnico_id = models.IntegerField(null=True, blank=True, verbose_name="Técnico")
+    kpis = models.JSONField(default=dict, help_text="Variación de los KPIs: {'pendientes': -1, 'en_proceso': 1}")
+
+    def __str__(self):
+        return f"#{self.pk} OT #{self.orden_id} {self.tipo} ({self.estado_anterior or '-'} → {self.estado or '-'})"
+
+    class Meta:
+        verbose_name = "Evento de orden"
+        verbose_name_plural = "Eventos de órdenes"
+        ordering = ['id']
+
+class RegistroBaja(models.Model):
+    """
+    Lápida de un registro eliminado (orden, cliente o técnico) para el feed de
+    cambios: quien sincroniza con ?updated_since= se entera también de las
+    bajas (ver ordenes/cambios.py).
+    """
+    MODELO_CHOICES = [
+        ('orden', 'Orden de trabajo'),
+        ('cliente', 'Cliente'),
+        ('tecnico', 'Técnico'),
+    ]
+
+    modelo = models.CharField(max_length=10, choices=MODELO_CHOICES)
+    objeto_id = models.IntegerField(verbose_name="ID eliminado")
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_modelo_display()} #{self.objeto_id} eliminado el {self.fecha:%d-%m-%Y %H:%M}"
+
+    class Meta:
+        verbose_name = "Registro de baja"
+        verbose_name_plural = "Registros de bajas"
+        ordering = ['fecha', 'id']
+        indexes = [
+            models.Index(fields=['modelo', 'fecha'], name='baja_modelo_fecha_idx'),
+        ]
+
+class PrediccionDemanda(models.Model):
+    """
+    Pronóstico de órdenes creadas por día (ver ordenes/pronostico.py).
+    tecnico vacío = total de todas las órdenes. Para días ya cerrados guarda
+    la predicción a un paso (lo que el modelo esperaba ese día) y hacia
+    adelante el horizonte de pronóstico. Se recalcula con:
+        python manage.py actualizar_pronostico
+    """
+    dia = models.DateField(verbose_name="Día")
+    tecnico = models.ForeignKey(Tecnico, on_delete=models.CASCADE, null=True, blank=True, related_name='predicciones_demanda')
+    cantidad = models.FloatField(verbose_name="Órdenes esperadas")
+
+    def __str__(self):
+        return f"{self.dia} - {self.tecnico_id or 'total'}: {self.cantidad:.1f}"
+
+    class Meta:
+        verbose_name = "Predicción de demanda"
+        verbose_name_plural = "Predicciones de demanda"
+        indexes = [
+            models.Index(fields=['tecnico', 'dia'], name='prediccion_tecnico_dia_idx'),
+        ]
+
+class EstadoPronostico(models.Model):
+    """
+    Estado del modelo Holt-Winters de cada serie tras el último día ajustado,
+    para continuar el ajuste sólo con los días nuevos.
+    """
+    tecnico = models.ForeignKey(Tecnico, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    ultimo_dia = models.DateField(verbose_name="Último día ajustado")
+    nivel = models.FloatField()
+    tendencia = models.FloatField()
+    estacionalidad = models.JSONField(help_text="Componente estacional por día de la semana (lunes = 0)")
+
+    def __str__(self):
+        return f"Pronóstico {self.tecnico_id or 'total'} hasta {self.ultimo_dia}"
+
+    class Meta:
+        verbose_name = "Estado del pronóstico"
+        verbose_name_plural = "Estados del pronóstico"
+
+class InformePDF(models.Model):
+    """
+    Trabajo de generación del informe PDF del dashboard (ver ordenes/informes.py).
+    La API lo crea, un worker lo procesa y el cliente consulta su estado
+    hasta que el archivo está listo para descargar.
+    """
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'En cola'),
+        ('PROCESANDO', 'Generando'),
+        ('LISTO', 'Listo'),
+        ('ERROR', 'Error'),
+    ]
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='informes_pdf')
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default='PENDIENTE', db_index=True)
+    filtros = models.JSONField(help_text="periodo, tecnicos_ids, desde y hasta del informe")
+    llave = models.CharField(max_length=40, blank=True, default='', help_text="Filtros + versión de los datos (ver ArchivoInforme)")
+    archivo = models.CharField(max_length=255, blank=True, default='', verbose_name="Ruta del PDF")
+    error = models.TextField(blank=True, default='')
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(blank=True, null=True)
+    fecha_fin = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Informe #{self.pk} ({self.estado})"
+
+    class Meta:
+        verbose_name = "Informe PDF"
+        verbose_name_plural = "Informes PDF"
+        ordering = ['-fecha_creacion']
+
+class ArchivoInforme(models.Model):
+    """
+    Índice de informes ya generados (PDF y CSV, ver ordenes/almacen.py): la
+    llave (filtros + versión de los datos) apunta al hash SHA-256 del
+    contenido. El archivo se guarda una sola vez por hash, aunque varias
+    llaves produzcan exactamente el mismo contenido.
+    """
+    llave = models.CharField(max_length=40, unique=True)
+    extension = models.CharField(max_length=10)
+    hash = models.CharField(max_length=64, db_index=True, verbose_name="SHA-256 del contenido")
+    tamano = models.PositiveBigIntegerField(default=0, verbose_name="Tamaño (bytes)")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.llave[:10]}… → {self.hash[:10]}….{self.extension}"
+
+    class Meta:
+        verbose_name = "Archivo de informe"
+        verbose_name_plural = "Archivos de informes"
 
 class SystemState(models.Model):
     """
@@ -0,0 +1,252 @@
+"""
+Dibujo del informe gerencial con ReportLab.
+
+Este módulo no importa Django: recibe los datos ya calculados y formateados
+(ver informes.datos_informe) y sólo arma el documento. Así se puede ejecutar
+en procesos separados (pool de informes por técnico) sin configurar Django ni
+abrir conexiones a la base en cada proceso.
+
+El anexo (todas las órdenes cerradas del período) se dibuja por partes: las
+filas llegan de un iterable (ver exportaciones.filas_historial) y se arman
+tablas de una página a medida que ReportLab las consume, así el tiempo crece
+lineal con las filas y nunca se arma una Table gigante en memoria.
+"""
+import functools
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    SimpleDocTemplate,
+    Paragraph,
+    Spacer,
+    Table,
+    TableStyle,
+    PageBreak,
+    Image,
+)
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+
+
+FILAS_POR_PAGINA_ANEXO = 45
+ALTO_FILA_ANEXO = 13
+ANCHOS_ANEXO = [1.5 * cm, 4 * cm, 4.5 * cm, 2.6 * cm, 2.2 * cm, 2.2 * cm]
+LARGOS_ANEXO = [10, 30, 34, 18, 16, 16]  # caracteres visibles por columna
+
+ESTILO_TABLA_ANEXO = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+
+@functools.lru_cache(maxsize=1)
+def estilos():
+    return getSampleStyleSheet()
+
+
+class _FlowablesPerezosos(list):
+    """
+    Lista de flowables que se rellena desde un iterable cuando se vacía.
+    BaseDocTemplate.build() consume la lista desde el frente y consulta
+    len() en cada vuelta, así sólo hay unas pocas tablas vivas a la vez.
+    """
+
+    def __init__(self, iniciales, resto):
+        super().__init__(iniciales)
+        self._resto = iter(resto)
+
+    def __len__(self):
+        if not super().__len__():
+            siguiente = next(self._resto, None)
+            if siguiente is not None:
+                self.append(siguiente)
+        return super().__len__()
+
+
+def _recortar(valor, largo):
+    texto = str(valor)
+    return texto if len(texto) <= largo else texto[:largo - 1] + "…"
+
+
+def _tabla_anexo(encabezado, bloque):
+    datos = [encabezado] + bloque
+    # Anchos y altos fijos: ReportLab no tiene que medir cada celda
+    tabla = Table(
+        datos,
+        colWidths=ANCHOS_ANEXO,
+        rowHeights=[ALTO_FILA_ANEXO] * len(datos),
+        hAlign='LEFT',
+    )
+    tabla.setStyle(ESTILO_TABLA_ANEXO)
+    return tabla
+
+
+def tablas_anexo(encabezado, filas, filas_por_pagina=FILAS_POR_PAGINA_ANEXO):
+    """Una Table que cabe en una página por cada `filas_por_pagina` filas."""
+    bloque = []
+    paginas = 0
+    for fila in filas:
+        bloque.append([_recortar(valor, largo) for valor, largo in zip(fila, LARGOS_ANEXO)])
+        if len(bloque) == filas_por_pagina:
+            if paginas:
+                yield PageBreak()
+            yield _tabla_anexo(encabezado, bloque)
+            bloque = []
+            paginas += 1
+    if bloque or not paginas:
+        if paginas:
+            yield PageBreak()
+        yield _tabla_anexo(encabezado, bloque)
+
+
+def dibujar_pdf(datos, destino, anexo=None):
+    """
+    Escribe en `destino` (ruta o archivo binario) el informe con KPIs, gráfico
+    por técnico, ranking, historial de cerradas y alertas. Con `anexo`
+    (encabezado, iterable de filas) se agrega al final el listado completo.
+    """
+    doc = SimpleDocTemplate(
+        destino,
+        pagesize=A4,
+        pageCompression=1,
+        # Sin fecha de creación ni ID aleatorio: mismo contenido, mismos bytes
+        # (el almacén de informes deduplica por hash)
+        invariant=1,
+        leftMargin=2 * cm,
+        rightMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+    )
+    styles = estilos()
+    story = []
+
+    # --- Logo empresa (opcional) ---
+    if datos['logo']:
+        # Tamaño aprox. 3x3 cm
+        logo = Image(io.BytesIO(datos['logo']), width=3 * cm, height=3 * cm)
+        logo.hAlign = 'LEFT'
+        story.append(logo)
+        story.append(Spacer(1, 0.3 * cm))
+
+    # --- Portada / título ---
+    story.append(Paragraph(datos['titulo'], styles['Title']))
+    story.append(Spacer(1, 0.4 * cm))
+
+    story.append(Paragraph(datos['periodo'], styles['Normal']))
+
+    # Fecha y hora de generación del informe
+    story.append(Paragraph(datos['generado'], styles['Normal']))
+
+    story.append(Spacer(1, 0.5 * cm))
+
+    # Texto según técnicos filtrados
+    if datos['tecnicos']:
+        story.append(Paragraph(datos['tecnicos'], styles['Normal']))
+
+    story.append(Spacer(1, 0.5 * cm))
+
+    # --- KPIs principales ---
+    story.append(Paragraph("KPIs principales", styles['Heading2']))
+    story.append(Spacer(1, 0.2 * cm))
+
+    tabla_kpis = Table([["KPI", "Valor"]] + datos['kpis'], hAlign='LEFT')
+    tabla_kpis.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f1f5f9")),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#0f172a")),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ]))
+    story.append(tabla_kpis)
+    story.append(Spacer(1, 0.5 * cm))
+
+    # --- Gráfico: Órdenes por técnico ---
+    categorias, valores = datos['grafico']
+    if categorias:
+        story.append(Paragraph("Órdenes por técnico", styles['Heading2']))
+        story.append(Spacer(1, 0.2 * cm))
+
+        drawing = Drawing(16 * cm, 8 * cm)
+        bc = VerticalBarChart()
+        bc.x = 1 * cm
+        bc.y = 1 * cm
+        bc.height = 6 * cm
+        bc.width = 14 * cm
+        bc.data = [valores]
+        bc.categoryAxis.categoryNames = categorias
+        bc.categoryAxis.labels.angle = 45
+        bc.categoryAxis.labels.dy = -10
+        bc.barSpacing = 0.5
+        bc.valueAxis.valueMin = 0
+        drawing.add(bc)
+        story.append(drawing)
+        story.append(Spacer(1, 0.5 * cm))
+
+    # --- Ranking de técnicos ---
+    story.append(Paragraph("Ranking de técnicos (solo órdenes terminadas)", styles['Heading2']))
+    story.append(Spacer(1, 0.2 * cm))
+
+    ranking_data = [["Técnico", "Terminadas", "% SLA OK", "T. prom. (h)"]] + datos['ranking']
+    tabla_ranking = Table(ranking_data, hAlign='LEFT')
+    tabla_ranking.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ]))
+    story.append(tabla_ranking)
+    story.append(PageBreak())
+
+    # --- Historial de órdenes cerradas ---
+    story.append(Paragraph("Últimas órdenes cerradas", styles['Heading2']))
+    story.append(Spacer(1, 0.2 * cm))
+
+    historial_data = [["ID", "Técnico", "Cliente", "Fecha cierre"]] + datos['historial']
+    tabla_historial = Table(
+        historial_data,
+        repeatRows=1,
+        hAlign='LEFT',
+        colWidths=[2 * cm, 5 * cm, 6 * cm, 3 * cm]
+    )
+    tabla_historial.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ]))
+    story.append(tabla_historial)
+    story.append(Spacer(1, 0.5 * cm))
+
+    # --- Alertas operacionales ---
+    story.append(Paragraph("Alertas operacionales", styles['Heading2']))
+    story.append(Spacer(1, 0.2 * cm))
+
+    if datos['alertas']:
+        for a in datos['alertas']:
+            story.append(Paragraph(f"• {a}", styles['Normal']))
+    else:
+        story.append(Paragraph("No se detectaron alertas en este período.", styles['Normal']))
+
+    # --- Anexo: listado completo, una tabla por página ---
+    if anexo is not None:
+        encabezado, filas = anexo
+        story.append(PageBreak())
+        story.append(Paragraph("Anexo: órdenes cerradas del período", styles['Heading2']))
+        story.append(Spacer(1, 0.2 * cm))
+        story = _FlowablesPerezosos(story, tablas_anexo(encabezado, filas))
+
+    # --- Construir PDF ---
+    doc.build(story)
+
+
+def pdf_en_bytes(datos):
+    """dibujar_pdf() en memoria (lo que ejecuta cada proceso del pool)."""
+    buffer = io.BytesIO()
+    dibujar_pdf(datos, buffer)
+    return buffer.getvalue()
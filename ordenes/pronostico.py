@@ -0,0 +1,205 @@
+"""
+Pronóstico de demanda (órdenes creadas por día) para la gráfica de tendencia.
+
+Se ajusta un Holt-Winters aditivo con estacionalidad semanal, vectorizado con
+NumPy: todas las series (total + una por técnico) avanzan juntas día a día,
+así que el costo es O(días) operaciones sobre vectores y no O(días × series)
+iteraciones en Python.
+
+El estado del modelo (nivel, tendencia y estacionalidad) queda guardado en
+EstadoPronostico; cada ejecución continúa desde ahí con los días cerrados
+nuevos. Las predicciones se guardan en PrediccionDemanda y el dashboard sólo
+las lee (ver prediccion_periodo).
+"""
+import datetime
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+from tecnicos.models import Tecnico
+from .models import EstadoPronostico, PrediccionDemanda, ResumenDiario
+
+
+ALFA = 0.3      # suavizamiento del nivel
+BETA = 0.05     # suavizamiento de la tendencia
+GAMMA = 0.2     # suavizamiento de la estacionalidad
+TEMPORADA = 7   # estacionalidad semanal (índice = día de la semana)
+HORIZONTE = 14  # días a pronosticar después del último día cerrado
+
+
+# =====================================================
+# Modelo (NumPy puro, sin acceso a la base de datos)
+# =====================================================
+
+def estado_inicial(valores, dias_semana):
+    """
+    Estado de partida para una matriz (series × días): nivel = promedio de la
+    primera semana, tendencia 0 y estacionalidad = desvío de cada día de esa
+    semana respecto del nivel.
+    """
+    semana = valores[:, :TEMPORADA]
+    nivel = semana.mean(axis=1)
+    tendencia = np.zeros(valores.shape[0])
+    estacion = np.zeros((valores.shape[0], TEMPORADA))
+    estacion[:, dias_semana[:semana.shape[1]]] = semana - nivel[:, None]
+    return nivel, tendencia, estacion
+
+
+def ajustar(valores, dias_semana, nivel, tendencia, estacion):
+    """
+    Avanza el modelo sobre `valores` (series × días) desde el estado dado.
+    `dias_semana` es el día de la semana (0-6) de cada columna.
+    Devuelve (predicciones a un paso, nivel, tendencia, estacion); las
+    predicciones tienen la misma forma que `valores`.
+    """
+    nivel = nivel.astype(float)
+    tendencia = tendencia.astype(float)
+    estacion = estacion.astype(float)
+    predicciones = np.empty(valores.shape)
+
+    for t, dia_semana in enumerate(dias_semana):
+        y = valores[:, t]
+        s = estacion[:, dia_semana]
+        predicciones[:, t] = nivel + tendencia + s
+
+        nivel_nuevo = ALFA * (y - s) + (1 - ALFA) * (nivel + tendencia)
+        tendencia = BETA * (nivel_nuevo - nivel) + (1 - BETA) * tendencia
+        estacion[:, dia_semana] = GAMMA * (y - nivel_nuevo) + (1 - GAMMA) * s
+        nivel = nivel_nuevo
+
+    return np.clip(predicciones, 0, None), nivel, tendencia, estacion
+
+
+def pronosticar(nivel, tendencia, estacion, dias_semana):
+    """Pronóstico de los próximos len(dias_semana) días (series × días)."""
+    pasos = np.arange(1, len(dias_semana) + 1)
+    valores = nivel[:, None] + tendencia[:, None] * pasos + estacion[:, dias_semana]
+    return np.clip(valores, 0, None)
+
+
+# =====================================================
+# Trabajo periódico: leer el resumen, ajustar y guardar
+# =====================================================
+
+def _dias(inicio, cantidad):
+    return [inicio + datetime.timedelta(days=i) for i in range(cantidad)]
+
+
+def _matriz_conteos(series, inicio, hasta):
+    """Órdenes creadas por día (series × días) desde ResumenDiario, en una consulta."""
+    n_dias = (hasta - inicio).days + 1
+    fila_de = {tecnico_id: i for i, tecnico_id in enumerate(series)}
+    valores = np.zeros((len(series), n_dias))
+
+    filas = (
+        ResumenDiario.objects.filter(dia__gte=inicio, dia__lte=hasta)
+        .order_by()
+        .values('dia', 'tecnico_id')
+        .annotate(total=Sum('cantidad'))
+    )
+    columnas, indices, totales = [], [], []
+    for fila in filas:
+        columnas.append((fila['dia'] - inicio).days)
+        indices.append(fila_de.get(fila['tecnico_id'], -1))
+        totales.append(fila['total'])
+
+    if totales:
+        columnas = np.array(columnas)
+        indices = np.array(indices)
+        totales = np.array(totales, dtype=float)
+        # La fila 0 (total) suma todo; cada técnico sólo lo suyo
+        np.add.at(valores[0], columnas, totales)
+        con_tecnico = indices > 0
+        np.add.at(valores, (indices[con_tecnico], columnas[con_tecnico]), totales[con_tecnico])
+    return valores
+
+
+def actualizar_pronostico(hasta=None, completo=False):
+    """
+    Ajusta el modelo con los días cerrados (hasta ayer por defecto) y guarda
+    predicciones + estado. Si ya existe un estado para las mismas series sólo
+    se procesan los días nuevos; con `completo=True` (o si cambió la lista de
+    técnicos) se reajusta toda la historia.
+    Devuelve un dict con series, días ajustados y segundos de ajuste.
+    """
+    hasta = hasta or timezone.localdate() - datetime.timedelta(days=1)
+    series = [None] + list(Tecnico.objects.order_by('pk').values_list('pk', flat=True))
+
+    estados = {estado.tecnico_id: estado for estado in EstadoPronostico.objects.all()}
+    ultimos = {estado.ultimo_dia for estado in estados.values()}
+    incremental = not completo and set(estados) == set(series) and len(ultimos) == 1
+
+    if incremental:
+        inicio = ultimos.pop() + datetime.timedelta(days=1)
+    else:
+        inicio = ResumenDiario.objects.aggregate(primero=Min('dia'))['primero']
+
+    if inicio is None or inicio > hasta:
+        return {"series": len(series), "dias": 0, "segundos": 0.0}
+
+    dias = _dias(inicio, (hasta - inicio).days + 1)
+    dias_semana = np.array([dia.weekday() for dia in dias])
+    valores = _matriz_conteos(series, inicio, hasta)
+
+    t0 = time.perf_counter()
+    if incremental:
+        nivel = np.array([estados[t].nivel for t in series])
+        tendencia = np.array([estados[t].tendencia for t in series])
+        estacion = np.array([estados[t].estacionalidad for t in series])
+    else:
+        nivel, tendencia, estacion = estado_inicial(valores, dias_semana)
+    predicciones, nivel, tendencia, estacion = ajustar(valores, dias_semana, nivel, tendencia, estacion)
+
+    futuros = _dias(hasta + datetime.timedelta(days=1), HORIZONTE)
+    futuro = pronosticar(nivel, tendencia, estacion, np.array([dia.weekday() for dia in futuros]))
+    segundos = time.perf_counter() - t0
+
+    filas = [
+        PrediccionDemanda(dia=dia, tecnico_id=tecnico_id, cantidad=float(cantidad))
+        for matriz, lista_dias in ((predicciones, dias), (futuro, futuros))
+        for tecnico_id, fila in zip(series, matriz)
+        for dia, cantidad in zip(lista_dias, fila)
+    ]
+    nuevos_estados = [
+        EstadoPronostico(
+            tecnico_id=tecnico_id,
+            ultimo_dia=hasta,
+            nivel=float(nivel[i]),
+            tendencia=float(tendencia[i]),
+            estacionalidad=[float(valor) for valor in estacion[i]],
+        )
+        for i, tecnico_id in enumerate(series)
+    ]
+
+    with transaction.atomic():
+        if incremental:
+            PrediccionDemanda.objects.filter(dia__gte=inicio).delete()
+        else:
+            PrediccionDemanda.objects.all().delete()
+        PrediccionDemanda.objects.bulk_create(filas, batch_size=1000)
+        EstadoPronostico.objects.all().delete()
+        EstadoPronostico.objects.bulk_create(nuevos_estados)
+
+    return {"series": len(series), "dias": len(dias), "segundos": segundos}
+
+
+# =====================================================
+# Lectura para el dashboard
+# =====================================================
+
+def prediccion_periodo(desde, hasta, tecnicos_ids=None):
+    """
+    {dia: órdenes esperadas} entre `desde` y `hasta` (inclusive), en una sola
+    consulta indexada. Con técnicos se suman sus series; sin filtro se usa
+    la serie total.
+    """
+    qs = PrediccionDemanda.objects.filter(dia__gte=desde, dia__lte=hasta)
+    if tecnicos_ids:
+        qs = qs.filter(tecnico_id__in=tecnicos_ids)
+    else:
+        qs = qs.filter(tecnico__isnull=True)
+    por_dia = qs.order_by().values('dia').annotate(total=Sum('cantidad'))
+    return {item['dia']: item['total'] for item in por_dia}
@@ -0,0 +1,44 @@
+"""
+Datos comunes para las pruebas de ordenes y de las apps que la usan
+(tecnicos, whatsapp_webhook).
+
+    class MisTests(ApiAutenticadaTestMixin, TestCase):
+        def setUp(self):
+            super().setUp()                 # self.user, self.client_api
+            self.cliente = crear_cliente()
+            self.tecnico = crear_tecnico()
+
+Los valores por defecto son los que las pruebas dan por supuestos (el
+cliente "Cliente" con +56911111111, la técnica "Ana" de Fibra); cada campo se
+puede cambiar con kwargs.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from tecnicos.models import Tecnico
+
+from .models import Cliente
+
+
+def crear_cliente(**campos):
+    datos = {"nombre": "Cliente", "direccion": "Calle 1", "telefono": "+56911111111"}
+    return Cliente.objects.create(**{**datos, **campos})
+
+
+def crear_tecnico(**campos):
+    datos = {"nombre": "Ana", "rut": "1-9", "telefono": "+56900000000", "especialidad": "Fibra"}
+    return Tecnico.objects.create(**{**datos, **campos})
+
+
+class ApiAutenticadaTestMixin:
+    """Para TestCase: `self.user` autenticado en `self.client_api` y la caché del dashboard vacía."""
+
+    usuario_staff = False
+
+    def setUp(self):
+        super().setUp()
+        caches["dashboard"].clear()
+        self.user = User.objects.create_user("gerente", password="x", is_staff=self.usuario_staff)
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(self.user)
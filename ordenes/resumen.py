@@ -0,0 +1,303 @@
+"""
+Mantenimiento y lectura de la tabla de resumen diario (ResumenDiario).
+
+Cada orden aporta 1 a la celda (día de creación, técnico, estado, prioridad).
+Las señales de OrdenTrabajo mueven ese aporte cuando la orden se crea, cambia
+de estado, se reasigna o se elimina, así el dashboard lee O(días × técnicos)
+filas en vez de recorrer todas las órdenes.
+"""
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, Count, DurationField, ExpressionWrapper, F, FloatField, IntegerField, Q, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import OrdenTrabajo, ResumenDiario
+
+
+SLA_HOURS = 48
+
+# Los estados "legibles" se mantienen por compatibilidad con datos antiguos
+ESTADOS_PENDIENTES = ['Pendiente de Asignación', 'PENDIENTE']
+ESTADOS_EN_PROCESO = [
+    'Técnico en Camino',
+    'En Proceso',
+    'ASIGNADA',
+    'EN_CAMINO',
+    'EN_PROCESO',
+]
+ESTADOS_TERMINADOS = ['Trabajo Terminado', 'TERMINADO']
+
+GRUPOS_ESTADO = (
+    ('pendientes', ESTADOS_PENDIENTES),
+    ('en_proceso', ESTADOS_EN_PROCESO),
+    ('terminadas', ESTADOS_TERMINADOS),
+)
+
+CAMPOS_ORDEN = ('fecha_creacion', 'fecha_cierre', 'tecnico_id', 'estado', 'prioridad')
+
+
+# =====================================================
+# Aporte de una orden al resumen
+# =====================================================
+
+def horas_cierre(orden):
+    """Horas entre la creación y el cierre de la orden (0 si no hay cierre)."""
+    fecha_inicio = orden['fecha_creacion']
+    fecha_cierre = orden.get('fecha_cierre') or fecha_inicio
+    return (fecha_cierre - fecha_inicio).total_seconds() / 3600.0
+
+
+def aporte_orden(orden):
+    """
+    Devuelve (clave, horas, dentro_sla) para una orden representada como dict
+    con las llaves de CAMPOS_ORDEN. Sólo las órdenes terminadas suman horas.
+    """
+    clave = {
+        'dia': timezone.localdate(orden['fecha_creacion']),
+        'tecnico_id': orden['tecnico_id'],
+        'estado': orden['estado'],
+        'prioridad': orden['prioridad'],
+    }
+    if orden['estado'] in ESTADOS_TERMINADOS:
+        horas = horas_cierre(orden)
+        return clave, horas, int(horas <= SLA_HOURS)
+    return clave, 0.0, 0
+
+
+def grupo_estado(estado):
+    """KPI al que pertenece un estado ('pendientes', 'en_proceso', 'terminadas' o None)."""
+    for grupo, estados in GRUPOS_ESTADO:
+        if estado in estados:
+            return grupo
+    return None
+
+
+def datos_orden(orden):
+    """Extrae de una instancia los campos que definen su aporte al resumen."""
+    return {campo: getattr(orden, campo) for campo in CAMPOS_ORDEN}
+
+
+def _sumar(clave, cantidad, horas, sla):
+    # Suma los deltas (con signo) a la celda `clave`
+    # La celda con técnico NULL puede repetirse (NULL no es único en SQL),
+    # por eso siempre actualizamos una sola fila concreta.
+    pk = (
+        ResumenDiario.objects.filter(**clave)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if pk is None and cantidad > 0:
+        try:
+            with transaction.atomic():
+                ResumenDiario.objects.create(cantidad=cantidad, horas_cierre=horas, dentro_sla=sla, **clave)
+            return
+        except IntegrityError:
+            pk = ResumenDiario.objects.filter(**clave).values_list('pk', flat=True).first()
+
+    if pk is not None:
+        ResumenDiario.objects.filter(pk=pk).update(
+            cantidad=F('cantidad') + cantidad,
+            horas_cierre=F('horas_cierre') + horas,
+            dentro_sla=F('dentro_sla') + sla,
+        )
+
+
+def mover_aporte(anterior, nuevo):
+    """
+    Traslada el aporte de una orden entre celdas del resumen.
+    `anterior` / `nuevo` son dicts de datos_orden() o None (alta / baja).
+    """
+    aporte_anterior = aporte_orden(anterior) if anterior else None
+    aporte_nuevo = aporte_orden(nuevo) if nuevo else None
+
+    if aporte_anterior == aporte_nuevo:
+        return
+
+    with transaction.atomic():
+        if aporte_anterior:
+            _sumar(aporte_anterior[0], -1, -aporte_anterior[1], -aporte_anterior[2])
+        if aporte_nuevo:
+            _sumar(aporte_nuevo[0], 1, aporte_nuevo[1], aporte_nuevo[2])
+
+
+def mover_aportes(pares):
+    """
+    mover_aporte() para muchas órdenes a la vez: `pares` es una lista de
+    (anterior, nuevo). Los movimientos se suman por celda y se escriben con
+    un SELECT de las celdas, un bulk_create de las nuevas y un solo UPDATE
+    (incrementos con CASE) de las existentes, sin importar cuántas sean.
+    """
+    deltas = {}
+    for anterior, nuevo in pares:
+        for datos, signo in ((anterior, -1), (nuevo, 1)):
+            if not datos:
+                continue
+            clave, horas, sla = aporte_orden(datos)
+            delta = deltas.setdefault(tuple(sorted(clave.items())), [0, 0.0, 0])
+            delta[0] += signo
+            delta[1] += signo * horas
+            delta[2] += signo * sla
+    deltas = {clave: delta for clave, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    filtro = Q()
+    for clave in deltas:
+        filtro |= Q(**dict(clave))
+    # Con técnico NULL puede haber celdas repetidas: se usa la de menor pk, como _sumar
+    existentes = {}
+    for fila in ResumenDiario.objects.filter(filtro).order_by('-pk').values('pk', 'dia', 'tecnico_id', 'estado', 'prioridad'):
+        pk = fila.pop('pk')
+        existentes[tuple(sorted(fila.items()))] = pk
+
+    with transaction.atomic():
+        nuevas = {clave: delta for clave, delta in deltas.items() if clave not in existentes and delta[0] > 0}
+        try:
+            with transaction.atomic():
+                ResumenDiario.objects.bulk_create([
+                    ResumenDiario(cantidad=cantidad, horas_cierre=horas, dentro_sla=sla, **dict(clave))
+                    for clave, (cantidad, horas, sla) in nuevas.items()
+                ])
+        except IntegrityError:
+            # Otra transacción creó alguna de esas celdas: de a una
+            for clave, delta in nuevas.items():
+                _sumar(dict(clave), *delta)
+
+        cambios = [(existentes[clave], delta) for clave, delta in deltas.items() if clave in existentes]
+        if cambios:
+            def incremento(columna, posicion, tipo):
+                return F(columna) + Case(
+                    *[When(pk=pk, then=Value(delta[posicion])) for pk, delta in cambios],
+                    default=Value(0), output_field=tipo,
+                )
+
+            ResumenDiario.objects.filter(pk__in=[pk for pk, _ in cambios]).update(
+                cantidad=incremento('cantidad', 0, IntegerField()),
+                horas_cierre=incremento('horas_cierre', 1, FloatField()),
+                dentro_sla=incremento('dentro_sla', 2, IntegerField()),
+            )
+
+
+def reconstruir_resumen():
+    """
+    Borra y recalcula todo el resumen en una sola consulta agregada; las
+    duraciones de cierre y el SLA se calculan en SQL.
+    Devuelve la cantidad de celdas generadas.
+    """
+    terminadas = Q(estado__in=ESTADOS_TERMINADOS)
+    duracion = ExpressionWrapper(
+        Coalesce('fecha_cierre', 'fecha_creacion') - F('fecha_creacion'),
+        output_field=DurationField(),
+    )
+    filas = (
+        OrdenTrabajo.objects.order_by()
+        .annotate(dia=TruncDate('fecha_creacion'))
+        .values('dia', 'tecnico_id', 'estado', 'prioridad')
+        .annotate(
+            total=Count('id'),
+            duracion_total=Sum(duracion, filter=terminadas),
+            en_sla=Count('id', filter=terminadas & (
+                Q(fecha_cierre__isnull=True)
+                | Q(fecha_cierre__lte=F('fecha_creacion') + datetime.timedelta(hours=SLA_HOURS))
+            )),
+        )
+    )
+
+    celdas = [
+        ResumenDiario(
+            dia=fila['dia'],
+            tecnico_id=fila['tecnico_id'],
+            estado=fila['estado'],
+            prioridad=fila['prioridad'],
+            cantidad=fila['total'],
+            horas_cierre=fila['duracion_total'].total_seconds() / 3600.0 if fila['duracion_total'] else 0.0,
+            dentro_sla=fila['en_sla'],
+        )
+        for fila in filas
+    ]
+
+    with transaction.atomic():
+        ResumenDiario.objects.all().delete()
+        ResumenDiario.objects.bulk_create(celdas, batch_size=500)
+    return len(celdas)
+
+
+# =====================================================
+# Lectura del resumen para el dashboard
+# =====================================================
+
+def resumen_periodo(desde, hasta, tecnicos_ids=None):
+    """Celdas del resumen dentro del rango de días (inclusive) y técnicos."""
+    qs = ResumenDiario.objects.filter(dia__gte=desde, dia__lte=hasta, cantidad__gt=0)
+    if tecnicos_ids:
+        qs = qs.filter(tecnico_id__in=tecnicos_ids)
+    return qs
+
+
+def kpis_resumen(resumen_qs):
+    """Totales por grupo de estado, horas de cierre y SLA en una sola consulta."""
+    totales = resumen_qs.aggregate(
+        total=Sum('cantidad'),
+        pendientes=Sum('cantidad', filter=Q(estado__in=ESTADOS_PENDIENTES)),
+        en_proceso=Sum('cantidad', filter=Q(estado__in=ESTADOS_EN_PROCESO)),
+        terminadas=Sum('cantidad', filter=Q(estado__in=ESTADOS_TERMINADOS)),
+        suma_horas=Sum('horas_cierre', filter=Q(estado__in=ESTADOS_TERMINADOS)),
+        en_sla=Sum('dentro_sla', filter=Q(estado__in=ESTADOS_TERMINADOS)),
+    )
+    return {clave: valor or 0 for clave, valor in totales.items()}
+
+
+def serie_diaria(resumen_qs):
+    """{dia: cantidad} de órdenes creadas por día."""
+    por_dia = (
+        resumen_qs.order_by()
+        .values('dia')
+        .annotate(total=Sum('cantidad'))
+    )
+    return {item['dia']: item['total'] for item in por_dia}
+
+
+def por_tecnico(resumen_qs):
+    """
+    Una fila por técnico con el total de órdenes, las pendientes, las
+    terminadas con sus horas de cierre y SLA, y las órdenes activas (para
+    sobrecarga).
+    Ordenado por cantidad total descendente.
+    """
+    terminadas = Q(estado__in=ESTADOS_TERMINADOS)
+    return list(
+        resumen_qs.order_by()
+        .values('tecnico_id', 'tecnico__nombre')
+        .annotate(
+            total=Sum('cantidad'),
+            pendientes=Sum('cantidad', filter=Q(estado__in=ESTADOS_PENDIENTES)),
+            terminadas=Sum('cantidad', filter=terminadas),
+            suma_horas=Sum('horas_cierre', filter=terminadas),
+            en_sla=Sum('dentro_sla', filter=terminadas),
+            activas=Sum('cantidad', filter=Q(estado__in=ESTADOS_EN_PROCESO)),
+        )
+        .order_by('-total')
+    )
+
+
+def ranking_desde_resumen(filas_tecnicos):
+    """Ranking de técnicos por órdenes terminadas a partir de por_tecnico()."""
+    ranking = []
+    for item in sorted(filas_tecnicos, key=lambda fila: fila['terminadas'] or 0, reverse=True):
+        total_tec = item['terminadas'] or 0
+        if total_tec == 0:
+            continue
+
+        ranking.append({
+            "id": item['tecnico_id'],
+            "nombre": item['tecnico__nombre'] or 'Sin técnico',
+            "terminadas": total_tec,
+            "tiempo_promedio_cierre_horas": (item['suma_horas'] or 0.0) / total_tec,
+            "sla_porcentaje": round((item['en_sla'] or 0) * 100 / total_tec, 1),
+        })
+    return ranking
@@ -1,17 +1,31 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from core.campos import CamposDinamicosSerializerMixin
 from .models import Cliente, OrdenTrabajo
 from tecnicos.serializers import TecnicoSerializer
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Cliente
         fields = ['id', 'nombre', 'direccion', 'telefono', 'correo', 'fecha_registro']
 
-class OrdenTrabajoSerializer(serializers.ModelSerializer):
+    def validate_telefono(self, value):
+        # La validación del modelo (Cliente.clean), la misma del admin
+        cliente = Cliente(pk=self.instance.pk if self.instance else None, telefono=value)
+        try:
+            cliente.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict['telefono'])
+        return value
+
+class OrdenTrabajoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     # Estos campos son de solo lectura y sirven para mostrar detalles completos en el dashboard
     tecnico_detalle = TecnicoSerializer(source='tecnico', read_only=True)
     cliente_detalle = ClienteSerializer(source='cliente', read_only=True)
 
+    # ?expand=tecnico,cliente (ver core/campos.py)
+    expandibles = {'tecnico': 'tecnico_detalle', 'cliente': 'cliente_detalle'}
+
     class Meta:
         model = OrdenTrabajo
         fields = [
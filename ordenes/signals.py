@@ -0,0 +1,125 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from tecnicos.models import Tecnico
+
+from . import busqueda_sql
+from . import cache as dashboard_cache
+from .cambios import registrar_baja
+from .eventos import publicar_evento
+from .models import Cliente, OrdenTrabajo
+from .resumen import CAMPOS_ORDEN, datos_orden, mover_aporte
+from .transiciones import aplicar_fechas, registrar_transicion
+
+
+# ==========================================
+# Fechas, bitácora de estados y ResumenDiario
+# ==========================================
+
+@receiver(pre_save, sender=OrdenTrabajo)
+def guardar_estado_previo(sender, instance, raw=False, **kwargs):
+    # Guardamos cómo estaba la orden en BD para restar su aporte anterior
+    # al resumen y para saber si cambió de estado / técnico.
+    instance._datos_previos = None
+    if raw:
+        return
+    if instance.pk:
+        instance._datos_previos = (
+            OrdenTrabajo.objects.filter(pk=instance.pk).values(*CAMPOS_ORDEN).first()
+        )
+    aplicar_fechas(instance, instance._datos_previos)
+
+
+@receiver(post_save, sender=OrdenTrabajo)
+def actualizar_resumen(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = None if created else getattr(instance, '_datos_previos', None)
+    mover_aporte(anterior, datos_orden(instance))
+
+    # Quien hizo el cambio lo informa la vista / el admin con `_usuario_cambio`
+    registrar_transicion(
+        instance,
+        anterior['estado'] if anterior else '',
+        usuario=getattr(instance, '_usuario_cambio', None),
+    )
+
+
+@receiver(post_delete, sender=OrdenTrabajo)
+def descontar_resumen(sender, instance, **kwargs):
+    mover_aporte(datos_orden(instance), None)
+
+
+# ==========================================
+# Eventos en vivo (SSE) para el dashboard y el tablero
+# ==========================================
+
+@receiver(post_save, sender=OrdenTrabajo)
+def publicar_cambio_orden(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        publicar_evento(instance, 'creada')
+    else:
+        anterior = getattr(instance, '_datos_previos', None)
+        publicar_evento(instance, 'actualizada', anterior['estado'] if anterior else instance.estado)
+
+
+@receiver(post_delete, sender=OrdenTrabajo)
+def publicar_baja_orden(sender, instance, **kwargs):
+    publicar_evento(instance, 'eliminada')
+
+
+# ==========================================
+# Feed de cambios: lápidas de registros eliminados
+# ==========================================
+
+@receiver(post_delete, sender=OrdenTrabajo)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Tecnico)
+def registrar_baja_feed(sender, instance, **kwargs):
+    registrar_baja(instance)
+
+
+@receiver(pre_delete, sender=Tecnico)
+def marcar_ordenes_del_tecnico(sender, instance, **kwargs):
+    # El SET_NULL de las órdenes se hace con un UPDATE que no toca
+    # fecha_actualizacion: la marcamos para que el feed las incluya.
+    instance.ordenes_asignadas.update(fecha_actualizacion=timezone.now())
+
+
+# ==========================================
+# Invalidación de la caché del dashboard
+# ==========================================
+
+@receiver(post_save, sender=OrdenTrabajo)
+@receiver(post_delete, sender=OrdenTrabajo)
+@receiver(post_save, sender=Tecnico)
+@receiver(post_delete, sender=Tecnico)
+@receiver(post_save, sender=Cliente)  # el historial muestra el cliente de cada orden
+@receiver(post_delete, sender=Cliente)
+def invalidar_cache_dashboard(sender, raw=False, **kwargs):
+    if not raw:
+        dashboard_cache.invalidar()
+
+
+# ==========================================
+# Triggers de la búsqueda FTS5 durante `migrate`
+# ==========================================
+
+# Las migraciones corren sin los triggers (SQLite no deja rehacer una tabla
+# que otro trigger lee) y al terminar se reindexa y se vuelven a poner; ver
+# ordenes/busqueda_sql.py. Se conectan en OrdenesConfig.ready() con
+# sender=la app, para que corran una vez por `migrate` y no una por app.
+
+def quitar_triggers_busqueda(sender, using, plan=None, **kwargs):
+    if plan != []:
+        busqueda_sql.quitar_triggers(connections[using])
+
+
+def poner_triggers_busqueda(sender, using, plan=None, **kwargs):
+    # plan == []: no se aplicó nada, los triggers siguen puestos
+    if plan != []:
+        busqueda_sql.poner_triggers(connections[using])
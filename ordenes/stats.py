@@ -0,0 +1,399 @@
+"""
+Motor de estadísticas compartido por el dashboard, el CSV y el informe PDF.
+
+Todos los agregados salen de la tabla ResumenDiario con sumas condicionales
+(`Sum(..., filter=Q(...))`), por lo que la cantidad de consultas es fija y no
+depende de cuántos técnicos u órdenes haya en el período.
+"""
+import base64
+import datetime
+
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tecnicos.models import Tecnico
+from .models import OrdenTrabajo
+from .pronostico import prediccion_periodo
+from .transiciones import tiempo_por_estado
+from .resumen import (
+    ESTADOS_EN_PROCESO,
+    ESTADOS_PENDIENTES,
+    ESTADOS_TERMINADOS,
+    SLA_HOURS,
+    kpis_resumen,
+    por_tecnico,
+    ranking_desde_resumen,
+    resumen_periodo,
+    serie_diaria,
+)
+
+
+SOBRECARGA_UMBRAL = 5  # órdenes activas por técnico para marcar sobrecarga
+
+# Grupos de estado que muestran los modales del dashboard
+GRUPOS_DETALLE = {
+    'pendientes': ESTADOS_PENDIENTES,
+    'en_ejecucion': ESTADOS_EN_PROCESO,
+    'terminadas': ESTADOS_TERMINADOS,
+}
+# Secciones del dashboard (?sections=) y los grupos de consultas que usa cada una
+GRUPOS_POR_SECCION = {
+    'kpis': ('kpis', 'tiempo_por_estado'),
+    'tendencia': ('serie',),
+    'tecnicos': ('por_tecnico',),
+    'estados': ('kpis',),
+    'historial': ('historial',),
+    'ranking': ('por_tecnico',),
+    'alertas': ('por_tecnico', 'vencidas'),
+    'filtros': (),
+}
+SECCIONES = tuple(GRUPOS_POR_SECCION)
+
+DETALLE_LIMITE = 50
+DETALLE_LIMITE_MAXIMO = 200
+
+
+# =====================================================
+# Filtros (período + técnicos)
+# =====================================================
+
+def get_tecnico_ids_from_request(request):
+    """
+    Lee técnicos desde la querystring y devuelve SOLO IDs válidos (enteros).
+    Soporta:
+      - ?tecnicos=1&tecnicos=2&tecnicos=3
+      - ?tecnico=1  (modo antiguo, compatibilidad)
+    Ignora valores como 'todos', 'all', 'on', '', etc.
+    """
+    tecnicos_ids = request.query_params.getlist('tecnicos')
+
+    # compatibilidad con ?tecnico=...
+    single_tecnico = request.query_params.get('tecnico')
+    if not tecnicos_ids and single_tecnico:
+        tecnicos_ids = [single_tecnico]
+
+    clean_ids = []
+    for t in tecnicos_ids:
+        if not t:
+            continue
+
+        t_str = str(t).strip().lower()
+        if t_str in ('todos', 'all', 'on', '(seleccionar todo)'):
+            # lo ignoramos, no es un ID
+            continue
+
+        # nos quedamos sólo con valores que se puedan convertir a int
+        try:
+            clean_ids.append(int(t))
+        except (TypeError, ValueError):
+            continue
+
+    return clean_ids
+
+
+def rango_fechas(periodo, hoy, inicio_str=None, fin_str=None):
+    """Devuelve (desde, hasta) inclusive para el período pedido."""
+    if periodo == 'hoy':
+        desde = hoy
+        hasta = hoy
+    elif periodo == 'semana':
+        desde = hoy - datetime.timedelta(days=6)
+        hasta = hoy
+    elif periodo == 'anio':
+        desde = hoy - datetime.timedelta(days=365)
+        hasta = hoy
+    elif periodo == 'personalizado' and inicio_str and fin_str:
+        try:
+            desde = datetime.datetime.strptime(inicio_str, "%Y-%m-%d").date()
+            hasta = datetime.datetime.strptime(fin_str, "%Y-%m-%d").date()
+        except ValueError:
+            desde = hoy - datetime.timedelta(days=29)
+            hasta = hoy
+    else:  # mes (por defecto)
+        desde = hoy - datetime.timedelta(days=29)
+        hasta = hoy
+
+    return desde, hasta
+
+
+def filtros_desde_request(request):
+    """
+    Lee periodo / técnicos / inicio / fin de la querystring.
+    Devuelve un dict con 'periodo', 'tecnicos_ids', 'desde' y 'hasta'.
+    """
+    periodo = request.query_params.get('periodo', 'mes')  # hoy, semana, mes, anio, personalizado
+    desde, hasta = rango_fechas(
+        periodo,
+        timezone.now().date(),
+        request.query_params.get('inicio', None),
+        request.query_params.get('fin', None),
+    )
+    return {
+        "periodo": periodo,
+        "tecnicos_ids": get_tecnico_ids_from_request(request),
+        "desde": desde,
+        "hasta": hasta,
+    }
+
+
+def secciones_desde_request(request):
+    """
+    Lee ?sections=kpis,alertas (o repetido: ?sections=kpis&sections=alertas).
+    Sin el parámetro devuelve todas las secciones; lanza ValueError si alguna
+    no existe.
+    """
+    pedidas = []
+    for valor in request.query_params.getlist('sections'):
+        pedidas += [seccion.strip().lower() for seccion in valor.split(',') if seccion.strip()]
+    if not pedidas:
+        return SECCIONES
+
+    desconocidas = sorted(set(pedidas) - set(SECCIONES))
+    if desconocidas:
+        raise ValueError(
+            "Secciones desconocidas: " + ", ".join(desconocidas)
+            + ". Válidas: " + ", ".join(SECCIONES)
+        )
+    # Orden canónico: la misma selección comparte caché y ETag
+    return tuple(seccion for seccion in SECCIONES if seccion in pedidas)
+
+
+def rango_datetime(desde, hasta):
+    """
+    Convierte los días `desde`..`hasta` (inclusive, hora local) en el rango
+    semiabierto [inicio, fin) de datetimes con zona horaria. Filtrar así
+    compara la columna directamente y permite usar los índices, a diferencia
+    de `fecha_creacion__date`, que aplica una función a cada fila.
+    """
+    zona = timezone.get_current_timezone()
+    inicio = datetime.datetime.combine(desde, datetime.time.min, tzinfo=zona)
+    fin = datetime.datetime.combine(hasta + datetime.timedelta(days=1), datetime.time.min, tzinfo=zona)
+    return inicio, fin
+
+
+def ordenes_periodo(desde, hasta, tecnicos_ids=None):
+    """Órdenes creadas entre `desde` y `hasta` (inclusive), filtradas por técnicos."""
+    inicio, fin = rango_datetime(desde, hasta)
+    qs = OrdenTrabajo.objects.filter(
+        fecha_creacion__gte=inicio,
+        fecha_creacion__lt=fin,
+    )
+    if tecnicos_ids:
+        qs = qs.filter(tecnico_id__in=tecnicos_ids)
+    return qs
+
+
+def firma_datos(filtros):
+    """
+    Versión de los datos que alimentan las estadísticas del período, leída
+    de la base (sirve igual en cualquier proceso): cantidad y última
+    modificación de las órdenes y de sus clientes (el historial los muestra),
+    técnicos (sólo id y nombre, lo que muestran las estadísticas y los
+    informes: un cambio de disponibilidad no cuenta) y conteo de pendientes
+    vencidas (que cambia con el reloj). Dos llamadas con la misma firma
+    producen las mismas estadísticas.
+    """
+    limite_vencida = timezone.now() - datetime.timedelta(hours=SLA_HOURS)
+    ordenes = ordenes_periodo(filtros['desde'], filtros['hasta'], filtros['tecnicos_ids']).order_by().aggregate(
+        total=Count('pk'),
+        ultima=Max('fecha_actualizacion'),
+        ultimo_cliente=Max('cliente__fecha_actualizacion'),
+        vencidas=Count('pk', filter=Q(
+            estado__in=ESTADOS_PENDIENTES,
+            fecha_creacion__lte=limite_vencida,
+        )),
+    )
+    tecnicos = Tecnico.objects.order_by('pk')
+    if filtros['tecnicos_ids']:
+        tecnicos = tecnicos.filter(pk__in=filtros['tecnicos_ids'])
+    return sorted(ordenes.items()), list(tecnicos.values_list('pk', 'nombre'))
+
+
+def _porcentaje(parte, total):
+    return round(parte * 100 / total, 1) if total > 0 else 0.0
+
+
+# =====================================================
+# Cálculo de estadísticas
+# =====================================================
+
+def _grupos_necesarios(secciones):
+    """Grupos de consultas que hacen falta para las secciones pedidas."""
+    grupos = set()
+    for seccion in secciones:
+        grupos.update(GRUPOS_POR_SECCION[seccion])
+    return grupos
+
+
+def kpis_desde_totales(totales):
+    """KPIs, porcentajes y SLA a partir de los totales de kpis_resumen()."""
+    total = totales['total']
+    pendientes = totales['pendientes']
+    en_proceso = totales['en_proceso']
+    terminadas = totales['terminadas']
+
+    avg_hours = 0.0
+    sla_porcentaje = 0.0
+    sla_fuera = 0
+    if terminadas > 0:
+        avg_hours = totales['suma_horas'] / terminadas
+        sla_porcentaje = round(totales['en_sla'] * 100 / terminadas, 1)
+        sla_fuera = terminadas - totales['en_sla']
+
+    return {
+        "total": total,
+        "pendientes": pendientes,
+        "en_proceso": en_proceso,
+        "terminadas": terminadas,
+        "productividad_tecnica": _porcentaje(terminadas, total),
+        "porcentaje_pendientes": _porcentaje(pendientes, total),
+        "porcentaje_en_proceso": _porcentaje(en_proceso, total),
+        "porcentaje_terminadas": _porcentaje(terminadas, total),
+        "tiempo_promedio_cierre_horas": avg_hours,
+        "sla_porcentaje": sla_porcentaje,
+        "sla_fuera": sla_fuera,
+    }
+
+
+def tecnicos_sobrecarga(filas_tecnicos):
+    """Técnicos con SOBRECARGA_UMBRAL o más órdenes activas (de por_tecnico())."""
+    return [
+        {
+            "id": item['tecnico_id'],
+            "nombre": item['tecnico__nombre'] or 'Sin técnico',
+            "cantidad": item['activas'],
+        }
+        for item in sorted(filas_tecnicos, key=lambda fila: fila['activas'] or 0, reverse=True)
+        if (item['activas'] or 0) >= SOBRECARGA_UMBRAL
+    ]
+
+
+def calcular_estadisticas(desde, hasta, tecnicos_ids=None, historial_limite=10, secciones=None):
+    """
+    Calcula KPIs, SLA, serie diaria, barras y ranking por técnico, alertas e
+    historial del período. Usa un número constante de consultas:
+      1. KPIs + SLA (un aggregate sobre el resumen)
+      2. filas por técnico (un GROUP BY sobre el resumen)
+      3. serie diaria (un GROUP BY sobre el resumen)
+      4. pendientes vencidas (un COUNT)
+      5. historial de cerradas (un SELECT con JOIN a técnico y cliente)
+      6. tiempo promedio en cada estado (un GROUP BY sobre la bitácora)
+      7. pronóstico precalculado del período (un SELECT sobre PrediccionDemanda)
+
+    Con `secciones` (subconjunto de SECCIONES) sólo se ejecutan las consultas
+    que esas secciones necesitan y el dict trae sólo esas llaves.
+    """
+    grupos = _grupos_necesarios(SECCIONES if secciones is None else secciones)
+    resumen_qs = resumen_periodo(desde, hasta, tecnicos_ids)
+    qs = ordenes_periodo(desde, hasta, tecnicos_ids)
+
+    stats = {
+        "desde": desde,
+        "hasta": hasta,
+        "tecnicos_ids": tecnicos_ids or [],
+    }
+
+    # ----- KPIs principales, SLA y tiempo promedio -----
+    if 'kpis' in grupos:
+        stats.update(kpis_desde_totales(kpis_resumen(resumen_qs)))
+
+    if 'tiempo_por_estado' in grupos:
+        stats["tiempo_por_estado"] = tiempo_por_estado(qs)
+
+    if 'serie' in grupos:
+        stats["serie_diaria"] = serie_diaria(resumen_qs)
+        stats["prediccion_diaria"] = prediccion_periodo(desde, hasta, tecnicos_ids)
+
+    # ----- Por técnico (barras, ranking y sobrecarga en la misma consulta) -----
+    if 'por_tecnico' in grupos:
+        filas_tecnicos = por_tecnico(resumen_qs)
+        stats.update({
+            "categorias_tecnicos": [(item['tecnico__nombre'] or 'Sin técnico') for item in filas_tecnicos],
+            "valores_tecnicos": [item['total'] for item in filas_tecnicos],
+            "ranking_tecnicos": ranking_desde_resumen(filas_tecnicos),
+            "tecnicos_sobrecarga": tecnicos_sobrecarga(filas_tecnicos),
+        })
+
+    # ----- Alertas: pendientes vencidas -----
+    if 'vencidas' in grupos:
+        limite_vencida = timezone.now() - datetime.timedelta(hours=SLA_HOURS)
+        stats["pendientes_vencidas"] = qs.filter(
+            estado__in=ESTADOS_PENDIENTES,
+            fecha_creacion__lte=limite_vencida,
+        ).count()
+
+    # ----- Historial de últimas cerradas -----
+    if 'historial' in grupos:
+        stats["historial"] = [
+            {
+                "id": ot.id,
+                "tecnico": str(getattr(ot, "tecnico", "")),
+                "cliente": str(getattr(ot, "cliente", "")),
+                "fecha_cierre": fecha_cierre(ot),
+            }
+            for ot in qs.filter(estado__in=ESTADOS_TERMINADOS)
+                        .select_related('tecnico', 'cliente')
+                        .order_by('-fecha_creacion')[:historial_limite]
+        ]
+
+    return stats
+
+
+def fecha_cierre(ot):
+    """Fecha de cierre a mostrar para una orden (creación si no hay cierre)."""
+    return ot.fecha_cierre or ot.fecha_creacion
+
+
+
+# =====================================================
+# Detalle para modales (paginación por llave)
+# =====================================================
+
+def codificar_cursor(fecha, pk):
+    """Cursor opaco con la posición (fecha_creacion, id) de la última fila."""
+    return base64.urlsafe_b64encode(f"{fecha.isoformat()}|{pk}".encode('utf-8')).decode('ascii')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (fecha, id) o lanza ValueError si el cursor no es válido."""
+    try:
+        fecha_str, pk = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        fecha = parse_datetime(fecha_str)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Cursor inválido")
+    if fecha is None:
+        raise ValueError("Cursor inválido")
+    return fecha, pk
+
+
+def pagina_detalle(qs, cursor=None, limite=DETALLE_LIMITE):
+    """
+    Una página del detalle, de la orden más nueva a la más antigua.
+    Se pagina por llave sobre (fecha_creacion, id): cada página es un único
+    SELECT con JOIN a cliente y técnico que sólo trae las columnas del modal,
+    y su costo no depende de cuántas páginas se hayan leído antes.
+    Devuelve (filas, cursor_siguiente o None).
+    """
+    if cursor:
+        fecha, pk = decodificar_cursor(cursor)
+        qs = qs.filter(Q(fecha_creacion__lt=fecha) | Q(fecha_creacion=fecha, id__lt=pk))
+
+    filas = list(
+        qs.annotate(
+            cliente_nombre=F('cliente__nombre'),
+            tecnico_nombre=F('tecnico__nombre'),
+            fecha_mostrar=Coalesce('fecha_cierre', 'fecha_creacion'),
+        )
+        .order_by('-fecha_creacion', '-id')
+        .values('id', 'cliente_nombre', 'tecnico_nombre', 'estado',
+                'fecha_creacion', 'fecha_mostrar')[:limite + 1]
+    )
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1]['fecha_creacion'], filas[-1]['id'])
+    return filas, siguiente
@@ -0,0 +1,48 @@
+"""
+Normalización de teléfonos de clientes a E.164 ("+56912345678").
+
+Cliente.telefono guarda lo que escribió la persona o lo que mandó Twilio;
+Cliente.telefono_e164 (único e indexado) guarda la forma normalizada, que es
+la que se usa para reconocer a un cliente por su número.
+"""
+import re
+
+from django.conf import settings
+
+
+# Largo de un número nacional (sin código de país) en Chile
+DIGITOS_NACIONALES = 9
+
+
+def normalizar_telefono(telefono):
+    """
+    Teléfono en formato E.164 o None si no se puede interpretar:
+
+        "whatsapp:+56912345678"  -> "+56912345678"
+        "+56 9 1234 5678"        -> "+56912345678"
+        "912345678"              -> "+56912345678"  (número nacional)
+        "0056912345678"          -> "+56912345678"
+    """
+    if not telefono:
+        return None
+    texto = telefono.strip()
+    if texto.startswith('whatsapp:'):
+        texto = texto[len('whatsapp:'):]
+    digitos = re.sub(r'\D', '', texto)
+    codigo = settings.TELEFONO_CODIGO_PAIS
+
+    if texto.startswith('+'):
+        numero = digitos
+    elif digitos.startswith('00'):
+        numero = digitos[2:]
+    elif len(digitos) == DIGITOS_NACIONALES:
+        numero = codigo + digitos
+    elif len(digitos) == len(codigo) + DIGITOS_NACIONALES and digitos.startswith(codigo):
+        numero = digitos
+    else:
+        return None
+
+    # E.164: hasta 15 dígitos, sin ceros al inicio
+    if not 8 <= len(numero) <= 15 or numero.startswith('0'):
+        return None
+    return '+' + numero
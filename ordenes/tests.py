@@ -1,3 +1,1585 @@
-from django.test import TestCase
+import base64
+import datetime
+import gzip
+import importlib
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlencode, urlparse
 
-# Create your tests here.
+import numpy as np
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import api_urls
+from core.presupuesto import PresupuestoConsultasExcedido, PresupuestoConsultasTestMixin, presupuesto_de
+from tecnicos.models import Tecnico
+from . import busqueda_sql
+from .almacen import purgar
+from .eventos import CursorEventos, purgar_eventos
+from .exportaciones import ndjson_gzip, ultimo_lote_completo
+from .informes import datos_informe, instantanea_tecnicos, llave_informe, pregenerar_informes, procesar_pendientes
+from .pdf import FILAS_POR_PAGINA_ANEXO, tablas_anexo
+from .models import ArchivoInforme, Cliente, EstadoPronostico, EventoOrden, InformePDF, OrdenTrabajo, RegistroBaja, ResumenDiario, TransicionOrden
+from .views import OrdenTrabajoViewSet
+from .pronostico import actualizar_pronostico, ajustar, estado_inicial
+from .pruebas import ApiAutenticadaTestMixin, crear_cliente, crear_tecnico
+from .resumen import reconstruir_resumen
+from .telefonos import normalizar_telefono
+from .transiciones import TransicionNoPermitida, aplicar_fechas, cambiar_estado
+
+
+class DashboardQueryCountTests(ApiAutenticadaTestMixin, TestCase):
+    """
+    El número de consultas del dashboard, el CSV y el PDF no debe crecer con
+    la cantidad de técnicos (sin N+1 en el ranking ni en los historiales).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        self.n_tecnicos = 0
+
+    def crear_tecnicos(self, cantidad):
+        for _ in range(cantidad):
+            self.n_tecnicos += 1
+            tecnico = crear_tecnico(nombre=f'Técnico {self.n_tecnicos}', rut=f'{self.n_tecnicos}-K')
+            for estado in ('PENDIENTE', 'EN_PROCESO', 'TERMINADO', 'TERMINADO'):
+                OrdenTrabajo.objects.create(
+                    cliente=self.cliente,
+                    tecnico=tecnico,
+                    descripcion='Sin internet',
+                    estado=estado,
+                    ubicacion_servicio='-33.4,-70.6',
+                )
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client_api.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConsultasConstantes(self, url):
+        self.crear_tecnicos(2)
+        pocas = self.contar_consultas(url)
+        self.crear_tecnicos(8)
+        muchas = self.contar_consultas(url)
+        self.assertEqual(pocas, muchas)
+
+    def test_dashboard_stats(self):
+        self.assertConsultasConstantes('/api/v1/dashboard-stats/?periodo=anio')
+
+    def test_dashboard_stats_filtrado(self):
+        self.assertConsultasConstantes('/api/v1/dashboard-stats/?tecnicos=1&tecnicos=2')
+
+    def test_historial_csv(self):
+        self.assertConsultasConstantes('/api/v1/dashboard-historial.csv')
+
+    def test_informe_pdf(self):
+        with tempfile.TemporaryDirectory() as directorio, self.settings(INFORMES_DIR=directorio):
+            self.assertConsultasConstantes('/api/v1/dashboard-informe.pdf')
+
+    def test_informe_pdf_con_anexo(self):
+        with tempfile.TemporaryDirectory() as directorio, self.settings(INFORMES_DIR=directorio):
+            self.assertConsultasConstantes('/api/v1/dashboard-informe.pdf?anexo=1')
+
+    def test_secciones_calculan_solo_lo_pedido(self):
+        self.crear_tecnicos(3)
+        completo = self.contar_consultas('/api/v1/dashboard-stats/')
+        caches['dashboard'].clear()
+        solo_filtros = self.contar_consultas('/api/v1/dashboard-stats/?sections=filtros')
+        self.assertLess(solo_filtros, completo)
+
+        data = self.client_api.get('/api/v1/dashboard-stats/?sections=kpis,alertas').json()
+        self.assertIn('alertas_detalle', data)
+        for ausente in ('historial', 'grafico_tendencia', 'ranking_tecnicos', 'filtros_disponibles'):
+            self.assertNotIn(ausente, data)
+        self.assertEqual(data['kpis']['total'], 12)
+        self.assertEqual(self.client_api.get('/api/v1/dashboard-stats/?sections=nada').status_code, 400)
+
+    def test_benchmark_secciones(self):
+        self.crear_tecnicos(2)
+        salida = io.StringIO()
+        call_command('benchmark_dashboard', repeticiones=1, stdout=salida)
+        self.assertIn('(todas)', salida.getvalue())
+
+    def test_historial_csv_en_streaming(self):
+        self.crear_tecnicos(3)
+        response = self.client_api.get('/api/v1/dashboard-historial.csv')
+        self.assertTrue(response.streaming)
+        texto = b''.join(response.streaming_content).decode('utf-8')
+        lineas = texto.splitlines()
+        self.assertTrue(texto.startswith('\ufeffID;Técnico;Cliente;'))
+        self.assertEqual(len(lineas), 1 + 6)
+        self.assertIn('Técnico 1 (Fibra);Cliente - +56911111111;Trabajo Terminado', texto)
+
+        response = self.client_api.get('/api/v1/dashboard-historial.csv?gzip=1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode('utf-8'), texto)
+
+    def test_kpis_dashboard(self):
+        self.crear_tecnicos(3)
+        data = self.client_api.get('/api/v1/dashboard-stats/').json()
+        self.assertEqual(data['kpis']['total'], 12)
+        self.assertEqual(data['kpis']['pendientes'], 3)
+        self.assertEqual(data['kpis']['en_proceso'], 3)
+        self.assertEqual(data['kpis']['terminadas'], 6)
+        self.assertEqual(len(data['ranking_tecnicos']), 3)
+        self.assertEqual(data['ranking_tecnicos'][0]['terminadas'], 2)
+
+
+class ResumenIncrementalTests(TestCase):
+    """Las señales de save() / delete() dejan ResumenDiario igual que reconstruir_resumen()."""
+
+    def filas(self):
+        return [
+            (fila.dia, fila.tecnico_id, fila.estado, fila.prioridad, fila.cantidad, round(fila.horas_cierre, 6), fila.dentro_sla)
+            for fila in ResumenDiario.objects.filter(cantidad__gt=0).order_by('dia', 'tecnico', 'estado', 'prioridad')
+        ]
+
+    def test_equivale_a_reconstruir(self):
+        cliente = crear_cliente()
+        ana = crear_tecnico()
+        beto = crear_tecnico(nombre='Beto', rut='2-7', telefono='+56900000001', especialidad='Cable')
+        ordenes = [
+            OrdenTrabajo.objects.create(cliente=cliente, descripcion=str(i), ubicacion_servicio='x', prioridad=prioridad)
+            for i, prioridad in enumerate(['ALTA', 'MEDIA', 'BAJA', 'MEDIA'])
+        ]
+
+        ordenes[0].tecnico, ordenes[0].estado = ana, 'ASIGNADA'
+        ordenes[0].save()
+        ordenes[0].tecnico = beto  # reasignación
+        ordenes[0].save()
+        ordenes[1].tecnico, ordenes[1].estado = ana, 'ASIGNADA'
+        ordenes[1].save()
+        ordenes[1].estado = 'TERMINADO'
+        ordenes[1].save()
+        ordenes[2].prioridad = 'ALTA'
+        ordenes[2].save()
+        ordenes[3].delete()
+
+        incremental = self.filas()
+        self.assertEqual(sum(fila[4] for fila in incremental), 3)
+        reconstruir_resumen()
+        self.assertEqual(incremental, self.filas())
+
+
+class TransicionesYSLATests(ApiAutenticadaTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tecnico = crear_tecnico()
+        self.orden = OrdenTrabajo.objects.create(
+            cliente=crear_cliente(), descripcion='Sin internet', ubicacion_servicio='-33.4,-70.6'
+        )
+
+    def test_cambios_de_estado_quedan_en_bitacora(self):
+        self.client_api.patch(
+            f'/api/v1/ordenes/{self.orden.pk}/',
+            {'tecnico': self.tecnico.pk, 'estado': 'ASIGNADA'},
+            format='json',
+        )
+        self.client_api.post(f'/orden/{self.orden.pk}/cambiar-estado/', {'estado': 'TERMINADO'}, format='json')
+
+        self.orden.refresh_from_db()
+        self.assertIsNotNone(self.orden.fecha_asignacion)
+        self.assertIsNotNone(self.orden.fecha_cierre)
+        self.assertEqual(
+            list(self.orden.transiciones.values_list('estado_anterior', 'estado_nuevo', 'usuario')),
+            [('', 'PENDIENTE', None), ('PENDIENTE', 'ASIGNADA', self.user.pk), ('ASIGNADA', 'TERMINADO', self.user.pk)],
+        )
+
+    def test_sla_usa_fecha_de_cierre(self):
+        OrdenTrabajo.objects.filter(pk=self.orden.pk).update(
+            fecha_creacion=timezone.now() - datetime.timedelta(hours=72)
+        )
+        reconstruir_resumen()
+        self.client_api.post(f'/orden/{self.orden.pk}/cambiar-estado/', {'estado': 'TERMINADO'}, format='json')
+
+        kpis = self.client_api.get('/api/v1/dashboard-stats/').json()['kpis']
+        self.assertEqual(kpis['terminadas'], 1)
+        self.assertEqual(kpis['sla_fuera'], 1)
+        self.assertAlmostEqual(kpis['tiempo_promedio_cierre_horas'], 72.0, places=0)
+
+
+class CambioEstadoAtomicoTests(ApiAutenticadaTestMixin, TestCase):
+    """transiciones.cambiar_estado: UPDATE condicional, conflictos y efectos de las señales."""
+
+    def setUp(self):
+        super().setUp()
+        self.tecnico = crear_tecnico()
+        self.orden = OrdenTrabajo.objects.create(
+            cliente=crear_cliente(), descripcion='Sin internet', ubicacion_servicio='-33.4,-70.6'
+        )
+
+    def resumen(self):
+        return list(
+            ResumenDiario.objects.filter(cantidad__gt=0).order_by('tecnico', 'estado', 'prioridad')
+            .values_list('tecnico', 'estado', 'prioridad', 'cantidad')
+        )
+
+    def test_flujo_completo_equivale_a_save(self):
+        response = self.client_api.patch(
+            f'/api/v1/ordenes/{self.orden.pk}/',
+            {'tecnico': self.tecnico.pk, 'estado': 'ASIGNADA', 'estado_actual': 'PENDIENTE'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['estado'], 'ASIGNADA')
+        self.assertEqual(response.json()['tecnico_detalle']['nombre'], 'Ana')
+        self.tecnico.refresh_from_db()
+        self.assertFalse(self.tecnico.disponible)
+
+        for estado in ('EN_CAMINO', 'EN_PROCESO', 'TERMINADO'):
+            response = self.client_api.post(f'/orden/{self.orden.pk}/cambiar-estado/', {'estado': estado}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['tecnico_liberado'])
+
+        self.orden.refresh_from_db()
+        self.assertEqual(self.orden.estado, 'TERMINADO')
+        self.assertIsNotNone(self.orden.fecha_cierre)
+        self.assertEqual(
+            list(self.orden.transiciones.values_list('estado_nuevo', flat=True)),
+            ['PENDIENTE', 'ASIGNADA', 'EN_CAMINO', 'EN_PROCESO', 'TERMINADO'],
+        )
+        self.assertEqual(
+            list(EventoOrden.objects.filter(tipo='actualizada').values_list('estado', flat=True)),
+            ['ASIGNADA', 'EN_CAMINO', 'EN_PROCESO', 'TERMINADO'],
+        )
+        incremental = self.resumen()
+        reconstruir_resumen()
+        self.assertEqual(incremental, self.resumen())
+
+    def test_patch_de_estado_no_revierte_una_reasignacion(self):
+        cambiar_estado(self.orden.pk, 'ASIGNADA', tecnico_id=self.tecnico.pk)
+        otro = crear_tecnico(nombre='Beto', rut='2-7', telefono='+56900000001', especialidad='Cable')
+        get_object = OrdenTrabajoViewSet.get_object
+
+        def cargar_y_reasignar(vista):
+            orden = get_object(vista)  # ya cargada con Ana: otro despachador reasigna
+            OrdenTrabajo.objects.filter(pk=orden.pk).update(tecnico=otro)
+            return orden
+
+        with mock.patch.object(OrdenTrabajoViewSet, 'get_object', cargar_y_reasignar):
+            response = self.client_api.patch(f'/api/v1/ordenes/{self.orden.pk}/', {'estado': 'EN_CAMINO'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tecnico'], otro.pk)
+        self.orden.refresh_from_db()
+        self.assertEqual((self.orden.estado, self.orden.tecnico_id), ('EN_CAMINO', otro.pk))
+
+    def test_estado_esperado_distinto_es_conflicto(self):
+        response = self.client_api.post(
+            f'/orden/{self.orden.pk}/cambiar-estado/', {'estado': 'TERMINADO', 'estado_actual': 'EN_PROCESO'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['estado_actual'], 'PENDIENTE')
+        self.orden.refresh_from_db()
+        self.assertEqual(self.orden.estado, 'PENDIENTE')
+
+    def test_cambio_concurrente_no_se_pisa(self):
+        # Otro usuario cierra la orden entre la lectura y el UPDATE
+        def cierre_concurrente(orden, previo):
+            OrdenTrabajo.objects.filter(pk=orden.pk).update(estado='CERRADA')
+            aplicar_fechas(orden, previo)
+
+        with mock.patch('ordenes.transiciones.aplicar_fechas', side_effect=cierre_concurrente):
+            response = self.client_api.patch(
+                f'/api/v1/ordenes/{self.orden.pk}/', {'tecnico': self.tecnico.pk, 'estado': 'ASIGNADA'}, format='json',
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['estado_actual'], 'CERRADA')
+        self.orden.refresh_from_db()
+        self.assertIsNone(self.orden.tecnico_id)
+        self.tecnico.refresh_from_db()
+        self.assertTrue(self.tecnico.disponible)
+        self.assertFalse(self.orden.transiciones.filter(estado_nuevo='ASIGNADA').exists())
+
+    def test_transiciones_no_permitidas(self):
+        for estado in ('EN_PROCESO', 'TERMINADA'):
+            response = self.client_api.post(f'/orden/{self.orden.pk}/cambiar-estado/', {'estado': estado}, format='json')
+            self.assertEqual(response.status_code, 400, estado)
+        response = self.client_api.post('/orden/999999/cambiar-estado/', {'estado': 'CERRADA'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+        with self.assertRaises(TransicionNoPermitida):
+            cambiar_estado(self.orden.pk, 'EN_CAMINO')
+        self.orden.refresh_from_db()
+        self.assertEqual(self.orden.estado, 'PENDIENTE')
+
+
+class CambiosEnLoteTests(ApiAutenticadaTestMixin, PresupuestoConsultasTestMixin, TestCase):
+    """POST /api/v1/ordenes/lote/: asignaciones y transiciones en lote."""
+
+    def setUp(self):
+        super().setUp()
+        cliente = crear_cliente()
+        self.tecnicos = [crear_tecnico(nombre=f'T{i}', rut=f'{i}-9') for i in range(5)]
+        self.ordenes = [
+            OrdenTrabajo.objects.create(
+                cliente=cliente, descripcion=f'o{i}', ubicacion_servicio='x', prioridad=('ALTA', 'MEDIA', 'BAJA')[i % 3],
+            )
+            for i in range(30)
+        ]
+
+    def lote(self, operaciones):
+        return self.client_api.post('/api/v1/ordenes/lote/', {'operaciones': operaciones}, format='json')
+
+    def resumen(self):
+        return list(
+            ResumenDiario.objects.filter(cantidad__gt=0).order_by('tecnico', 'estado', 'prioridad')
+            .values_list('tecnico', 'estado', 'prioridad', 'cantidad')
+        )
+
+    def test_asignacion_masiva_con_consultas_fijas(self):
+        operaciones = [
+            {'orden': orden.pk, 'tecnico': self.tecnicos[i % 5].pk, 'estado': 'ASIGNADA', 'estado_actual': 'PENDIENTE'}
+            for i, orden in enumerate(self.ordenes)
+        ]
+        response = self.assertDentroDelPresupuesto(
+            '/api/v1/ordenes/lote/', 'post', data={'operaciones': operaciones}, format='json',
+        )
+        self.assertEqual(response.json()['aplicadas'], 30)
+        self.assertEqual(OrdenTrabajo.objects.filter(estado='ASIGNADA', fecha_asignacion__isnull=False).count(), 30)
+        self.assertFalse(Tecnico.objects.filter(disponible=True).exists())
+        self.assertEqual(TransicionOrden.objects.filter(estado_nuevo='ASIGNADA', usuario=self.user).count(), 30)
+        self.assertEqual(EventoOrden.objects.filter(tipo='actualizada', estado='ASIGNADA').count(), 30)
+
+        incremental = self.resumen()
+        reconstruir_resumen()
+        self.assertEqual(incremental, self.resumen())
+
+    def test_resultados_por_operacion(self):
+        primera, segunda, tercera = self.ordenes[:3]
+        response = self.lote([
+            {'orden': primera.pk, 'tecnico': self.tecnicos[0].pk, 'estado': 'ASIGNADA'},
+            {'orden': primera.pk, 'estado': 'EN_CAMINO'},  # sigue desde el cambio anterior
+            {'orden': segunda.pk, 'estado': 'EN_PROCESO'},
+            {'orden': tercera.pk, 'estado': 'TERMINADO', 'estado_actual': 'EN_PROCESO'},
+            {'orden': tercera.pk, 'tecnico': 999999, 'estado': 'ASIGNADA'},
+            {'orden': 999999, 'estado': 'CERRADA'},
+            {'estado': 'CERRADA'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual((datos['aplicadas'], datos['rechazadas']), (2, 5))
+        self.assertEqual([r['ok'] for r in datos['resultados']], [True, True, False, False, False, False, False])
+        self.assertEqual(datos['resultados'][1], {'orden': primera.pk, 'ok': True, 'estado': 'EN_CAMINO', 'tecnico': self.tecnicos[0].pk})
+        self.assertEqual(datos['resultados'][3]['estado_actual'], 'PENDIENTE')
+
+        primera.refresh_from_db()
+        self.assertEqual((primera.estado, primera.tecnico_id), ('EN_CAMINO', self.tecnicos[0].pk))
+        self.assertEqual(
+            list(primera.transiciones.values_list('estado_nuevo', flat=True)), ['PENDIENTE', 'ASIGNADA', 'EN_CAMINO'],
+        )
+        self.assertEqual(OrdenTrabajo.objects.filter(estado='PENDIENTE').count(), 29)
+        incremental = self.resumen()
+        reconstruir_resumen()
+        self.assertEqual(incremental, self.resumen())
+
+    def test_peticion_invalida(self):
+        self.assertEqual(self.lote([]).status_code, 400)
+        self.assertEqual(self.client_api.post('/api/v1/ordenes/lote/', [], format='json').status_code, 400)
+        with mock.patch('ordenes.views.LOTE_MAXIMO', 2):
+            self.assertEqual(self.lote([{'orden': orden.pk, 'estado': 'CERRADA'} for orden in self.ordenes[:3]]).status_code, 400)
+
+
+class DashboardCacheTests(ApiAutenticadaTestMixin, TestCase):
+    usuario_staff = True
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+
+    def test_hit_y_invalidacion_por_escritura(self):
+        url = '/api/v1/dashboard-stats/?periodo=semana'
+        self.assertEqual(self.client_api.get(url)['X-Dashboard-Cache'], 'MISS')
+        response = self.client_api.get(url)
+        self.assertEqual(response['X-Dashboard-Cache'], 'HIT')
+        self.assertEqual(response.json()['kpis']['total'], 0)
+
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+
+        response = self.client_api.get(url)
+        self.assertEqual(response['X-Dashboard-Cache'], 'MISS')
+        self.assertEqual(response.json()['kpis']['total'], 1)
+
+        contadores = self.client_api.get('/api/v1/dashboard-cache/').json()
+        self.assertEqual((contadores['hits'], contadores['misses']), (1, 2))
+
+    def test_invalidacion_por_cliente(self):
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', estado='TERMINADO', ubicacion_servicio='x')
+        url = '/api/v1/dashboard-stats/?periodo=semana'
+        self.client_api.get(url)
+        self.assertEqual(self.client_api.get(url)['X-Dashboard-Cache'], 'HIT')
+
+        self.cliente.nombre = 'Otro nombre'
+        self.cliente.save()
+        response = self.client_api.get(url)
+        self.assertEqual(response['X-Dashboard-Cache'], 'MISS')
+        self.assertIn('Otro nombre', response.json()['historial'][0]['cliente'])
+
+
+class GetCondicionalTests(ApiAutenticadaTestMixin, TestCase):
+    """Los listados responden 304 (sin serializar) si nada cambió."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        self.tecnico = crear_tecnico()
+        self.orden = OrdenTrabajo.objects.create(
+            cliente=self.cliente, tecnico=self.tecnico, descripcion='x',
+            estado='ASIGNADA', ubicacion_servicio='x',
+        )
+
+    def assert304HastaCambio(self, url, modificar):
+        etag = self.client_api.get(url)['ETag']
+        response = self.client_api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        modificar()
+        response = self.client_api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_ordenes_por_estado(self):
+        def cambiar_estado():
+            self.orden.estado = 'EN_CAMINO'
+            self.orden.save()
+        self.assert304HastaCambio('/api/v1/ordenes/?estado=ASIGNADA', cambiar_estado)
+
+    def test_ordenes_invalida_por_tecnico_anidado(self):
+        def renombrar():
+            self.tecnico.nombre = 'Otro nombre'
+            self.tecnico.save()
+        self.assert304HastaCambio('/api/v1/ordenes/?estado=ASIGNADA', renombrar)
+
+    def test_mis_ordenes_invalida_por_cliente_anidado(self):
+        self.tecnico.user = self.user
+        self.tecnico.save()
+
+        def editar_cliente():
+            self.cliente.direccion = 'Calle 2'
+            self.cliente.save()
+        self.assert304HastaCambio('/api/v1/mis-ordenes/', editar_cliente)
+        response = self.client_api.get('/api/v1/mis-ordenes/')
+        self.assertEqual(response.json()[0]['cliente_detalle']['direccion'], 'Calle 2')
+
+    def test_dashboard_invalida_por_cliente_anidado(self):
+        def renombrar_cliente():
+            self.cliente.nombre = 'Otro nombre'
+            self.cliente.save()
+        self.assert304HastaCambio('/api/v1/dashboard-stats/?periodo=semana', renombrar_cliente)
+
+    def test_tecnicos_y_eliminacion(self):
+        self.assert304HastaCambio('/api/v1/tecnicos/?disponible=true', self.tecnico.delete)
+
+    def test_filtros_distintos_no_comparten_etag(self):
+        pendientes = self.client_api.get('/api/v1/ordenes/?estado=PENDIENTE')['ETag']
+        asignadas = self.client_api.get('/api/v1/ordenes/?estado=ASIGNADA')['ETag']
+        self.assertNotEqual(pendientes, asignadas)
+
+    def test_dashboard_stats(self):
+        def crear_orden():
+            OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='y', ubicacion_servicio='y')
+        self.assert304HastaCambio('/api/v1/dashboard-stats/?periodo=semana', crear_orden)
+
+
+class DashboardDetalleTests(ApiAutenticadaTestMixin, TestCase):
+    """El detalle de los modales se pide aparte, paginado por llave."""
+
+    def setUp(self):
+        super().setUp()
+        cliente = crear_cliente()
+        tecnico = crear_tecnico()
+        # Misma fecha de creación para varias órdenes: el id desempata
+        ahora = timezone.now()
+        for i in range(7):
+            orden = OrdenTrabajo.objects.create(
+                cliente=cliente, tecnico=tecnico, descripcion='x', ubicacion_servicio='x',
+            )
+            OrdenTrabajo.objects.filter(pk=orden.pk).update(fecha_creacion=ahora - datetime.timedelta(hours=i // 3))
+        OrdenTrabajo.objects.create(cliente=cliente, descripcion='x', estado='TERMINADO', ubicacion_servicio='x')
+
+    def test_payload_sin_listas_de_detalle(self):
+        data = self.client_api.get('/api/v1/dashboard-stats/').json()
+        self.assertNotIn('detalle_pendientes', data)
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        ids = []
+        url = '/api/v1/dashboard-detalle/?tipo=pendientes&limite=3'
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client_api.get(url).json()
+            self.assertEqual(len(ctx.captured_queries), 1)
+            ids += [fila['id'] for fila in data['resultados']]
+            self.assertEqual(data['resultados'][0]['cliente'], 'Cliente')
+            url = data['siguiente'] and f"/api/v1/dashboard-detalle/?tipo=pendientes&limite=3&cursor={data['siguiente']}"
+
+        esperados = OrdenTrabajo.objects.filter(estado='PENDIENTE').order_by('-fecha_creacion', '-id')
+        self.assertEqual(ids, list(esperados.values_list('id', flat=True)))
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client_api.get('/api/v1/dashboard-detalle/?tipo=otro').status_code, 400)
+        self.assertEqual(
+            self.client_api.get('/api/v1/dashboard-detalle/?tipo=terminadas&cursor=xyz').status_code, 400
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN es propio de SQLite")
+class PlanesDeConsultaTests(ApiAutenticadaTestMixin, TestCase):
+    """
+    Las consultas frecuentes sobre OrdenTrabajo deben usar índices: se
+    ejecuta cada endpoint, se capturan sus consultas y se revisa el plan.
+    """
+
+    TABLA = OrdenTrabajo._meta.db_table
+
+    def setUp(self):
+        super().setUp()
+        cliente = crear_cliente()
+        self.tecnico = crear_tecnico(user=self.user)
+        for estado in ('PENDIENTE', 'ASIGNADA', 'EN_PROCESO', 'TERMINADO'):
+            OrdenTrabajo.objects.create(
+                cliente=cliente, tecnico=self.tecnico, descripcion='x', estado=estado, ubicacion_servicio='x',
+            )
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [fila[-1] for fila in cursor.fetchall()]
+
+    def assertSinScanCompleto(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client_api.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+        revisadas = 0
+        for consulta in ctx.captured_queries:
+            if self.TABLA not in consulta['sql'] or not consulta['sql'].startswith('SELECT'):
+                continue
+            revisadas += 1
+            for paso in self.plan(consulta['sql']):
+                self.assertFalse(
+                    paso.startswith(f'SCAN {self.TABLA}'),
+                    f"{url}: scan completo de {self.TABLA}\n{consulta['sql']}\n{paso}",
+                )
+        self.assertGreater(revisadas, 0)
+
+    def test_dashboard_stats(self):
+        self.assertSinScanCompleto('/api/v1/dashboard-stats/')
+
+    def test_dashboard_stats_por_tecnico(self):
+        self.assertSinScanCompleto(f'/api/v1/dashboard-stats/?tecnicos={self.tecnico.pk}')
+
+    def test_dashboard_detalle(self):
+        self.assertSinScanCompleto('/api/v1/dashboard-detalle/?tipo=pendientes')
+
+    def test_historial_csv(self):
+        self.assertSinScanCompleto('/api/v1/dashboard-historial.csv')
+
+    def test_kanban_por_estado(self):
+        self.assertSinScanCompleto('/api/v1/ordenes/?estado=PENDIENTE')
+
+    def test_mis_ordenes(self):
+        self.assertSinScanCompleto('/api/v1/mis-ordenes/')
+
+    def test_exportacion_ndjson(self):
+        self.assertSinScanCompleto('/api/v1/exportar/ordenes.ndjson.gz?despues_de=1')
+
+    @override_settings(CAMBIOS_MARGEN_SEGUNDOS=0)
+    def test_feed_cambios(self):
+        desde = timezone.now() - datetime.timedelta(hours=1)
+        self.assertSinScanCompleto('/api/v1/ordenes/cambios/?' + urlencode({'updated_since': desde.isoformat()}))
+
+    def test_paginacion_por_cursor(self):
+        OrdenTrabajo.objects.create(
+            cliente=Cliente.objects.get(), tecnico=self.tecnico, descripcion='y', estado='TERMINADO', ubicacion_servicio='y',
+        )
+        primera = self.client_api.get('/api/v1/ordenes/?estado=TERMINADO&page_size=1').json()
+        self.assertSinScanCompleto('/api/v1/ordenes/?estado=TERMINADO&page_size=1')
+        self.assertSinScanCompleto(primera['next'])
+
+
+class PresupuestoConsultasTests(ApiAutenticadaTestMixin, PresupuestoConsultasTestMixin, TestCase):
+    """
+    Cada ruta de core/api_urls.py declara su presupuesto de consultas y lo
+    respeta con varias filas (un N+1 lo haría crecer con ellas).
+    """
+
+    usuario_staff = True
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(INFORMES_DIR=directorio.name, INFORMES_WORKER='comando')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        for i in range(4):
+            self.cliente = crear_cliente(nombre=f'Cliente {i}', telefono=f'+5691111111{i}')
+            self.tecnico = crear_tecnico(user=self.user if i == 0 else None, nombre=f'Técnico {i}', rut=f'{i}-1')
+            for estado in ('PENDIENTE', 'ASIGNADA', 'TERMINADO'):
+                self.orden = OrdenTrabajo.objects.create(
+                    cliente=self.cliente, tecnico=self.tecnico, descripcion='x', estado=estado, ubicacion_servicio='x',
+                )
+        self.informe = InformePDF.objects.create(
+            usuario=self.user, filtros={'desde': '2026-01-01', 'hasta': '2026-01-31'}, llave='x', estado='LISTO',
+        )
+
+    def rutas(self, patrones=None):
+        """(nombre, vista) de cada ruta de la API."""
+        for patron in patrones if patrones is not None else api_urls.urlpatterns:
+            if hasattr(patron, 'url_patterns'):
+                yield from self.rutas(patron.url_patterns)
+            else:
+                yield patron.name, patron.callback
+
+    def test_todas_las_rutas_declaran_presupuesto(self):
+        for nombre, vista in self.rutas():
+            clase = getattr(vista, 'cls', None) or getattr(vista, 'view_class', None)
+            self.assertTrue(hasattr(clase, 'presupuesto_consultas'), f"{nombre} no declara presupuesto_consultas")
+
+    def test_lecturas_dentro_del_presupuesto(self):
+        urls = {
+            'api-root': '/api/v1/',
+            'dashboard-stats': '/api/v1/dashboard-stats/',
+            'dashboard-detalle': '/api/v1/dashboard-detalle/?tipo=pendientes',
+            'dashboard-cache': '/api/v1/dashboard-cache/',
+            'kanban': '/api/v1/kanban/',
+            'mis-ordenes': '/api/v1/mis-ordenes/',
+            'system-state': '/api/v1/system-state/',
+            'dashboard-historial-csv': '/api/v1/dashboard-historial.csv',
+            'dashboard-informe-pdf': '/api/v1/dashboard-informe.pdf?anexo=1',
+            'informe-pdf-detalle': f'/api/v1/informes/{self.informe.pk}/',
+            'informe-pdf-descarga': f'/api/v1/informes/{self.informe.pk}/descargar/',
+            'informes-tecnicos-zip': '/api/v1/informes/tecnicos.zip',
+            'tecnicos-list': '/api/v1/tecnicos/',
+            'tecnicos-detail': f'/api/v1/tecnicos/{self.tecnico.pk}/',
+            'tecnicos-cambios': '/api/v1/tecnicos/cambios/',
+            'clientes-list': '/api/v1/clientes/?page_size=2',
+            'clientes-detail': f'/api/v1/clientes/{self.cliente.pk}/',
+            'clientes-cambios': '/api/v1/clientes/cambios/',
+            'ordenes-list': '/api/v1/ordenes/',
+            'ordenes-detail': f'/api/v1/ordenes/{self.orden.pk}/',
+            'ordenes-cambios': '/api/v1/ordenes/cambios/',
+        }
+        con_presupuesto = {
+            nombre for nombre, vista in self.rutas() if presupuesto_de(vista, 'GET') is not None
+        }
+        self.assertEqual(con_presupuesto, set(urls))
+
+        with open(os.path.join(settings.INFORMES_DIR, 'x.pdf'), 'wb') as archivo:
+            archivo.write(b'%PDF')
+        InformePDF.objects.filter(pk=self.informe.pk).update(archivo=archivo.name)
+        for url in urls.values():
+            self.assertDentroDelPresupuesto(url)
+
+    def test_escrituras_dentro_del_presupuesto(self):
+        self.assertDentroDelPresupuesto(
+            '/api/v1/ordenes/', 'post',
+            data={'cliente': self.cliente.pk, 'descripcion': 'y', 'ubicacion_servicio': 'y'}, format='json',
+        )
+        self.assertDentroDelPresupuesto(
+            f'/api/v1/ordenes/{self.orden.pk}/', 'patch',
+            data={'estado': 'EN_PROCESO', 'tecnico': self.tecnico.pk}, format='json',
+        )
+        self.assertDentroDelPresupuesto(f'/api/v1/ordenes/{self.orden.pk}/', 'delete')
+        self.assertDentroDelPresupuesto(f'/api/v1/tecnicos/{self.tecnico.pk}/', 'delete')
+        self.assertDentroDelPresupuesto('/api/v1/informes/?periodo=semana', 'post')
+        self.assertDentroDelPresupuesto('/api/v1/system-state/', 'post')
+
+    def test_middleware_de_desarrollo(self):
+        middleware = settings.MIDDLEWARE + ['core.presupuesto.PresupuestoConsultasMiddleware']
+        with self.settings(MIDDLEWARE=middleware, PRESUPUESTO_CONSULTAS='advertir'):
+            response = self.client_api.get('/api/v1/ordenes/')
+            self.assertEqual(response['X-Consultas-SQL'], '4/5')
+
+            with mock.patch.object(OrdenTrabajoViewSet, 'presupuesto_consultas', {'GET': 1}):
+                with self.assertLogs('core.presupuesto', 'WARNING') as logs:
+                    self.client_api.get('/api/v1/ordenes/')
+                self.assertIn('GET /api/v1/ordenes/: 4 consultas SQL (presupuesto 1)', logs.output[0])
+
+                with self.settings(PRESUPUESTO_CONSULTAS='error'):
+                    with self.assertRaises(PresupuestoConsultasExcedido):
+                        self.client_api.get('/api/v1/ordenes/')
+
+
+class PronosticoTests(ApiAutenticadaTestMixin, TestCase):
+    """Pronóstico de demanda: ajuste incremental, vectorizado y lectura en el dashboard."""
+
+    def setUp(self):
+        super().setUp()
+        self.tecnico = crear_tecnico()
+        self.hoy = timezone.localdate()
+        for atras in range(1, 60):
+            ResumenDiario.objects.create(
+                dia=self.hoy - datetime.timedelta(days=atras), tecnico=self.tecnico,
+                estado='TERMINADO', prioridad='MEDIA', cantidad=3 + atras % 7,
+            )
+
+    def test_incremental_igual_a_completo(self):
+        ayer = self.hoy - datetime.timedelta(days=1)
+        actualizar_pronostico(hasta=ayer - datetime.timedelta(days=10))
+        resultado = actualizar_pronostico(hasta=ayer)
+        self.assertEqual(resultado['dias'], 10)
+        incremental = list(EstadoPronostico.objects.order_by('tecnico').values_list('nivel', 'tendencia'))
+
+        actualizar_pronostico(hasta=ayer, completo=True)
+        completo = list(EstadoPronostico.objects.order_by('tecnico').values_list('nivel', 'tendencia'))
+        for (n1, t1), (n2, t2) in zip(incremental, completo):
+            self.assertAlmostEqual(n1, n2)
+            self.assertAlmostEqual(t1, t2)
+
+    def test_ajuste_vectorizado_un_paso_por_dia(self):
+        # El tiempo se mide en `benchmark_pronostico`; aquí, que el bucle en
+        # Python sea por día y no por serie, y que ajustar juntas dé lo mismo
+        class DiasContados(list):
+            pasos = 0
+
+            def __iter__(self):
+                for dia in super().__iter__():
+                    self.pasos += 1
+                    yield dia
+
+        rng = np.random.default_rng(0)
+        valores = rng.poisson(5, size=(30, 2 * 365)).astype(float)
+        dias_semana = np.arange(valores.shape[1]) % 7
+        contados = DiasContados(dias_semana.tolist())
+        predicciones, *_ = ajustar(valores, contados, *estado_inicial(valores, dias_semana))
+        self.assertEqual(contados.pasos, valores.shape[1])
+        self.assertEqual(predicciones.shape, valores.shape)
+
+        for i in (0, 17, 29):
+            serie = valores[i:i + 1]
+            sola, *_ = ajustar(serie, dias_semana, *estado_inicial(serie, dias_semana))
+            np.testing.assert_allclose(predicciones[i], sola[0])
+
+    def test_benchmark(self):
+        salida = io.StringIO()
+        call_command('benchmark_pronostico', '--series', '3', '--anios', '1', '--repeticiones', '1', stdout=salida)
+        self.assertIn('aceleración', salida.getvalue())
+
+    def test_dashboard_lee_predicciones(self):
+        actualizar_pronostico()
+        data = self.client_api.get('/api/v1/dashboard-stats/?sections=tendencia').json()
+        prediccion = data['grafico_tendencia']['prediccion']
+        self.assertTrue(all(valor is not None for valor in prediccion))
+        # Con filtro de técnico se usa su propia serie
+        data = self.client_api.get(f'/api/v1/dashboard-stats/?sections=tendencia&tecnicos={self.tecnico.pk}').json()
+        self.assertEqual(len(data['grafico_tendencia']['prediccion']), len(prediccion))
+
+
+@override_settings(
+    EVENTOS_INTERVALO_SEGUNDOS=0.01,
+    EVENTOS_HEARTBEAT_SEGUNDOS=0,
+    EVENTOS_DURACION_MAXIMA_SEGUNDOS=0.05,
+)
+class EventosSSETests(ApiAutenticadaTestMixin, TestCase):
+    """Eventos compactos de órdenes y el stream SSE con reanudación."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.cliente = crear_cliente()
+
+    def leer_stream(self, **headers):
+        response = self.client.get('/api/v1/eventos/', **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_eventos_con_variacion_de_kpis(self):
+        orden = OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+        orden.estado = 'EN_PROCESO'
+        orden.save()
+        orden.delete()
+
+        eventos = list(EventoOrden.objects.values_list('tipo', 'kpis'))
+        self.assertEqual(eventos, [
+            ('creada', {'total': 1, 'pendientes': 1}),
+            ('actualizada', {'pendientes': -1, 'en_proceso': 1}),
+            ('eliminada', {'total': -1, 'en_proceso': -1}),
+        ])
+
+    def test_reanuda_desde_last_event_id(self):
+        primera = OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+        segunda = OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='y', ubicacion_servicio='y')
+        primer_evento = EventoOrden.objects.get(orden_id=primera.pk)
+
+        contenido = self.leer_stream(HTTP_LAST_EVENT_ID=str(primer_evento.pk))
+        self.assertIn('retry: ', contenido)
+        self.assertIn(f'"orden": {segunda.pk}', contenido)
+        self.assertNotIn(f'"orden": {primera.pk}', contenido)
+
+    def test_conexion_nueva_guarda_su_posicion(self):
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+        ultimo = EventoOrden.objects.latest('id').pk
+        self.assertIn(f'id: {ultimo}\n\n', self.leer_stream())
+
+    @override_settings(EVENTOS_HEARTBEAT_SEGUNDOS=60)
+    def test_sin_cambios_no_consulta_la_tabla(self):
+        cursor = CursorEventos()
+        cursor.abrir()
+        cursor.leer()
+        with self.assertNumQueries(0):
+            self.assertEqual(cursor.leer(), [])
+
+        orden = OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+        self.assertIn(f'"orden": {orden.pk}', ''.join(cursor.leer()))
+
+    def test_conexion_nueva_no_repite_historia(self):
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+        self.assertNotIn('event: orden', self.leer_stream())
+
+    def test_reset_si_los_eventos_fueron_purgados(self):
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='y', ubicacion_servicio='y')
+        EventoOrden.objects.update(fecha=timezone.now() - datetime.timedelta(days=3))
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='z', ubicacion_servicio='z')
+        self.assertEqual(purgar_eventos(24), 2)
+
+        self.assertIn('event: reset', self.leer_stream(HTTP_LAST_EVENT_ID='0'))
+
+    def test_requiere_sesion(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/v1/eventos/').status_code, 401)
+
+    async def test_stream_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/v1/eventos/', headers={'Last-Event-ID': '0'})
+        contenido = ''.join([
+            chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+            async for chunk in response.streaming_content
+        ])
+        self.assertIn('retry: ', contenido)
+        self.assertIn(': heartbeat', contenido)
+
+
+class InformesPDFTests(ApiAutenticadaTestMixin, TestCase):
+    """Informes PDF en segundo plano con caché en disco."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(INFORMES_DIR=directorio.name, INFORMES_WORKER='comando')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.cliente = crear_cliente()
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='x', ubicacion_servicio='x')
+
+    def crear_informe(self):
+        return self.client_api.post('/api/v1/informes/?periodo=semana')
+
+    def test_ciclo_de_vida_y_descarga(self):
+        response = self.crear_informe()
+        self.assertEqual(response.status_code, 202)
+        pk = response.json()['id']
+        self.assertEqual(response.json()['estado'], 'PENDIENTE')
+        self.assertEqual(self.client_api.get(f'/api/v1/informes/{pk}/descargar/').status_code, 409)
+
+        self.assertEqual(procesar_pendientes(), 1)
+
+        datos = self.client_api.get(f'/api/v1/informes/{pk}/').json()
+        self.assertEqual(datos['estado'], 'LISTO')
+        self.assertTrue(datos['descarga'].endswith(f'/api/v1/informes/{pk}/descargar/'))
+        response = self.client_api.get(f'/api/v1/informes/{pk}/descargar/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_cache_en_disco_e_invalidacion(self):
+        self.crear_informe()
+        call_command('procesar_informes', '--una-vez', stdout=io.StringIO())
+
+        # Mismos filtros y datos: listo de inmediato, mismo archivo
+        response = self.crear_informe()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(InformePDF.objects.values('archivo').distinct().count(), 1)
+
+        # Cambian los datos del período: hay que generarlo de nuevo
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='y', ubicacion_servicio='y')
+        self.assertEqual(self.crear_informe().status_code, 202)
+
+    def test_trabajo_trabado_vuelve_a_la_cola(self):
+        pk = self.crear_informe().json()['id']
+        hace_rato = timezone.now() - datetime.timedelta(seconds=settings.INFORMES_TIEMPO_MAXIMO_SEGUNDOS + 1)
+        InformePDF.objects.filter(pk=pk).update(estado='PROCESANDO', fecha_inicio=hace_rato)
+
+        self.assertEqual(procesar_pendientes(), 1)
+        self.assertEqual(InformePDF.objects.get(pk=pk).estado, 'LISTO')
+
+    def test_error_sin_detalle_para_la_api(self):
+        pk = self.crear_informe().json()['id']
+        with mock.patch('ordenes.informes.generar_pdf', side_effect=OSError('/ruta/secreta')), \
+                self.assertLogs('ordenes.informes', 'ERROR'):
+            procesar_pendientes()
+
+        datos = self.client_api.get(f'/api/v1/informes/{pk}/').json()
+        self.assertEqual(datos['estado'], 'ERROR')
+        self.assertNotIn('secreta', json.dumps(datos))
+
+    def test_disponibilidad_del_tecnico_no_cambia_la_llave(self):
+        tecnico = crear_tecnico()
+        hoy = timezone.localdate()
+        filtros = {'periodo': 'semana', 'tecnicos_ids': [], 'desde': hoy - datetime.timedelta(days=6), 'hasta': hoy}
+        llave = llave_informe(filtros)
+
+        tecnico.disponible = False
+        tecnico.save()
+        self.assertEqual(llave_informe(filtros), llave)
+
+        tecnico.nombre = 'Ana María'  # sale en el ranking: sí cambia
+        tecnico.save()
+        self.assertNotEqual(llave_informe(filtros), llave)
+
+    def test_solo_el_autor_ve_su_informe(self):
+        pk = self.crear_informe().json()['id']
+        otro = APIClient()
+        otro.force_authenticate(User.objects.create_user('otro', password='x'))
+        self.assertEqual(otro.get(f'/api/v1/informes/{pk}/').status_code, 404)
+
+        otro.force_authenticate(User.objects.create_user('jefe', password='x', is_staff=True))
+        self.assertEqual(otro.get(f'/api/v1/informes/{pk}/').status_code, 200)
+
+
+class PregeneracionInformesTests(ApiAutenticadaTestMixin, TestCase):
+    """Informes pregenerados por período, guardados por hash de contenido."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        ajustes = override_settings(INFORMES_DIR=self.directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.cliente = crear_cliente()
+        self.tecnico = crear_tecnico()
+        crear_tecnico(nombre='Beto', rut='2-7', telefono='+56900000001', especialidad='Redes')
+        OrdenTrabajo.objects.create(
+            cliente=self.cliente, tecnico=self.tecnico, descripcion='x',
+            ubicacion_servicio='x', estado='Trabajo Terminado',
+        )
+
+    def test_descargas_servidas_desde_lo_pregenerado(self):
+        resultado = pregenerar_informes(procesos=1)
+        # 4 períodos x (global + 2 técnicos) x (PDF + CSV)
+        self.assertEqual(resultado['generados'] + resultado['deduplicados'], 24)
+
+        response = self.client_api.get('/api/v1/dashboard-historial.csv?periodo=semana')
+        self.assertEqual(response['X-Pregenerado'], 'HIT')
+        pregenerado = b''.join(response.streaming_content)
+        self.assertIn('Ana (Fibra);Cliente - +56911111111'.encode('utf-8'), pregenerado)
+
+        archivos = ArchivoInforme.objects.count()
+        response = self.client_api.get(f'/api/v1/dashboard-informe.pdf?periodo=mes&tecnicos={self.tecnico.pk}')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(ArchivoInforme.objects.count(), archivos)
+
+        # Cambian los datos: la llave cambia y el CSV se vuelve a generar
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='y', ubicacion_servicio='y')
+        response = self.client_api.get('/api/v1/dashboard-historial.csv?periodo=semana')
+        self.assertFalse(response.has_header('X-Pregenerado'))
+        self.assertEqual(b''.join(response.streaming_content), pregenerado)
+
+    def test_contenido_identico_se_guarda_una_vez(self):
+        pregenerar_informes(procesos=1)
+        # El CSV de Beto (sin órdenes) es igual en los 4 períodos
+        csv = ArchivoInforme.objects.filter(extension='csv')
+        hashes = set(csv.values_list('hash', flat=True))
+        self.assertLess(len(hashes), csv.count())
+        guardados = {
+            nombre.split('.')[0]
+            for _, _, nombres in os.walk(self.directorio) for nombre in nombres if nombre.endswith('.csv')
+        }
+        self.assertEqual(guardados, hashes)
+
+    def test_comando_una_vez_y_purga(self):
+        salida = io.StringIO()
+        call_command('pregenerar_informes', '--una-vez', '--procesos=1', stdout=salida)
+        call_command('pregenerar_informes', '--una-vez', '--procesos=1', stdout=salida)
+        self.assertIn('0 nuevos, 0 deduplicados, 24 ya existentes', salida.getvalue())
+
+        ArchivoInforme.objects.update(fecha_creacion=timezone.now() - datetime.timedelta(days=10))
+        self.assertGreater(purgar(7), 0)
+        self.assertFalse(ArchivoInforme.objects.exists())
+        self.assertEqual([nombre for _, _, nombres in os.walk(self.directorio) for nombre in nombres], [])
+
+
+class AnexoPDFTests(ApiAutenticadaTestMixin, TestCase):
+    """Anexo del informe: todas las cerradas, en tablas de una página."""
+
+    def test_una_tabla_por_pagina(self):
+        filas = ([i, 't', 'c', 'e', 'f', 'f'] for i in range(2 * FILAS_POR_PAGINA_ANEXO + 1))
+        partes = list(tablas_anexo(['ID'] * 6, filas))
+        tablas = [parte for parte in partes if hasattr(parte, '_cellvalues')]
+        self.assertEqual(len(tablas), 3)
+        self.assertEqual(len(partes), 5)  # con PageBreak entre tablas
+        self.assertEqual([len(tabla._cellvalues) for tabla in tablas], [FILAS_POR_PAGINA_ANEXO + 1] * 2 + [2])
+
+    def test_sin_filas_deja_solo_el_encabezado(self):
+        partes = list(tablas_anexo(['ID'] * 6, []))
+        self.assertEqual(len(partes), 1)
+        self.assertEqual(len(partes[0]._cellvalues), 1)
+
+    def test_informe_con_anexo_lista_todas_las_cerradas(self):
+        cliente = crear_cliente()
+        for _ in range(2 * FILAS_POR_PAGINA_ANEXO):
+            OrdenTrabajo.objects.create(cliente=cliente, descripcion='x', estado='TERMINADO', ubicacion_servicio='x')
+
+        def paginas(url):
+            response = self.client_api.get(url)
+            return len(re.findall(rb'/Type /Page\b(?!s)', b''.join(response.streaming_content))), response
+
+        with tempfile.TemporaryDirectory() as directorio, self.settings(INFORMES_DIR=directorio):
+            sin_anexo, _ = paginas('/api/v1/dashboard-informe.pdf')
+            con_anexo, response = paginas('/api/v1/dashboard-informe.pdf?anexo=1')
+
+        self.assertEqual(con_anexo, sin_anexo + 2)
+        self.assertIn('_anexo.pdf', response['Content-Disposition'])
+
+    def test_benchmark(self):
+        salida = io.StringIO()
+        call_command('benchmark_anexo_pdf', '--filas', '100', '--tabla-unica', '100', stdout=salida)
+        self.assertIn('anexo', salida.getvalue())
+        self.assertIn('tabla única', salida.getvalue())
+
+
+class InformesTecnicosTests(ApiAutenticadaTestMixin, TestCase):
+    """Lote de informes por técnico: instantánea única y pool de procesos."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        self.tecnicos = []
+        self.crear_tecnicos(3)
+
+    def crear_tecnicos(self, cantidad):
+        for _ in range(cantidad):
+            n = len(self.tecnicos) + 1
+            tecnico = crear_tecnico(nombre=f'Técnico {n}', rut=f'{n}-K')
+            self.tecnicos.append(tecnico)
+            for estado in ('PENDIENTE', 'EN_PROCESO', 'TERMINADO', 'TERMINADO')[:n + 1]:
+                OrdenTrabajo.objects.create(
+                    cliente=self.cliente, tecnico=tecnico, descripcion='x',
+                    estado=estado, ubicacion_servicio='x',
+                )
+
+    def filtros(self):
+        hoy = timezone.localdate()
+        return {"periodo": "mes", "tecnicos_ids": [], "desde": hoy - datetime.timedelta(days=30), "hasta": hoy}
+
+    def test_instantanea_igual_al_informe_individual(self):
+        filtros = self.filtros()
+        instantanea = instantanea_tecnicos(filtros)
+        self.assertEqual(list(instantanea), [t.pk for t in self.tecnicos])
+
+        for tecnico in self.tecnicos:
+            nombre, datos = instantanea[tecnico.pk]
+            individual = datos_informe(dict(filtros, tecnicos_ids=[tecnico.pk]))
+            datos.pop('generado'), individual.pop('generado')
+            self.assertEqual(nombre, tecnico.nombre)
+            self.assertEqual(datos, individual)
+
+    def test_instantanea_con_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pocos:
+            instantanea_tecnicos(self.filtros())
+        self.crear_tecnicos(5)
+        with CaptureQueriesContext(connection) as muchos:
+            instantanea_tecnicos(self.filtros())
+        self.assertEqual(len(pocos.captured_queries), len(muchos.captured_queries))
+
+    @override_settings(INFORMES_PROCESOS=2)
+    def test_zip_dibujado_en_pool_de_procesos(self):
+        response = self.client_api.get(f'/api/v1/informes/tecnicos.zip?tecnicos={self.tecnicos[0].pk}&tecnicos={self.tecnicos[2].pk}')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archivo_zip:
+            nombres = archivo_zip.namelist()
+            self.assertEqual(len(nombres), 2)
+            self.assertTrue(nombres[0].startswith(f'informe_tecnico-1_{self.tecnicos[0].pk}_'))
+            self.assertTrue(all(archivo_zip.read(nombre).startswith(b'%PDF') for nombre in nombres))
+
+    def test_benchmark(self):
+        salida = io.StringIO()
+        call_command('benchmark_informes', '--procesos-max', '2', stdout=salida)
+        self.assertIn('3 técnicos', salida.getvalue())
+        self.assertIn('aceleración', salida.getvalue())
+
+
+@skipUnless(connection.vendor == 'sqlite', "FTS5 es propio de SQLite")
+class BusquedaFTSTests(ApiAutenticadaTestMixin, TestCase):
+    """?search= con las tablas FTS5 mantenidas por triggers."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente(nombre='María Pérez', direccion='Av. Libertad 123, Chillán', telefono='+56 9 8765 4321')
+        otro = crear_cliente(nombre='Juan Soto')
+        self.orden = OrdenTrabajo.objects.create(
+            cliente=self.cliente, descripcion='Sin señal de Internet desde la tormenta', ubicacion_servicio='x',
+        )
+        self.otra = OrdenTrabajo.objects.create(cliente=otro, descripcion='Cambio de módem', ubicacion_servicio='x')
+
+    def buscar(self, termino, recurso='ordenes'):
+        response = self.client_api.get(f'/api/v1/{recurso}/', {'search': termino})
+        self.assertEqual(response.status_code, 200)
+        return sorted(fila['id'] for fila in response.json())
+
+    def test_prefijos_sin_tildes_ni_mayusculas(self):
+        self.assertEqual(self.buscar('senal'), [self.orden.pk])
+        self.assertEqual(self.buscar('INTER torm'), [self.orden.pk])
+        self.assertEqual(self.buscar('modem'), [self.otra.pk])
+        self.assertEqual(self.buscar('perez chillan'), [self.orden.pk])  # nombre y dirección del cliente
+        self.assertEqual(self.buscar('señal soto'), [])
+        self.assertEqual(self.buscar('internet* -'), [self.orden.pk])  # sin operadores de FTS5
+
+    def test_triggers_mantienen_el_indice(self):
+        OrdenTrabajo.objects.filter(pk=self.otra.pk).update(observaciones='Poste caído')
+        self.assertEqual(self.buscar('poste'), [self.otra.pk])
+
+        self.cliente.nombre = 'María González'
+        self.cliente.save()
+        self.assertEqual(self.buscar('gonzalez'), [self.orden.pk])
+        self.assertEqual(self.buscar('perez'), [])
+
+        self.orden.delete()
+        self.assertEqual(self.buscar('senal'), [])
+
+    def test_id_exacto_sin_fts(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.buscar(f'#{self.otra.pk}'), [self.otra.pk])
+        self.assertNotIn('MATCH', ctx.captured_queries[-1]['sql'])
+        self.assertIn(f'"ordenes_ordentrabajo"."id" = {self.otra.pk}', ctx.captured_queries[-1]['sql'])
+
+    def test_clientes_por_nombre_y_telefono(self):
+        self.assertEqual(self.buscar('mari', 'clientes'), [self.cliente.pk])
+        self.assertEqual(self.buscar('56987', 'clientes'), [self.cliente.pk])
+        self.assertEqual(self.buscar('+56 9 1111', 'clientes'), [Cliente.objects.get(nombre='Juan Soto').pk])
+
+
+@skipUnless(connection.vendor == 'sqlite', "FTS5 es propio de SQLite")
+class BusquedaFTSMigracionesTests(TransactionTestCase):
+    """Sin los triggers (como durante `migrate`) SQLite puede rehacer las tablas."""
+
+    def test_rehacer_tablas_y_reindexar(self):
+        cliente = crear_cliente(nombre='María Pérez')
+        orden = OrdenTrabajo.objects.create(cliente=cliente, descripcion='Sin señal', ubicacion_servicio='x')
+
+        busqueda_sql.quitar_triggers(connection)
+        for modelo, nombre in ((OrdenTrabajo, 'ubicacion_servicio'), (Cliente, 'direccion')):
+            campo = modelo._meta.get_field(nombre)
+            nuevo = models.CharField(max_length=300)
+            nuevo.set_attributes_from_name(nombre)
+            nuevo.model = modelo
+            with connection.schema_editor() as editor:
+                editor.alter_field(modelo, campo, nuevo)
+                editor.alter_field(modelo, nuevo, campo)
+        Cliente.objects.filter(pk=cliente.pk).update(nombre='María González')  # sin triggers
+        busqueda_sql.poner_triggers(connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {busqueda_sql.TABLA_ORDENES} WHERE {busqueda_sql.TABLA_ORDENES} MATCH 'gonzalez'")
+            self.assertEqual(cursor.fetchall(), [(orden.pk,)])
+        otra = OrdenTrabajo.objects.create(cliente=cliente, descripcion='Poste caído', ubicacion_servicio='x')
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {busqueda_sql.TABLA_ORDENES} WHERE {busqueda_sql.TABLA_ORDENES} MATCH 'poste'")
+            self.assertEqual(cursor.fetchall(), [(otra.pk,)])
+
+
+class PaginacionCursorTests(ApiAutenticadaTestMixin, TestCase):
+    """Paginación opcional por cursor de órdenes y clientes."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        for i in range(5):
+            OrdenTrabajo.objects.create(cliente=self.cliente, descripcion=f'o{i}', ubicacion_servicio='x')
+            crear_cliente(nombre=f'C{i}', direccion='x', telefono=f'+5690000000{i}')
+
+    def recorrer(self, url):
+        filas, paginas = [], 0
+        while url:
+            datos = self.client_api.get(url).json()
+            filas += datos['results']
+            url = datos['next']
+            paginas += 1
+        return filas, paginas
+
+    def test_sin_parametros_devuelve_la_lista_completa(self):
+        datos = self.client_api.get('/api/v1/ordenes/').json()
+        self.assertIsInstance(datos, list)
+        self.assertEqual(len(datos), 5)
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        ordenes, paginas = self.recorrer('/api/v1/ordenes/?page_size=2')
+        self.assertEqual(paginas, 3)
+        esperado = list(OrdenTrabajo.objects.order_by('-fecha_creacion', '-id').values_list('id', flat=True))
+        self.assertEqual([orden['id'] for orden in ordenes], esperado)
+
+        clientes, _ = self.recorrer('/api/v1/clientes/?page_size=4')
+        self.assertEqual(len({cliente['id'] for cliente in clientes}), 6)
+
+    def test_alta_entre_paginas_no_desplaza_el_cursor(self):
+        primera = self.client_api.get('/api/v1/ordenes/?page_size=2').json()
+        OrdenTrabajo.objects.create(cliente=self.cliente, descripcion='nueva', ubicacion_servicio='x')
+        resto, _ = self.recorrer(primera['next'])
+        self.assertEqual(len(primera['results']) + len(resto), 5)
+
+    def test_empates_de_fecha_con_offset(self):
+        # El cursor guarda sólo la fecha: los empates se saltan con offset
+        OrdenTrabajo.objects.update(fecha_creacion=timezone.now())
+        primera = self.client_api.get('/api/v1/ordenes/?page_size=2').json()
+        cursor = parse_qs(urlparse(primera['next']).query)['cursor'][0]
+        self.assertEqual(parse_qs(base64.b64decode(cursor).decode())['o'], ['2'])
+        ordenes, _ = self.recorrer('/api/v1/ordenes/?page_size=2')
+        esperado = list(OrdenTrabajo.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual([orden['id'] for orden in ordenes], esperado)
+
+    @override_settings(API_PAGINA_TAMANO=3, API_PAGINA_MAXIMA=4)
+    def test_tamano_configurable(self):
+        self.assertEqual(len(self.client_api.get('/api/v1/ordenes/?cursor=').json()), 5)
+        datos = self.client_api.get('/api/v1/ordenes/?page_size=50').json()
+        self.assertEqual(len(datos['results']), 4)
+
+
+class CamposDinamicosTests(ApiAutenticadaTestMixin, TestCase):
+    """?fields= y ?expand= en órdenes, clientes y técnicos."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        self.tecnico = crear_tecnico(user=self.user)
+        for i in range(3):
+            self.orden = OrdenTrabajo.objects.create(
+                cliente=self.cliente, tecnico=self.tecnico, descripcion=f'o{i}', ubicacion_servicio='x',
+            )
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client_api.get(url)
+        return response, [consulta['sql'] for consulta in ctx.captured_queries]
+
+    def test_sin_parametros_respuesta_completa(self):
+        orden = self.client_api.get(f'/api/v1/ordenes/{self.orden.pk}/').json()
+        self.assertEqual(orden['cliente_detalle']['nombre'], 'Cliente')
+        self.assertEqual(orden['tecnico_detalle']['nombre'], 'Ana')
+        self.assertNotIn('user', orden['tecnico_detalle'])
+        self.assertNotIn('user', self.client_api.get('/api/v1/tecnicos/').json()[0])
+
+    def test_campos_planos_sin_join(self):
+        response, consultas = self.get('/api/v1/ordenes/?fields=id,estado')
+        self.assertEqual([set(orden) for orden in response.json()], [{'id', 'estado'}] * 3)
+        listado = consultas[-1]
+        self.assertNotIn('JOIN', listado)
+        self.assertNotIn('"descripcion"', listado)
+
+    def test_expand_y_campos_anidados(self):
+        orden = self.client_api.get(f'/api/v1/ordenes/{self.orden.pk}/?fields=id&expand=tecnico').json()
+        self.assertEqual(set(orden), {'id', 'tecnico_detalle'})
+        self.assertEqual(orden['tecnico_detalle']['rut'], '1-9')
+
+        response, consultas = self.get('/api/v1/ordenes/?fields=id,prioridad,cliente.nombre,tecnico.nombre')
+        self.assertEqual(response.json()[0], {
+            'id': self.orden.pk, 'prioridad': 'MEDIA',
+            'tecnico_detalle': {'nombre': 'Ana'}, 'cliente_detalle': {'nombre': 'Cliente'},
+        })
+        # Un JOIN por relación, sin consultas extra por fila
+        self.assertEqual(len(consultas), len(self.get('/api/v1/ordenes/')[1]))
+        self.assertNotIn('"direccion"', consultas[-1])
+
+    def test_clientes_y_tecnicos(self):
+        self.assertEqual(self.client_api.get('/api/v1/clientes/?fields=nombre').json(), [{'nombre': 'Cliente'}])
+        self.assertEqual(
+            self.client_api.get('/api/v1/tecnicos/?fields=id,disponible').json(),
+            [{'id': self.tecnico.pk, 'disponible': True}],
+        )
+        datos = self.client_api.get('/api/v1/clientes/?fields=nombre&page_size=1').json()
+        self.assertEqual(datos['results'], [{'nombre': 'Cliente'}])
+
+    def test_campos_desconocidos(self):
+        for consulta in ('fields=user', 'expand=usuario', 'fields=cliente.chat_state'):
+            response = self.client_api.get(f'/api/v1/ordenes/?{consulta}')
+            self.assertEqual(response.status_code, 400, consulta)
+            self.assertIn('Campos desconocidos', response.json()['fields'])
+
+    def test_escrituras_ignoran_la_forma(self):
+        response = self.client_api.patch(
+            f'/api/v1/ordenes/{self.orden.pk}/?fields=id', {'descripcion': 'nueva'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['descripcion'], 'nueva')
+
+
+@override_settings(CAMBIOS_MARGEN_SEGUNDOS=0)
+class KanbanTests(ApiAutenticadaTestMixin, TestCase):
+    """Tablero Kanban en una petición y sincronización con ?since=."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        self.tecnico = crear_tecnico(user=self.user)
+        self.ordenes = [
+            OrdenTrabajo.objects.create(
+                cliente=self.cliente, descripcion=f'o{i}', ubicacion_servicio='x', estado='PENDIENTE',
+            )
+            for i in range(3)
+        ]
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client_api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_tablero_completo_consultas_constantes(self):
+        tablero, consultas = self.get('/api/v1/kanban/')
+        self.assertTrue(tablero['completo'])
+        self.assertEqual([t['id'] for t in tablero['columnas']['PENDIENTE']], [o.pk for o in reversed(self.ordenes)])
+        self.assertEqual(tablero['columnas']['PENDIENTE'][0]['cliente_detalle'], {'nombre': 'Cliente'})
+        self.assertEqual(tablero['conteos'], {'PENDIENTE': 3, 'ASIGNADA': 0, 'EN_CAMINO': 0, 'EN_PROCESO': 0})
+        self.assertEqual([t['nombre'] for t in tablero['flota']], ['Ana'])
+
+        for i in range(10):
+            OrdenTrabajo.objects.create(
+                cliente=self.cliente, tecnico=self.tecnico, descripcion=f'a{i}', ubicacion_servicio='x',
+                estado='ASIGNADA',
+            )
+        tablero, otras = self.get('/api/v1/kanban/')
+        self.assertEqual(otras, consultas)
+        self.assertEqual(tablero['conteos']['ASIGNADA'], 10)
+        self.assertEqual(tablero['columnas']['ASIGNADA'][0]['tecnico_detalle'], {'nombre': 'Ana'})
+
+    def test_delta_solo_lo_cambiado(self):
+        token = self.get('/api/v1/kanban/')[0]['token']
+
+        vacio = self.get(f'/api/v1/kanban/?since={token}')[0]
+        self.assertFalse(vacio['completo'])
+        self.assertEqual(sum(len(t) for t in vacio['columnas'].values()), 0)
+        self.assertEqual(vacio['salidas'], [])
+
+        asignada, terminada, eliminada = self.ordenes
+        asignada.tecnico = self.tecnico
+        asignada.estado = 'ASIGNADA'
+        asignada.save()
+        terminada.estado = 'TERMINADO'
+        terminada.save()
+        id_eliminada = eliminada.pk
+        eliminada.delete()
+
+        delta = self.get(f'/api/v1/kanban/?since={vacio["token"]}')[0]
+        self.assertFalse(delta['completo'])
+        self.assertEqual(delta['columnas']['PENDIENTE'], [])
+        self.assertEqual([t['id'] for t in delta['columnas']['ASIGNADA']], [asignada.pk])
+        self.assertCountEqual(delta['salidas'], [terminada.pk, id_eliminada])
+        self.assertEqual(delta['conteos']['PENDIENTE'], 0)
+        self.assertEqual(delta['conteos']['ASIGNADA'], 1)
+
+        siguiente = self.get(f'/api/v1/kanban/?since={delta["token"]}')[0]
+        self.assertEqual(sum(len(t) for t in siguiente['columnas'].values()), 0)
+        self.assertEqual(siguiente['salidas'], [])
+
+    def test_token_invalido(self):
+        response = self.client_api.get('/api/v1/kanban/?since=basura')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CAMBIOS_MARGEN_SEGUNDOS=0)
+class FeedCambiosTests(ApiAutenticadaTestMixin, TestCase):
+    """Feed de cambios con cursor, updated_since y lápidas de bajas."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente()
+        self.tecnico = crear_tecnico()
+        self.ordenes = [
+            OrdenTrabajo.objects.create(cliente=self.cliente, tecnico=self.tecnico, descripcion=str(i), ubicacion_servicio='x')
+            for i in range(5)
+        ]
+
+    def feed(self, recurso='ordenes', **params):
+        response = self.client_api.get(f'/api/v1/{recurso}/cambios/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_carga_inicial_paginada_y_sincronizacion_incremental(self):
+        primera = self.feed(limit=3)
+        self.assertTrue(primera['hay_mas'])
+        segunda = self.feed(cursor=primera['siguiente'], limit=3)
+        self.assertFalse(segunda['hay_mas'])
+        ids = [orden['id'] for orden in primera['resultados'] + segunda['resultados']]
+        self.assertEqual(ids, [orden.pk for orden in self.ordenes])
+
+        # Sin cambios: nada nuevo
+        self.assertEqual(self.feed(cursor=segunda['siguiente'])['resultados'], [])
+
+        self.ordenes[1].estado = 'EN_PROCESO'
+        self.ordenes[1].save()
+        eliminada = self.ordenes[3].pk
+        self.ordenes[3].delete()
+
+        cambios = self.feed(cursor=segunda['siguiente'])
+        self.assertEqual([orden['id'] for orden in cambios['resultados']], [self.ordenes[1].pk])
+        self.assertEqual([baja['id'] for baja in cambios['eliminados']], [eliminada])
+
+    def test_carga_inicial_no_trae_bajas_antiguas(self):
+        self.ordenes[0].delete()
+        self.assertEqual(self.feed()['eliminados'], [])
+
+    def test_updated_since(self):
+        antes = timezone.now() - datetime.timedelta(days=2)
+        OrdenTrabajo.objects.filter(pk__in=[o.pk for o in self.ordenes[:4]]).update(fecha_actualizacion=antes)
+        desde = (antes + datetime.timedelta(days=1)).isoformat()
+        self.assertEqual([o['id'] for o in self.feed(updated_since=desde)['resultados']], [self.ordenes[4].pk])
+
+    def test_baja_de_tecnico_y_cliente(self):
+        desde = timezone.now().isoformat()
+        tecnico_id = self.tecnico.pk
+        self.tecnico.delete()
+
+        ordenes = self.feed(updated_since=desde)
+        self.assertEqual(len(ordenes['resultados']), 5)
+        self.assertTrue(all(orden['tecnico'] is None for orden in ordenes['resultados']))
+        self.assertEqual([b['id'] for b in self.feed('tecnicos', updated_since=desde)['eliminados']], [tecnico_id])
+
+        self.cliente.delete()
+        self.assertEqual(len(self.feed(updated_since=desde)['eliminados']), 5)
+        self.assertEqual(RegistroBaja.objects.filter(modelo='cliente').count(), 1)
+
+    def test_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pocas:
+            self.feed()
+        for i in range(10):
+            OrdenTrabajo.objects.create(cliente=self.cliente, tecnico=self.tecnico, descripcion='y', ubicacion_servicio='x')
+        with CaptureQueriesContext(connection) as muchas:
+            self.feed()
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+
+    def test_parametros_invalidos(self):
+        for params in ({'cursor': 'xx'}, {'updated_since': 'ayer'}, {'limit': '0'}):
+            self.assertEqual(self.client_api.get('/api/v1/clientes/cambios/', params).status_code, 400)
+
+
+class ExportacionNDJSONTests(ApiAutenticadaTestMixin, TestCase):
+    """Exportación NDJSON gzip por lotes, reanudable."""
+
+    def setUp(self):
+        super().setUp()
+        cliente = crear_cliente()
+        tecnico = crear_tecnico()
+        self.ordenes = [
+            OrdenTrabajo.objects.create(
+                cliente=cliente, tecnico=tecnico if i % 2 else None, descripcion=f'ñandú {i}', ubicacion_servicio='x',
+            )
+            for i in range(5)
+        ]
+
+    def leer(self, contenido):
+        return [json.loads(linea) for linea in gzip.decompress(contenido).decode('utf-8').splitlines()]
+
+    def test_endpoint_con_anidados_y_despues_de(self):
+        response = self.client_api.get('/api/v1/exportar/ordenes.ndjson.gz')
+        ordenes = self.leer(b''.join(response.streaming_content))
+        self.assertEqual([o['id'] for o in ordenes], [o.pk for o in self.ordenes])
+        self.assertEqual(ordenes[0]['cliente']['nombre'], 'Cliente')
+        self.assertIsNone(ordenes[0]['tecnico'])
+        self.assertEqual(ordenes[1]['tecnico']['rut'], '1-9')
+        self.assertEqual(ordenes[0]['descripcion'], 'ñandú 0')
+
+        response = self.client_api.get(f'/api/v1/exportar/ordenes.ndjson.gz?despues_de={self.ordenes[2].pk}')
+        self.assertEqual([o['id'] for o in self.leer(b''.join(response.streaming_content))], [o.pk for o in self.ordenes[3:]])
+
+    def test_una_consulta_por_lote(self):
+        with CaptureQueriesContext(connection) as ctx:
+            miembros = list(ndjson_gzip(lote=2))
+        self.assertEqual(len(miembros), 3)
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_reanudar_archivo_cortado(self):
+        miembros = list(ndjson_gzip(lote=2))
+        cortado = b''.join(miembros[:2]) + miembros[2][:10]
+
+        valido, ultimo = ultimo_lote_completo(io.BytesIO(cortado), bloque=7)
+        self.assertEqual(valido, len(miembros[0]) + len(miembros[1]))
+        self.assertEqual(ultimo, self.ordenes[3].pk)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = f'{directorio}/ordenes.ndjson.gz'
+            with open(ruta, 'wb') as archivo:
+                archivo.write(cortado)
+            call_command('exportar_ordenes', ruta, '--reanudar', stdout=io.StringIO())
+            with open(ruta, 'rb') as archivo:
+                ordenes = self.leer(archivo.read())
+        self.assertEqual([o['id'] for o in ordenes], [o.pk for o in self.ordenes])
+
+
+class TelefonoClienteTests(ApiAutenticadaTestMixin, TestCase):
+    """Teléfono normalizado a E.164 y único (la resolución en el webhook está en whatsapp_webhook/tests.py)."""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = crear_cliente(nombre='María Pérez', direccion='x', telefono='+56 9 8765 4321')
+
+    def test_normalizacion(self):
+        for telefono in ('whatsapp:+56987654321', '+56 9 8765-4321', '987654321', '56987654321', '0056987654321'):
+            self.assertEqual(normalizar_telefono(telefono), '+56987654321', telefono)
+        for telefono in ('', None, '1234', 'sin número', '+0123456789'):
+            self.assertIsNone(normalizar_telefono(telefono), telefono)
+        self.assertEqual(self.cliente.telefono_e164, '+56987654321')
+
+    def test_api_rechaza_numero_repetido(self):
+        datos = {'nombre': 'Otra', 'direccion': 'x', 'telefono': '9 8765 4321'}
+        response = self.client_api.post('/api/v1/clientes/', datos)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('telefono', response.json())
+
+        response = self.client_api.patch(f'/api/v1/clientes/{self.cliente.pk}/', {'telefono': '987654321'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Cliente.objects.get(pk=self.cliente.pk).telefono_e164, '+56987654321')
+
+    def test_admin_rechaza_numero_repetido(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        datos = {'nombre': 'Otra', 'direccion': 'x', 'telefono': '9 8765 4321', 'chat_state': 'START', 'temp_data': '{}'}
+        response = self.client.post('/admin/ordenes/cliente/add/', datos)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('telefono', response.context['adminform'].form.errors)
+        self.assertEqual(Cliente.objects.count(), 1)
+
+        datos['telefono'] = '+56 9 1111 1111'
+        self.assertEqual(self.client.post('/admin/ordenes/cliente/add/', datos).status_code, 302)
+
+    def test_migracion_fusiona_duplicados(self):
+        migracion = importlib.import_module('ordenes.migrations.0014_telefono_e164')
+        duplicado = crear_cliente(nombre='Cliente 987654321', direccion='x', telefono='1', correo='m@x.cl')
+        otro = crear_cliente(nombre='Juan Soto', direccion='x')
+        Cliente.objects.filter(pk=duplicado.pk).update(telefono='987654321')
+        Cliente.objects.update(telefono_e164=None)
+        orden = OrdenTrabajo.objects.create(cliente=duplicado, descripcion='x', ubicacion_servicio='x')
+
+        migracion.normalizar_y_fusionar(django_apps, None)
+
+        self.assertFalse(Cliente.objects.filter(pk=duplicado.pk).exists())
+        self.assertTrue(RegistroBaja.objects.filter(modelo='cliente', objeto_id=duplicado.pk).exists())
+        conservado = Cliente.objects.get(pk=self.cliente.pk)
+        self.assertEqual((conservado.telefono_e164, conservado.correo), ('+56987654321', 'm@x.cl'))
+        self.assertEqual(OrdenTrabajo.objects.get(pk=orden.pk).cliente_id, self.cliente.pk)
+        self.assertEqual(Cliente.objects.get(pk=otro.pk).telefono_e164, '+56911111111')
@@ -0,0 +1,324 @@
+"""
+Bitácora de cambios de estado (TransicionOrden) y fechas denormalizadas de la
+orden (fecha_asignacion / fecha_cierre).
+
+Las métricas de tiempo (cierre, tiempo en cada estado) se calculan en SQL a
+partir de estas columnas, sin cargar órdenes en Python.
+
+cambiar_estado() aplica un cambio de estado con un UPDATE condicional en vez
+de cargar y guardar la orden completa (ver más abajo).
+"""
+from django.db import transaction
+from django.db.models import Avg, DurationField, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from tecnicos.models import Tecnico
+from . import cache as dashboard_cache
+from .eventos import publicar_evento, publicar_eventos
+from .models import OrdenTrabajo, TransicionOrden
+from .resumen import CAMPOS_ORDEN, datos_orden, mover_aporte, mover_aportes
+
+
+def aplicar_fechas(orden, previo=None):
+    """
+    Ajusta fecha_asignacion y fecha_cierre de `orden` (sin guardar) según lo
+    que cambió respecto de `previo` (dict con tecnico_id / estado, o None).
+    """
+    ahora = timezone.now()
+    tecnico_anterior = previo['tecnico_id'] if previo else None
+    estado_anterior = previo['estado'] if previo else None
+
+    # Asignación: se marca al asignar (o reasignar) un técnico
+    if not orden.tecnico_id:
+        orden.fecha_asignacion = None
+    elif orden.tecnico_id != tecnico_anterior or not orden.fecha_asignacion:
+        orden.fecha_asignacion = ahora
+
+    # Cierre: se marca al entrar a un estado de cierre y se limpia si se reabre
+    if orden.estado not in OrdenTrabajo.ESTADOS_CIERRE:
+        orden.fecha_cierre = None
+    elif estado_anterior not in OrdenTrabajo.ESTADOS_CIERRE or not orden.fecha_cierre:
+        orden.fecha_cierre = ahora
+
+
+def registrar_transicion(orden, estado_anterior, usuario=None, fecha=None):
+    """Agrega una fila a la bitácora si el estado efectivamente cambió."""
+    if estado_anterior == orden.estado:
+        return None
+    if usuario is not None and not getattr(usuario, 'is_authenticated', False):
+        usuario = None
+    return TransicionOrden.objects.create(
+        orden=orden,
+        estado_anterior=estado_anterior or '',
+        estado_nuevo=orden.estado,
+        fecha=fecha or timezone.now(),
+        usuario=usuario,
+    )
+
+
+# =====================================================
+# Cambio de estado atómico
+# =====================================================
+
+ESTADOS_ABIERTOS = ('PENDIENTE', 'ASIGNADA', 'EN_CAMINO', 'EN_PROCESO')
+
+# Estados desde los que se puede llegar a cada estado. Antes la API aceptaba
+# cualquier salto; ahora EN_CAMINO y EN_PROCESO exigen una orden ya asignada,
+# así que PENDIENTE → EN_CAMINO / EN_PROCESO responde 400 (hay que pasar por
+# ASIGNADA con un técnico).
+ORIGENES_PERMITIDOS = {
+    'PENDIENTE': ('ASIGNADA', 'EN_CAMINO', 'EN_PROCESO', 'TERMINADO', 'CERRADA'),  # desasignar / reabrir
+    'ASIGNADA': ESTADOS_ABIERTOS,  # ASIGNADA → ASIGNADA: reasignar
+    'EN_CAMINO': ('ASIGNADA', 'EN_PROCESO'),
+    'EN_PROCESO': ('ASIGNADA', 'EN_CAMINO'),
+    'TERMINADO': ESTADOS_ABIERTOS,
+    'CERRADA': ESTADOS_ABIERTOS + ('TERMINADO',),
+}
+
+# Disponibilidad del técnico de la orden al entrar a cada estado
+DISPONIBILIDAD_TECNICO = {'ASIGNADA': False, 'EN_CAMINO': False, 'EN_PROCESO': False, 'TERMINADO': True}
+
+_SIN_CAMBIO = object()
+
+
+class TransicionNoPermitida(ValueError):
+    pass
+
+
+class ConflictoEstado(Exception):
+    """La orden ya no está en el estado esperado: otro cambio llegó antes."""
+
+    def __init__(self, estado_actual):
+        super().__init__(f"La orden ya está en {estado_actual}")
+        self.estado_actual = estado_actual
+
+
+def _preparar(previo, estado, tecnico_id, esperado):
+    """
+    Orden con el cambio aplicado en memoria (estado, técnico y fechas) a
+    partir de la fila `previo`, o None si no hay nada que cambiar. Lanza
+    ConflictoEstado / TransicionNoPermitida.
+    """
+    if estado not in ORIGENES_PERMITIDOS:
+        raise TransicionNoPermitida(f"Estado desconocido: {estado}")
+    if esperado is not None and previo['estado'] != esperado:
+        raise ConflictoEstado(previo['estado'])
+
+    orden = OrdenTrabajo(**previo)
+    orden.estado = estado
+    if tecnico_id is not _SIN_CAMBIO:
+        orden.tecnico_id = tecnico_id
+    if orden.estado == previo['estado'] and orden.tecnico_id == previo['tecnico_id']:
+        return None  # p. ej. doble clic
+    if previo['estado'] not in ORIGENES_PERMITIDOS[estado]:
+        raise TransicionNoPermitida(f"No se puede pasar de {previo['estado']} a {estado}")
+    aplicar_fechas(orden, previo)
+    return orden
+
+
+def _filas_previas(ordenes_qs):
+    return ordenes_qs.values('id', 'fecha_asignacion', 'fecha_actualizacion', *CAMPOS_ORDEN)
+
+
+def _datos_resumen(fila):
+    return {campo: fila[campo] for campo in CAMPOS_ORDEN}
+
+
+def cambiar_estado(orden_id, estado, tecnico_id=_SIN_CAMBIO, usuario=None, esperado=None):
+    """
+    Lleva la orden a `estado` (y opcionalmente a otro técnico) sin pasar por
+    save(): lee la fila una vez y la actualiza con
+
+        UPDATE ... SET estado, tecnico_id, fechas WHERE id = ? AND estado = <leído> AND tecnico_id = <leído>
+
+    Si otro cambio se confirmó entremedio el UPDATE no toca filas y se lanza
+    ConflictoEstado en vez de pisarlo; también si `esperado` no coincide con
+    el estado actual. En la misma transacción se ajusta la disponibilidad del
+    técnico y se hace lo que harían las señales de save() (resumen, bitácora,
+    evento, caché). TransicionNoPermitida si el cambio no es legal;
+    OrdenTrabajo.DoesNotExist si la orden no existe.
+
+    Devuelve la orden con los campos de la transición cargados (no el resto).
+    """
+    with transaction.atomic():
+        previo = _filas_previas(OrdenTrabajo.objects.filter(pk=orden_id)).first()
+        if previo is None:
+            raise OrdenTrabajo.DoesNotExist(f"No existe la orden {orden_id}")
+        orden = _preparar(previo, estado, tecnico_id, esperado)
+        if orden is None:
+            return OrdenTrabajo(**previo)
+
+        ahora = timezone.now()
+        orden.fecha_actualizacion = ahora
+        actualizadas = (
+            OrdenTrabajo.objects
+            .filter(pk=orden_id, estado=previo['estado'], tecnico_id=previo['tecnico_id'])
+            .update(
+                estado=orden.estado,
+                tecnico_id=orden.tecnico_id,
+                fecha_asignacion=orden.fecha_asignacion,
+                fecha_cierre=orden.fecha_cierre,
+                fecha_actualizacion=ahora,
+            )
+        )
+        if not actualizadas:
+            actual = OrdenTrabajo.objects.filter(pk=orden_id).values_list('estado', flat=True).first()
+            raise ConflictoEstado(actual)
+
+        disponible = DISPONIBILIDAD_TECNICO.get(estado)
+        if orden.tecnico_id and disponible is not None:
+            _ajustar_tecnicos({orden.tecnico_id: disponible}, ahora)
+
+        # Lo que hacen las señales de save(), que update() no dispara
+        mover_aporte(_datos_resumen(previo), datos_orden(orden))
+        registrar_transicion(orden, previo['estado'], usuario=usuario, fecha=ahora)
+        publicar_evento(orden, 'actualizada', previo['estado'])
+    dashboard_cache.invalidar()
+    return orden
+
+
+def _ajustar_tecnicos(disponibilidad, ahora):
+    """{tecnico_id: disponible}: a lo más un UPDATE por valor, sólo en las filas que cambian."""
+    for valor in (True, False):
+        ids = [tecnico_id for tecnico_id, disponible in disponibilidad.items() if disponible is valor]
+        if ids:
+            Tecnico.objects.filter(pk__in=ids).exclude(disponible=valor).update(
+                disponible=valor, fecha_actualizacion=ahora,
+            )
+
+
+# =====================================================
+# Cambios en lote (despacho)
+# =====================================================
+
+LOTE_MAXIMO = 500
+
+
+def cambiar_estados(operaciones, usuario=None):
+    """
+    Aplica muchos cambios de estado / técnico en una transacción:
+
+        [{"orden": 12, "estado": "ASIGNADA", "tecnico": 3, "estado_actual": "PENDIENTE"}, ...]
+
+    (`tecnico` y `estado_actual` son opcionales, como en cambiar_estado).
+    Las órdenes y los técnicos se leen con una consulta cada uno (las órdenes
+    bloqueadas con SELECT ... FOR UPDATE donde la base lo soporta), los
+    cambios se escriben con un bulk_update y la disponibilidad se ajusta una
+    vez por técnico. El resumen, la bitácora y los eventos también van en
+    lote. Una operación inválida no detiene a las demás.
+
+    Devuelve un resultado por operación, en el mismo orden:
+    {"orden", "ok": True, "estado", "tecnico"} o {"orden", "ok": False, "error"}.
+    """
+    resultados = [None] * len(operaciones)
+    validas = []
+    for i, operacion in enumerate(operaciones):
+        if not isinstance(operacion, dict) or not isinstance(operacion.get('orden'), int) \
+                or not isinstance(operacion.get('estado'), str) \
+                or not isinstance(operacion.get('tecnico', 0), (int, type(None))):
+            resultados[i] = {
+                "orden": operacion.get('orden') if isinstance(operacion, dict) else None,
+                "ok": False,
+                "error": "Cada operación necesita `orden` (id), `estado` y opcionalmente `tecnico` (id o null)",
+            }
+        else:
+            validas.append((i, operacion))
+
+    with transaction.atomic():
+        ids = {operacion['orden'] for _, operacion in validas}
+        actuales = {
+            fila['id']: fila
+            for fila in _filas_previas(OrdenTrabajo.objects.select_for_update().filter(pk__in=ids))
+        }
+        previas = dict(actuales)
+        pedidos = {operacion['tecnico'] for _, operacion in validas if operacion.get('tecnico')}
+        tecnicos = set(Tecnico.objects.filter(pk__in=pedidos).values_list('pk', flat=True)) if pedidos else set()
+
+        ahora = timezone.now()
+        cambiadas = {}
+        transiciones, eventos, disponibilidad = [], [], {}
+        for i, operacion in validas:
+            orden_id, estado = operacion['orden'], operacion['estado']
+            tecnico_id = operacion.get('tecnico', _SIN_CAMBIO)
+            if orden_id not in actuales:
+                resultados[i] = {"orden": orden_id, "ok": False, "error": f"No existe la orden {orden_id}"}
+                continue
+            if tecnico_id not in (_SIN_CAMBIO, None) and tecnico_id not in tecnicos:
+                resultados[i] = {"orden": orden_id, "ok": False, "error": f"No existe el técnico {tecnico_id}"}
+                continue
+            previo = actuales[orden_id]
+            try:
+                orden = _preparar(previo, estado, tecnico_id, operacion.get('estado_actual'))
+            except ConflictoEstado as e:
+                resultados[i] = {"orden": orden_id, "ok": False, "error": str(e), "estado_actual": e.estado_actual}
+                continue
+            except TransicionNoPermitida as e:
+                resultados[i] = {"orden": orden_id, "ok": False, "error": str(e)}
+                continue
+
+            if orden is not None:
+                orden.fecha_actualizacion = ahora
+                # Una orden repetida en el lote sigue desde su último cambio
+                actuales[orden_id] = {campo: getattr(orden, campo) for campo in previo}
+                cambiadas[orden_id] = orden
+                if orden.estado != previo['estado']:
+                    transiciones.append(TransicionOrden(
+                        orden_id=orden_id, estado_anterior=previo['estado'], estado_nuevo=orden.estado,
+                        fecha=ahora, usuario=usuario if getattr(usuario, 'is_authenticated', False) else None,
+                    ))
+                eventos.append((orden, 'actualizada', previo['estado']))
+                if orden.tecnico_id and DISPONIBILIDAD_TECNICO.get(orden.estado) is not None:
+                    disponibilidad[orden.tecnico_id] = DISPONIBILIDAD_TECNICO[orden.estado]
+            actual = actuales[orden_id]
+            resultados[i] = {"orden": orden_id, "ok": True, "estado": actual['estado'], "tecnico": actual['tecnico_id']}
+
+        if cambiadas:
+            OrdenTrabajo.objects.bulk_update(
+                cambiadas.values(),
+                ['estado', 'tecnico', 'fecha_asignacion', 'fecha_cierre', 'fecha_actualizacion'],
+            )
+            _ajustar_tecnicos(disponibilidad, ahora)
+            mover_aportes([
+                (_datos_resumen(previas[orden_id]), datos_orden(orden))
+                for orden_id, orden in cambiadas.items()
+            ])
+            TransicionOrden.objects.bulk_create(transiciones)
+            publicar_eventos(eventos)
+    if cambiadas:
+        dashboard_cache.invalidar()
+    return resultados
+
+
+def tiempo_por_estado(ordenes_qs=None):
+    """
+    Horas promedio que las órdenes permanecen en cada estado, calculado en SQL:
+    cada transición dura hasta la siguiente transición de la misma orden.
+    Las estadías aún abiertas (estado actual) no se cuentan.
+    Devuelve {estado: horas}.
+    """
+    siguiente = (
+        TransicionOrden.objects
+        .filter(orden=OuterRef('orden'))
+        .filter(Q(fecha__gt=OuterRef('fecha')) | Q(fecha=OuterRef('fecha'), id__gt=OuterRef('id')))
+        .order_by('fecha', 'id')
+        .values('fecha')[:1]
+    )
+    transiciones = TransicionOrden.objects.all()
+    if ordenes_qs is not None:
+        transiciones = transiciones.filter(orden__in=ordenes_qs.values('id'))
+
+    filas = (
+        transiciones
+        .annotate(fin=Subquery(siguiente))
+        .filter(fin__isnull=False)
+        .order_by()
+        .values('estado_nuevo')
+        .annotate(
+            promedio=Avg(ExpressionWrapper(F('fin') - F('fecha'), output_field=DurationField()))
+        )
+    )
+    return {
+        fila['estado_nuevo']: round(fila['promedio'].total_seconds() / 3600.0, 1)
+        for fila in filas
+        if fila['promedio'] is not None
+    }
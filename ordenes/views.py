@@ -1,41 +1,26 @@
 from django.shortcuts import render, get_object_or_404
-from rest_framework import viewsets
+from rest_framework import serializers, viewsets
+from rest_framework.exceptions import APIException
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
-import csv
-import io
-from django.http import HttpResponse
-
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    Table,
-    TableStyle,
-    PageBreak,
-    Image,
-)
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+
 
 # Imports para manejo de fechas y estadísticas
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate, TruncHour, TruncMonth
 from django.utils import timezone
 import datetime
-from django.conf import settings
 import os
+import tempfile
 
 # --- IMPORTS DE TUS MODELOS ---
-from .models import Cliente, OrdenTrabajo
+from .models import Cliente, InformePDF, OrdenTrabajo
 
 # Intentamos importar Tecnico. Si está en otra app 'tecnicos', se ajusta aquí.
 try:
@@ -44,70 +29,136 @@ except ImportError:
     # Fallback por si Tecnico está en la misma carpeta o models global
     from .models import Tecnico
 
+from core.campos import CamposDinamicosViewMixin
+from core.mixins import ConditionalListMixin, calcular_etag, respuesta_condicional
+from core.paginacion import PaginacionCursorOpcional
+
+from . import almacen
+from . import cache as dashboard_cache
+from . import kanban
+from .exportaciones import ENCABEZADO_HISTORIAL, comprimir_gzip, csv_en_stream, filas_historial, ndjson_gzip
+from .busqueda import TABLA_CLIENTES, TABLA_ORDENES, BusquedaFTSFilter
+from .cambios import FeedCambiosMixin
+from .eventos import CursorEventos, stream_async, stream_sync
+from .informes import (
+    crear_informe,
+    filtros_desde_json,
+    filtros_informe_desde_request,
+    generar_pdf,
+    llave_informe,
+    nombre_descarga,
+    nombre_zip_tecnicos,
+    zip_informes_tecnicos,
+)
 from .serializers import ClienteSerializer, OrdenTrabajoSerializer
-
-
-# =====================================================
-# Helper para leer técnicos (soporta multi-selección)
-# =====================================================
-
-def get_tecnico_ids_from_request(request):
-    """
-    Lee técnicos desde la querystring y devuelve SOLO IDs válidos (enteros).
-    Soporta:
-      - ?tecnicos=1&tecnicos=2&tecnicos=3
-      - ?tecnico=1  (modo antiguo, compatibilidad)
-    Ignora valores como 'todos', 'all', 'on', '', etc.
-    """
-    tecnicos_ids = request.query_params.getlist('tecnicos')
-
-    # compatibilidad con ?tecnico=...
-    single_tecnico = request.query_params.get('tecnico')
-    if not tecnicos_ids and single_tecnico:
-        tecnicos_ids = [single_tecnico]
-
-    clean_ids = []
-    for t in tecnicos_ids:
-        if not t:
-            continue
-
-        t_str = str(t).strip().lower()
-        if t_str in ('todos', 'all', 'on', '(seleccionar todo)'):
-            # lo ignoramos, no es un ID
-            continue
-
-        # nos quedamos sólo con valores que se puedan convertir a int
-        try:
-            clean_ids.append(int(t))
-        except (TypeError, ValueError):
-            continue
-
-    return clean_ids
+from .transiciones import (
+    DISPONIBILIDAD_TECNICO,
+    LOTE_MAXIMO,
+    ConflictoEstado,
+    TransicionNoPermitida,
+    cambiar_estado,
+    cambiar_estados,
+)
+from .stats import (
+    DETALLE_LIMITE,
+    DETALLE_LIMITE_MAXIMO,
+    GRUPOS_DETALLE,
+    SECCIONES,
+    SOBRECARGA_UMBRAL,
+    SLA_HOURS,
+    calcular_estadisticas,
+    filtros_desde_request,
+    firma_datos,
+    ordenes_periodo,
+    pagina_detalle,
+    secciones_desde_request,
+)
 
 
 # ==========================================
 # 1. VIEWSETS PRINCIPALES (CRUD)
 # ==========================================
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class PaginacionClientes(PaginacionCursorOpcional):
+    ordering = ('-fecha_registro', '-id')
+
+
+class ClienteViewSet(CamposDinamicosViewMixin, FeedCambiosMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    # Con ?fields= se cargan igual: cursor de la paginación y del feed de cambios
+    campos_siempre = ('fecha_registro', 'fecha_actualizacion')
     search_fields = ['nombre', 'telefono']
-    filter_backends = [SearchFilter]
+    filter_backends = [BusquedaFTSFilter]
+    # ?search= con FTS5 (ver ordenes/busqueda.py); search_fields fuera de SQLite
+    busqueda_fts = TABLA_CLIENTES
+    pagination_class = PaginacionClientes
+    # DELETE sin presupuesto: borra en cascada las órdenes del cliente.
+    # Las escrituras validan que el teléfono no sea de otro cliente.
+    presupuesto_consultas = {"GET": 3, "POST": 3, "PUT": 3, "PATCH": 3}
+
 
+class ConflictoAPI(APIException):
+    status_code = 409
+    default_detail = "La orden cambió mientras tanto."
+    default_code = "conflicto"
 
-class OrdenTrabajoViewSet(viewsets.ModelViewSet):
-    queryset = OrdenTrabajo.objects.all()
+
+class OrdenTrabajoViewSet(CamposDinamicosViewMixin, ConditionalListMixin, FeedCambiosMixin, viewsets.ModelViewSet):
+    # tecnico_detalle y cliente_detalle se serializan anidados: JOIN en vez de N+1
+    # (con ?fields= / ?expand= sólo las relaciones pedidas, ver core/campos.py)
+    queryset = OrdenTrabajo.objects.select_related('tecnico', 'cliente')
     serializer_class = OrdenTrabajoSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    campos_siempre = ('fecha_creacion', 'fecha_actualizacion')
+    filter_backends = [DjangoFilterBackend, BusquedaFTSFilter, OrderingFilter]
     filterset_fields = ['estado', 'prioridad', 'tecnico']
     search_fields = ['cliente__nombre', 'descripcion', 'id']
+    # ?search= con FTS5 (ver ordenes/busqueda.py); ?search=123 o #123 busca por id
+    busqueda_fts = TABLA_ORDENES
+    busqueda_por_id = True
     ordering_fields = ['fecha_creacion', 'prioridad']
-    ordering = ['-fecha_creacion']
+    # id desempata: orden estable para la paginación por cursor
+    ordering = ['-fecha_creacion', '-id']
+    pagination_class = PaginacionCursorOpcional
+    # tecnico_detalle y cliente_detalle van anidados: un cambio en ellos también invalida el ETag
+    etag_relacionados = [Tecnico.objects.all(), Cliente.objects.all()]
+    # Las escrituras incluyen las señales (resumen, bitácora, eventos, caché)
+    presupuesto_consultas = {"GET": 5, "POST": 12, "PUT": 18, "PATCH": 18, "DELETE": 10}
 
     # Esta función maneja actualizaciones desde el ADMIN o API REST estándar
     def perform_update(self, serializer):
         orden = serializer.instance
+        datos = serializer.validated_data
+
+        # Sólo estado / técnico (tablero, asignaciones): UPDATE condicional que
+        # no pisa un cambio concurrente (ver transiciones.cambiar_estado).
+        # `estado_actual` opcional: el estado que el cliente vio.
+        if 'estado' in datos and set(datos) <= {'estado', 'tecnico'}:
+            # Sin `tecnico` en la petición se conserva el de la fila al momento
+            # del UPDATE, no el de `orden` (pudo reasignarse entremedio)
+            extra = {}
+            if 'tecnico' in datos:
+                extra['tecnico_id'] = datos['tecnico'].pk if datos['tecnico'] else None
+            try:
+                cambiada = cambiar_estado(
+                    orden.pk, datos['estado'],
+                    usuario=self.request.user,
+                    esperado=self.request.data.get('estado_actual'),
+                    **extra,
+                )
+            except ConflictoEstado as e:
+                raise ConflictoAPI({"error": str(e), "estado_actual": e.estado_actual})
+            except TransicionNoPermitida as e:
+                raise serializers.ValidationError({"estado": str(e)})
+            if 'tecnico' in datos:
+                orden.tecnico = datos['tecnico']
+            else:
+                orden.tecnico_id = cambiada.tecnico_id
+            for campo in ('estado', 'fecha_asignacion', 'fecha_cierre', 'fecha_actualizacion'):
+                setattr(orden, campo, getattr(cambiada, campo))
+            return
+
+        orden._usuario_cambio = self.request.user  # para la bitácora de estados
 
         # Datos nuevos que vienen en la petición
         nuevo_estado = self.request.data.get('estado')
@@ -141,427 +192,311 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
 class DashboardStatsView(APIView):
     """
     Devuelve KPIs, gráficas de tendencia, gráfica por técnico,
-    ranking, alertas y detalle para modales.
+    ranking y alertas. El detalle de los modales se pide aparte
+    (DashboardDetalleView).
+
+    ?sections=kpis,alertas limita la respuesta (y las consultas) a esos
+    bloques; sin el parámetro se devuelven todos (ver stats.SECCIONES).
     """
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 12
 
-    SLA_HOURS = 48
-    SOBRECARGA_UMBRAL = 5  # órdenes activas por técnico para marcar sobrecarga
+    SLA_HOURS = SLA_HOURS
+    SOBRECARGA_UMBRAL = SOBRECARGA_UMBRAL  # órdenes activas por técnico para marcar sobrecarga
 
     def get(self, request, format=None):
-        hoy = timezone.now().date()
-
         # ----- Parámetros de filtro -----
-        periodo = request.query_params.get('periodo', 'mes')  # hoy, semana, mes, anio, personalizado
-        tecnicos_ids = get_tecnico_ids_from_request(request)
-        inicio_str = request.query_params.get('inicio', None)
-        fin_str = request.query_params.get('fin', None)
-
-        # ----- Rango de fechas -----
-        if periodo == 'hoy':
-            desde = hoy
-            hasta = hoy
-        elif periodo == 'semana':
-            desde = hoy - datetime.timedelta(days=6)
-            hasta = hoy
-        elif periodo == 'anio':
-            desde = hoy - datetime.timedelta(days=365)
-            hasta = hoy
-        elif periodo == 'personalizado' and inicio_str and fin_str:
-            try:
-                desde = datetime.datetime.strptime(inicio_str, "%Y-%m-%d").date()
-                hasta = datetime.datetime.strptime(fin_str, "%Y-%m-%d").date()
-            except ValueError:
-                desde = hoy - datetime.timedelta(days=29)
-                hasta = hoy
-        else:  # mes (por defecto)
-            desde = hoy - datetime.timedelta(days=29)
-            hasta = hoy
-
-        # ----- Query base -----
-        qs = OrdenTrabajo.objects.filter(
-            fecha_creacion__date__gte=desde,
-            fecha_creacion__date__lte=hasta
+        filtros = filtros_desde_request(request)
+        try:
+            secciones = secciones_desde_request(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        def construir():
+            # Misma combinación de filtros + secciones + mismos datos => misma respuesta
+            data, hit = dashboard_cache.obtener_o_calcular(
+                'stats', filtros, lambda: self.construir_datos(filtros, secciones),
+                secciones=secciones,
+            )
+            response = Response(data, status=200)
+            response['X-Dashboard-Cache'] = 'HIT' if hit else 'MISS'
+            return response
+
+        return respuesta_condicional(request, self.get_etag(filtros, secciones), construir)
+
+    def get_etag(self, filtros, secciones=SECCIONES):
+        """
+        Validador del dashboard: filtros resueltos (fechas incluidas) +
+        secciones + versión de los datos del período (stats.firma_datos).
+        """
+        return calcular_etag(
+            'dashboard-stats',
+            dashboard_cache.llave_filtros(filtros, secciones=secciones),
+            firma_datos(filtros),
         )
 
-        # filtro múltiple por técnicos (ya limpio)
-        if tecnicos_ids:
-            qs = qs.filter(tecnico_id__in=tecnicos_ids)
+    def construir_datos(self, filtros, secciones=SECCIONES):
+        desde = filtros['desde']
+        hasta = filtros['hasta']
+        tecnicos_ids = filtros['tecnicos_ids']
+
+        # ----- Sólo las consultas que necesitan las secciones pedidas -----
+        stats = calcular_estadisticas(desde, hasta, tecnicos_ids, secciones=secciones)
+        data = {}
 
         # =========================
-        # 1) KPIs PRINCIPALES
+        # KPIs + SLA
         # =========================
-        pendientes_qs = qs.filter(
-            estado__in=['Pendiente de Asignación', 'PENDIENTE']
-        )
-
-        en_proceso_qs = qs.filter(
-            estado__in=[
-                'Técnico en Camino',
-                'En Proceso',
-                'ASIGNADA',
-                'EN_CAMINO',
-                'EN_PROCESO',
-            ]
-        )
-
-        terminadas_qs = qs.filter(
-            estado__in=['Trabajo Terminado', 'TERMINADO']
-        )
-
-        pendientes = pendientes_qs.count()
-        en_proceso = en_proceso_qs.count()
-        terminadas = terminadas_qs.count()
-        total_periodo = qs.count()
-
-        productividad_tecnica = round(terminadas * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-
-        porcentaje_pendientes = round(pendientes * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-        porcentaje_en_proceso = round(en_proceso * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-        porcentaje_terminadas = round(terminadas * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
+        if 'kpis' in secciones:
+            kpis = {
+                "total": stats['total'],
+                "pendientes": stats['pendientes'],
+                "en_proceso": stats['en_proceso'],
+                "terminadas": stats['terminadas'],
+                "productividad_tecnica": stats['productividad_tecnica'],
+                "tiempo_promedio_cierre_horas": round(stats['tiempo_promedio_cierre_horas'], 1),
+                "sla_porcentaje": stats['sla_porcentaje'],
+                "sla_fuera": stats['sla_fuera'],
+                "porcentaje_pendientes": stats['porcentaje_pendientes'],
+                "porcentaje_en_proceso": stats['porcentaje_en_proceso'],
+                "porcentaje_terminadas": stats['porcentaje_terminadas'],
+            }
+            data.update({
+                # KPIs "planos"
+                "total_ordenes": kpis['total'],
+                "kpis_pendientes": kpis['pendientes'],
+                "kpis_en_proceso": kpis['en_proceso'],
+                "kpis_terminadas": kpis['terminadas'],
+                "productividad_tecnica": kpis['productividad_tecnica'],
+
+                # Porcentajes
+                "porcentaje_pendientes": kpis['porcentaje_pendientes'],
+                "porcentaje_en_proceso": kpis['porcentaje_en_proceso'],
+                "porcentaje_terminadas": kpis['porcentaje_terminadas'],
+
+                # NUEVOS KPIs
+                "kpi_tiempo_promedio_cierre_horas": kpis['tiempo_promedio_cierre_horas'],
+                "kpi_sla_porcentaje": kpis['sla_porcentaje'],
+                "kpi_sla_fuera": kpis['sla_fuera'],
+                "kpi_tiempo_por_estado_horas": stats['tiempo_por_estado'],
+
+                # Respaldo agrupado
+                "kpis": kpis,
+            })
 
         # =========================
-        # 2) SLA Y TIEMPO PROMEDIO
+        # HISTORIAL ÚLTIMAS ÓRDENES
         # =========================
-        avg_hours = 0.0
-        sla_porcentaje = 0.0
-        sla_fuera = 0
-
-        if terminadas > 0:
-            duraciones_horas = []
-            sla_ok_count = 0
-
-            for ot in terminadas_qs:
-                fecha_inicio = ot.fecha_creacion
-                fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-
-                delta = fecha_cierre - fecha_inicio
-                horas = delta.total_seconds() / 3600.0
-                duraciones_horas.append(horas)
-
-                if horas <= self.SLA_HOURS:
-                    sla_ok_count += 1
-
-            if duraciones_horas:
-                avg_hours = sum(duraciones_horas) / len(duraciones_horas)
-
-            sla_porcentaje = round(sla_ok_count * 100 / terminadas, 1)
-            sla_fuera = terminadas - sla_ok_count
+        if 'historial' in secciones:
+            data["historial"] = [
+                dict(ot, fecha_cierre=ot['fecha_cierre'].strftime("%d-%m-%Y %H:%M") if ot['fecha_cierre'] else "")
+                for ot in stats['historial']
+            ]
 
         # =========================
-        # 3) GRÁFICO DE TENDENCIA
+        # GRÁFICO DE TENDENCIA
         # =========================
-        por_dia = (
-            qs.annotate(fecha=TruncDate('fecha_creacion'))
-              .values('fecha')
-              .annotate(cantidad=Count('id'))
-              .order_by('fecha')
-        )
-        mapa_dias = {item['fecha']: item['cantidad'] for item in por_dia}
-
-        fechas_grafico = []
-        datos_reales = []
-        dia = desde
-        while dia <= hasta:
-            fechas_grafico.append(dia.strftime('%d-%m'))
-            datos_reales.append(mapa_dias.get(dia, 0))
-            dia += datetime.timedelta(days=1)
-
-        datos_prediccion = [None] * len(fechas_grafico)
+        if 'tendencia' in secciones:
+            mapa_dias = stats['serie_diaria']
+            mapa_prediccion = stats['prediccion_diaria']  # precalculado (actualizar_pronostico)
+
+            fechas_grafico = []
+            datos_reales = []
+            datos_prediccion = []
+            dia = desde
+            while dia <= hasta:
+                fechas_grafico.append(dia.strftime('%d-%m'))
+                datos_reales.append(mapa_dias.get(dia, 0))
+                prediccion = mapa_prediccion.get(dia)
+                datos_prediccion.append(round(prediccion, 1) if prediccion is not None else None)
+                dia += datetime.timedelta(days=1)
+
+            data["grafico_tendencia"] = {
+                "fechas": fechas_grafico,
+                "real": datos_reales,
+                "prediccion": datos_prediccion,
+            }
 
         # =========================
-        # 4) GRÁFICO POR TÉCNICO
+        # GRÁFICO POR TÉCNICO
         # =========================
-        por_tecnico = (
-            qs.values('tecnico__nombre')
-              .annotate(cantidad=Count('id'))
-              .order_by('-cantidad')
-        )
-
-        categorias_tecnicos = [
-            (item['tecnico__nombre'] or 'Sin técnico') for item in por_tecnico
-        ]
-        valores_tecnicos = [item['cantidad'] for item in por_tecnico]
+        if 'tecnicos' in secciones:
+            data["grafico_tecnicos"] = {
+                "categorias": stats['categorias_tecnicos'],
+                "valores": stats['valores_tecnicos'],
+            }
 
         # =========================
-        # 5) GRÁFICO DE ESTADOS (PIE)
+        # GRÁFICO DE ESTADOS (PIE)
         # =========================
-        grafico_estados = {
-            "labels": ['Pendientes', 'En ejecución', 'Terminadas'],
-            "valores": [pendientes, en_proceso, terminadas],
-        }
+        if 'estados' in secciones:
+            data["grafico_estados"] = {
+                "labels": ['Pendientes', 'En ejecución', 'Terminadas'],
+                "valores": [stats['pendientes'], stats['en_proceso'], stats['terminadas']],
+            }
 
         # =========================
-        # 6) HISTORIAL ÚLTIMAS ÓRDENES
+        # RANKING
         # =========================
-        historial = []
-        for ot in terminadas_qs.order_by('-fecha_creacion')[:10]:
-            fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-            historial.append({
-                "id": ot.id,
-                "tecnico": str(getattr(ot, "tecnico", "")),
-                "cliente": str(getattr(ot, "cliente", "")),
-                "fecha_cierre": fecha_cierre.strftime("%d-%m-%Y %H:%M") if fecha_cierre else "",
-            })
+        if 'ranking' in secciones:
+            data["ranking_tecnicos"] = stats['ranking_tecnicos']
 
         # =========================
-        # 7) RANKING TÉCNICOS (solo terminadas)
+        # ALERTAS OPERACIONALES
         # =========================
-        ranking_tecnicos = []
-        ranking_base = (
-            terminadas_qs
-            .values('tecnico_id', 'tecnico__nombre')
-            .annotate(terminadas=Count('id'))
-            .order_by('-terminadas')
-        )
+        if 'alertas' in secciones:
+            alertas = []
+            num_vencidas = stats['pendientes_vencidas']
+            tecnicos_sobrecarga = stats['tecnicos_sobrecarga']
+
+            if num_vencidas > 0:
+                alertas.append(
+                    f"Hay {num_vencidas} órdenes pendientes hace más de {self.SLA_HOURS} horas."
+                )
+
+            if tecnicos_sobrecarga:
+                nombres = ", ".join(t["nombre"] for t in tecnicos_sobrecarga)
+                alertas.append(
+                    f"Técnicos con alta carga de trabajo (≥{self.SOBRECARGA_UMBRAL} órdenes activas): {nombres}."
+                )
+
+            data["alertas"] = alertas
+            data["alertas_detalle"] = {
+                "pendientes_vencidas": num_vencidas,
+                "tecnicos_sobrecarga": tecnicos_sobrecarga,
+                "umbral_sobrecarga": self.SOBRECARGA_UMBRAL,
+            }
 
-        for item in ranking_base:
-            tec_id = item['tecnico_id']
-            nombre = item['tecnico__nombre'] or 'Sin técnico'
-            tec_qs = terminadas_qs.filter(tecnico_id=tec_id)
-
-            total_tec = tec_qs.count()
-            if total_tec == 0:
-                continue
-
-            duraciones = []
-            sla_ok_tec = 0
-            for ot in tec_qs:
-                fecha_inicio = ot.fecha_creacion
-                fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-                delta = fecha_cierre - fecha_inicio
-                horas = delta.total_seconds() / 3600.0
-                duraciones.append(horas)
-                if horas <= self.SLA_HOURS:
-                    sla_ok_tec += 1
-
-            avg_tec = sum(duraciones) / len(duraciones) if duraciones else 0.0
-            sla_tec = round(sla_ok_tec * 100 / total_tec, 1)
-
-            ranking_tecnicos.append({
-                "id": tec_id,
-                "nombre": nombre,
-                "terminadas": total_tec,
-                "tiempo_promedio_cierre_horas": avg_tec,
-                "sla_porcentaje": sla_tec,
-            })
+        # ----- Lista de técnicos para filtros -----
+        if 'filtros' in secciones:
+            data["filtros_disponibles"] = list(Tecnico.objects.all().values('id', 'nombre'))
 
-        # =========================
-        # 8) ALERTAS OPERACIONALES
-        # =========================
-        alertas = []
-        alertas_detalle = {
-            "pendientes_vencidas": 0,
-            "tecnicos_sobrecarga": [],
-            "umbral_sobrecarga": self.SOBRECARGA_UMBRAL,
-        }
-
-        # pendientes vencidas
-        limite_vencida = timezone.now() - datetime.timedelta(hours=self.SLA_HOURS)
-        pendientes_vencidas_qs = pendientes_qs.filter(fecha_creacion__lte=limite_vencida)
-        num_vencidas = pendientes_vencidas_qs.count()
-        alertas_detalle["pendientes_vencidas"] = num_vencidas
-
-        if num_vencidas > 0:
-            alertas.append(
-                f"Hay {num_vencidas} órdenes pendientes hace más de {self.SLA_HOURS} horas."
-            )
+        return data
 
-        # técnicos con sobrecarga (órdenes activas)
-        activos_qs = en_proceso_qs
-        por_tecnico_activos = (
-            activos_qs
-            .values('tecnico__id', 'tecnico__nombre')
-            .annotate(cantidad=Count('id'))
-            .order_by('-cantidad')
-        )
 
-        tecnicos_sobrecarga = []
-        for item in por_tecnico_activos:
-            if item['cantidad'] >= self.SOBRECARGA_UMBRAL:
-                tecnicos_sobrecarga.append({
-                    "id": item['tecnico__id'],
-                    "nombre": item['tecnico__nombre'] or 'Sin técnico',
-                    "cantidad": item['cantidad'],
-                })
-
-        alertas_detalle["tecnicos_sobrecarga"] = tecnicos_sobrecarga
-
-        if tecnicos_sobrecarga:
-            nombres = ", ".join(t["nombre"] for t in tecnicos_sobrecarga)
-            alertas.append(
-                f"Técnicos con alta carga de trabajo (≥{self.SOBRECARGA_UMBRAL} órdenes activas): {nombres}."
+class DashboardDetalleView(APIView):
+    """
+    Detalle paginado de las órdenes de un KPI (modales del dashboard).
+    Parámetros: ?tipo=pendientes|en_ejecucion|terminadas, los mismos filtros
+    de período / técnicos del dashboard, ?cursor=... y ?limite=...
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 3
+
+    def get(self, request, format=None):
+        tipo = request.query_params.get('tipo')
+        if tipo not in GRUPOS_DETALLE:
+            return Response(
+                {"error": "tipo debe ser uno de: " + ", ".join(GRUPOS_DETALLE)},
+                status=400,
             )
 
-        # =========================
-        # 9) DETALLE PARA MODALES
-        # =========================
-        def serialize_ot(ot, usar_cierre=False):
-            if usar_cierre:
-                fecha = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-            else:
-                fecha = ot.fecha_creacion
-            return {
-                "id": ot.id,
-                "tecnico": str(getattr(ot, "tecnico", "")),
-                "cliente": str(getattr(ot, "cliente", "")),
-                "fecha": fecha.strftime("%d-%m-%Y %H:%M") if fecha else "",
-                "estado": ot.estado,
-            }
+        try:
+            limite = int(request.query_params.get('limite', DETALLE_LIMITE))
+        except ValueError:
+            limite = DETALLE_LIMITE
+        limite = max(1, min(limite, DETALLE_LIMITE_MAXIMO))
 
-        detalle_pendientes = [
-            serialize_ot(ot) for ot in pendientes_qs.order_by('-fecha_creacion')[:200]
-        ]
-        detalle_en_ejecucion = [
-            serialize_ot(ot) for ot in en_proceso_qs.order_by('-fecha_creacion')[:200]
-        ]
-        detalle_terminadas = [
-            serialize_ot(ot, usar_cierre=True) for ot in terminadas_qs.order_by('-fecha_creacion')[:200]
+        filtros = filtros_desde_request(request)
+        qs = ordenes_periodo(
+            filtros['desde'], filtros['hasta'], filtros['tecnicos_ids']
+        ).filter(estado__in=GRUPOS_DETALLE[tipo])
+
+        try:
+            filas, siguiente = pagina_detalle(qs, request.query_params.get('cursor'), limite)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        resultados = [
+            {
+                "id": fila['id'],
+                "cliente": fila['cliente_nombre'] or "",
+                "tecnico": fila['tecnico_nombre'] or "",
+                "estado": fila['estado'],
+                "fecha": timezone.localtime(fila['fecha_mostrar']).strftime("%d-%m-%Y %H:%M"),
+            }
+            for fila in filas
         ]
+        return Response({"resultados": resultados, "siguiente": siguiente}, status=200)
 
-        # ----- Lista de técnicos para filtros -----
-        lista_tecnicos = list(Tecnico.objects.all().values('id', 'nombre'))
-
-        data = {
-            # KPIs "planos"
-            "total_ordenes": total_periodo,
-            "kpis_pendientes": pendientes,
-            "kpis_en_proceso": en_proceso,
-            "kpis_terminadas": terminadas,
-            "productividad_tecnica": productividad_tecnica,
-
-            # Porcentajes
-            "porcentaje_pendientes": porcentaje_pendientes,
-            "porcentaje_en_proceso": porcentaje_en_proceso,
-            "porcentaje_terminadas": porcentaje_terminadas,
-
-            # NUEVOS KPIs
-            "kpi_tiempo_promedio_cierre_horas": round(avg_hours, 1),
-            "kpi_sla_porcentaje": sla_porcentaje,
-            "kpi_sla_fuera": sla_fuera,
-
-            # Historial tabla
-            "historial": historial,
-
-            # Gráficos
-            "grafico_tendencia": {
-                "fechas": fechas_grafico,
-                "real": datos_reales,
-                "prediccion": datos_prediccion,
-            },
-            "grafico_tecnicos": {
-                "categorias": categorias_tecnicos,
-                "valores": valores_tecnicos,
-            },
-            "grafico_estados": grafico_estados,
-
-            # Ranking y alertas
-            "ranking_tecnicos": ranking_tecnicos,
-            "alertas": alertas,
-            "alertas_detalle": alertas_detalle,
-
-            # Detalles para modales
-            "detalle_pendientes": detalle_pendientes,
-            "detalle_en_ejecucion": detalle_en_ejecucion,
-            "detalle_terminadas": detalle_terminadas,
-
-            # Filtros (técnicos)
-            "filtros_disponibles": lista_tecnicos,
-
-            # Respaldo agrupado
-            "kpis": {
-                "total": total_periodo,
-                "pendientes": pendientes,
-                "en_proceso": en_proceso,
-                "terminadas": terminadas,
-                "productividad_tecnica": productividad_tecnica,
-                "tiempo_promedio_cierre_horas": round(avg_hours, 1),
-                "sla_porcentaje": sla_porcentaje,
-                "sla_fuera": sla_fuera,
-                "porcentaje_pendientes": porcentaje_pendientes,
-                "porcentaje_en_proceso": porcentaje_en_proceso,
-                "porcentaje_terminadas": porcentaje_terminadas,
-            },
-        }
-
-        return Response(data, status=200)
+
+class DashboardCacheStatsView(APIView):
+    """
+    Contadores de la caché del dashboard (aciertos, fallos y generación).
+    Solo para administradores.
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 1
+
+    def get(self, request, format=None):
+        if not request.user.is_staff:
+            return Response({"error": "No tienes permiso."}, status=403)
+        return Response(dashboard_cache.estadisticas())
 
 
 class DashboardHistorialCSVView(APIView):
+    """
+    Historial de órdenes terminadas en CSV, generado en streaming (memoria
+    constante sin importar el período). Con ?gzip=1 se descarga comprimido.
+    Si el período ya fue pregenerado (pregenerar_informes) y los datos no
+    cambiaron, se sirve el archivo guardado.
+    """
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 5
 
     def get(self, request, format=None):
-        hoy = timezone.now().date()
-
-        periodo = request.query_params.get('periodo', 'mes')
-        tecnicos_ids = get_tecnico_ids_from_request(request)
-        inicio_str = request.query_params.get('inicio', None)
-        fin_str = request.query_params.get('fin', None)
-
-        # --- mismo cálculo de rango de fechas que DashboardStatsView ---
-        if periodo == 'hoy':
-            desde = hoy
-            hasta = hoy
-        elif periodo == 'semana':
-            desde = hoy - datetime.timedelta(days=6)
-            hasta = hoy
-        elif periodo == 'anio':
-            desde = hoy - datetime.timedelta(days=365)
-            hasta = hoy
-        elif periodo == 'personalizado' and inicio_str and fin_str:
-            try:
-                desde = datetime.datetime.strptime(inicio_str, "%Y-%m-%d").date()
-                hasta = datetime.datetime.strptime(fin_str, "%Y-%m-%d").date()
-            except ValueError:
-                desde = hoy - datetime.timedelta(days=29)
-                hasta = hoy
-        else:  # mes por defecto
-            desde = hoy - datetime.timedelta(days=29)
-            hasta = hoy
-
-        qs = OrdenTrabajo.objects.filter(
-            fecha_creacion__date__gte=desde,
-            fecha_creacion__date__lte=hasta
-        )
+        # --- mismo filtro de período / técnicos que DashboardStatsView ---
+        filtros = filtros_desde_request(request)
+        desde = filtros['desde']
+        hasta = filtros['hasta']
 
-        if tecnicos_ids:
-            qs = qs.filter(tecnico_id__in=tecnicos_ids)
+        # --- construir CSV (BOM + ';' para Excel) por bloques ---
+        filename = f"historial_ordenes_{desde.strftime('%Y%m%d')}_{hasta.strftime('%Y%m%d')}.csv"
+        comprimido = request.query_params.get('gzip') in ('1', 'true', 'si')
+
+        ruta = None if comprimido else almacen.buscar(llave_informe(filtros, 'csv'))
+        if ruta is not None:
+            response = FileResponse(
+                open(ruta, 'rb'),
+                as_attachment=True,
+                filename=filename,
+                content_type='text/csv; charset=utf-8',
+            )
+            response['X-Pregenerado'] = 'HIT'
+            return response
 
-        terminadas_qs = qs.filter(
-            estado__in=['Trabajo Terminado', 'TERMINADO']
-        ).order_by('-fecha_creacion')
+        contenido = csv_en_stream(ENCABEZADO_HISTORIAL, filas_historial(filtros))
+        content_type = 'text/csv; charset=utf-8'
 
-        # --- construir CSV ---
-        filename = f"historial_ordenes_{desde.strftime('%Y%m%d')}_{hasta.strftime('%Y%m%d')}.csv"
+        if comprimido:
+            contenido = comprimir_gzip(contenido)
+            filename += '.gz'
+            content_type = 'application/gzip'
 
-        # importante: charset y BOM para Excel
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response = StreamingHttpResponse(contenido, content_type=content_type)
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write('\ufeff')  # BOM UTF-8
-
-        # separador con punto y coma para Excel en español
-        writer = csv.writer(response, delimiter=';')
-
-        writer.writerow([
-            'ID',
-            'Técnico',
-            'Cliente',
-            'Estado',
-            'Fecha creación',
-            'Fecha cierre',
-        ])
-
-        for ot in terminadas_qs:
-            fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-            writer.writerow([
-                ot.id,
-                str(getattr(ot, 'tecnico', '') or ''),
-                str(getattr(ot, 'cliente', '') or ''),
-                ot.get_estado_display() if hasattr(ot, 'get_estado_display') else ot.estado,
-                ot.fecha_creacion.strftime("%Y-%m-%d %H:%M") if ot.fecha_creacion else '',
-                fecha_cierre.strftime("%Y-%m-%d %H:%M") if fecha_cierre else '',
-            ])
+        return response
 
+
+class ExportarOrdenesNDJSONView(APIView):
+    """
+    Todas las órdenes (con cliente y técnico anidados) en NDJSON comprimido,
+    en orden de id y en streaming. Si la descarga se corta, se reanuda con
+    ?despues_de=<id de la última línea recibida>.
+    """
+    permission_classes = [IsAuthenticated]
+    # Sin presupuesto fijo: una consulta por lote de LOTE_NDJSON órdenes
+    presupuesto_consultas = None
+
+    def get(self, request, format=None):
+        try:
+            despues_de = int(request.query_params.get('despues_de', 0))
+        except ValueError:
+            return Response({"error": "despues_de debe ser un id numérico"}, status=400)
+
+        response = StreamingHttpResponse(ndjson_gzip(despues_de), content_type='application/gzip')
+        response['Content-Disposition'] = 'attachment; filename="ordenes.ndjson.gz"'
+        response['X-Despues-De'] = str(despues_de)
         return response
 
 
@@ -573,370 +508,113 @@ class DashboardPDFView(APIView):
     - Gráfico de órdenes por técnico (barras)
     - Historial de órdenes cerradas
     - Alertas operacionales
-    """
-    permission_classes = [IsAuthenticated]
 
-    def _rango_fechas(self, periodo, hoy, inicio_str, fin_str):
-        """Mismo cálculo de rango de fechas que el DashboardStatsView."""
-        if periodo == 'hoy':
-            desde = hoy
-            hasta = hoy
-        elif periodo == 'semana':
-            desde = hoy - datetime.timedelta(days=6)
-            hasta = hoy
-        elif periodo == 'anio':
-            desde = hoy - datetime.timedelta(days=365)
-            hasta = hoy
-        elif periodo == 'personalizado' and inicio_str and fin_str:
-            try:
-                desde = datetime.datetime.strptime(inicio_str, "%Y-%m-%d").date()
-                hasta = datetime.datetime.strptime(fin_str, "%Y-%m-%d").date()
-            except ValueError:
-                desde = hoy - datetime.timedelta(days=29)
-                hasta = hoy
-        else:  # mes por defecto
-            desde = hoy - datetime.timedelta(days=29)
-            hasta = hoy
+    Con ?anexo=1 se agrega el listado completo de órdenes cerradas.
 
-        return desde, hasta
+    Descarga directa (síncrona, pero servida desde la caché en disco si el
+    período no cambió). Para no bloquear la petición usar InformesPDFView.
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 18
 
     def get(self, request, format=None):
-        hoy = timezone.now().date()
+        # -------- FILTROS (igual al dashboard) --------
+        filtros = filtros_informe_desde_request(request)
+        ruta = generar_pdf(filtros)
+        return FileResponse(
+            open(ruta, 'rb'),
+            as_attachment=True,
+            filename=nombre_descarga(filtros),
+            content_type='application/pdf',
+        )
 
-        periodo = request.query_params.get('periodo', 'mes')
-        tecnicos_ids = get_tecnico_ids_from_request(request)
-        inicio_str = request.query_params.get('inicio', None)
-        fin_str = request.query_params.get('fin', None)
 
-        # -------- RANGO DE FECHAS (igual al dashboard) --------
-        desde, hasta = self._rango_fechas(periodo, hoy, inicio_str, fin_str)
+class InformesTecnicosZIPView(APIView):
+    """
+    ZIP con un informe PDF por técnico (todos o los de ?tecnicos=) para el
+    período del dashboard. Las estadísticas se calculan una vez y los PDF se
+    dibujan en paralelo (settings.INFORMES_PROCESOS).
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 6
 
-        # -------- QUERY BASE --------
-        qs = OrdenTrabajo.objects.filter(
-            fecha_creacion__date__gte=desde,
-            fecha_creacion__date__lte=hasta
+    def get(self, request, format=None):
+        filtros = filtros_desde_request(request)
+        archivo = tempfile.TemporaryFile()
+        zip_informes_tecnicos(filtros, archivo)
+        archivo.seek(0)
+        return FileResponse(
+            archivo,
+            as_attachment=True,
+            filename=nombre_zip_tecnicos(filtros),
+            content_type='application/zip',
         )
 
-        if tecnicos_ids:
-            qs = qs.filter(tecnico_id__in=tecnicos_ids)
 
-        # -------- KPIs PRINCIPALES --------
-        pendientes_qs = qs.filter(
-            estado__in=['Pendiente de Asignación', 'PENDIENTE']
-        )
-        en_proceso_qs = qs.filter(
-            estado__in=[
-                'Técnico en Camino',
-                'En Proceso',
-                'ASIGNADA',
-                'EN_CAMINO',
-                'EN_PROCESO',
-            ]
-        )
-        terminadas_qs = qs.filter(
-            estado__in=['Trabajo Terminado', 'TERMINADO']
+def datos_informe(informe, request):
+    """Representación JSON de un trabajo de informe PDF."""
+    datos = {
+        "id": informe.pk,
+        "estado": informe.estado,
+        "filtros": informe.filtros,
+        "fecha_creacion": informe.fecha_creacion,
+        "fecha_fin": informe.fecha_fin,
+        "error": informe.error or None,
+        "descarga": None,
+    }
+    if informe.estado == 'LISTO':
+        datos["descarga"] = request.build_absolute_uri(
+            reverse('informe-pdf-descarga', args=[informe.pk])
         )
+    return datos
 
-        pendientes = pendientes_qs.count()
-        en_proceso = en_proceso_qs.count()
-        terminadas = terminadas_qs.count()
-        total_periodo = qs.count()
 
-        productividad_tecnica = round(terminadas * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-
-        porcentaje_pendientes = round(pendientes * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-        porcentaje_en_proceso = round(en_proceso * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-        porcentaje_terminadas = round(terminadas * 100 / total_periodo, 1) if total_periodo > 0 else 0.0
-
-        # -------- SLA Y TIEMPO PROMEDIO --------
-        SLA_HOURS = 48
-        avg_hours = 0.0
-        sla_porcentaje = 0.0
-        sla_fuera = 0
-
-        if terminadas > 0:
-            duraciones_horas = []
-            sla_ok_count = 0
-
-            for ot in terminadas_qs:
-                fecha_inicio = ot.fecha_creacion
-                fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-
-                delta = fecha_cierre - fecha_inicio
-                horas = delta.total_seconds() / 3600.0
-                duraciones_horas.append(horas)
-
-                if horas <= SLA_HOURS:
-                    sla_ok_count += 1
-
-            if duraciones_horas:
-                avg_hours = sum(duraciones_horas) / len(duraciones_horas)
-
-            sla_porcentaje = round(sla_ok_count * 100 / terminadas, 1)
-            sla_fuera = terminadas - sla_ok_count
+class InformesPDFView(APIView):
+    """
+    POST (con los filtros del dashboard en la querystring) crea un trabajo
+    de informe PDF y responde 202 con su id; si el PDF ya está en caché
+    responde 201 con el trabajo LISTO.
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {"POST": 6}
 
-        # -------- GRÁFICO ÓRDENES POR TÉCNICO --------
-        por_tecnico = (
-            qs.values('tecnico__nombre')
-              .annotate(cantidad=Count('id'))
-              .order_by('-cantidad')
-        )
-        categorias_tecnicos = [(item['tecnico__nombre'] or 'Sin técnico') for item in por_tecnico]
-        valores_tecnicos = [item['cantidad'] for item in por_tecnico]
-
-        # -------- RANKING TÉCNICOS (solo terminadas) --------
-        ranking_tecnicos = []
-        ranking_base = (
-            terminadas_qs
-            .values('tecnico_id', 'tecnico__nombre')
-            .annotate(terminadas=Count('id'))
-            .order_by('-terminadas')
+    def post(self, request, format=None):
+        informe = crear_informe(request.user, filtros_informe_desde_request(request))
+        return Response(
+            datos_informe(informe, request),
+            status=201 if informe.estado == 'LISTO' else 202,
         )
 
-        for item in ranking_base:
-            tec_id = item['tecnico_id']
-            nombre = item['tecnico__nombre'] or 'Sin técnico'
-            tec_qs = terminadas_qs.filter(tecnico_id=tec_id)
-
-            total_tec = tec_qs.count()
-            if total_tec == 0:
-                continue
-
-            duraciones = []
-            sla_ok_tec = 0
-            for ot in tec_qs:
-                fecha_inicio = ot.fecha_creacion
-                fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-                delta = fecha_cierre - fecha_inicio
-                horas = delta.total_seconds() / 3600.0
-                duraciones.append(horas)
-                if horas <= SLA_HOURS:
-                    sla_ok_tec += 1
-
-            avg_tec = sum(duraciones) / len(duraciones) if duraciones else 0.0
-            sla_tec = round(sla_ok_tec * 100 / total_tec, 1)
-
-            ranking_tecnicos.append({
-                "id": tec_id,
-                "nombre": nombre,
-                "terminadas": total_tec,
-                "tiempo_promedio_cierre_horas": avg_tec,
-                "sla_porcentaje": sla_tec,
-            })
-
-        # -------- HISTORIAL ÚLTIMAS ÓRDENES --------
-        historial = []
-        for ot in terminadas_qs.order_by('-fecha_creacion')[:30]:
-            fecha_cierre = getattr(ot, 'fecha_cierre', None) or ot.fecha_creacion
-            historial.append([
-                ot.id,
-                str(getattr(ot, "tecnico", "")),
-                str(getattr(ot, "cliente", "")),
-                fecha_cierre.strftime("%d-%m-%Y %H:%M") if fecha_cierre else "",
-            ])
-
-        # -------- ALERTAS OPERACIONALES (resumen) --------
-        alertas = []
-
-        limite_vencida = timezone.now() - datetime.timedelta(hours=SLA_HOURS)
-        pendientes_vencidas_qs = pendientes_qs.filter(fecha_creacion__lte=limite_vencida)
-        num_vencidas = pendientes_vencidas_qs.count()
-        if num_vencidas > 0:
-            alertas.append(
-                f"Hay {num_vencidas} órdenes pendientes hace más de {SLA_HOURS} horas."
-            )
-
-        SOBRECARGA_UMBRAL = 5
-        activos_qs = en_proceso_qs
-        por_tecnico_activos = (
-            activos_qs
-            .values('tecnico__nombre')
-            .annotate(cantidad=Count('id'))
-            .order_by('-cantidad')
-        )
-        tecnicos_sobrecarga = [
-            f"{item['tecnico__nombre'] or 'Sin técnico'} ({item['cantidad']} órdenes)"
-            for item in por_tecnico_activos
-            if item['cantidad'] >= SOBRECARGA_UMBRAL
-        ]
-        if tecnicos_sobrecarga:
-            alertas.append(
-                "Técnicos con alta carga de trabajo (≥5 órdenes activas): "
-                + ", ".join(tecnicos_sobrecarga)
-            )
 
-        # =====================================================
-        #            CONSTRUCCIÓN DEL PDF (ReportLab)
-        # =====================================================
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            leftMargin=2 * cm,
-            rightMargin=2 * cm,
-            topMargin=2 * cm,
-            bottomMargin=2 * cm,
-        )
-        styles = getSampleStyleSheet()
-        story = []
-
-
-        # --- Logo empresa (opcional) ---
-        # Ajusta la ruta al logo según dónde lo tengas en tu proyecto.
-        # Ejemplo: /static/img/logo_intercatv.jpg
-        logo_path = os.path.join(
-            settings.BASE_DIR,
-            "static",
-            "img",
-            "logo_intercatv.jpg",   # 👈 cambia el nombre si es distinto
-        )
+class InformePDFDetalleView(APIView):
+    """Estado de un trabajo de informe (sólo su autor o staff)."""
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 2
 
-        if os.path.exists(logo_path):
-            # Tamaño aprox. 3x3 cm (ajusta si lo ves muy grande/pequeño)
-            logo = Image(logo_path, width=3 * cm, height=3 * cm)
-            logo.hAlign = 'LEFT'
-            story.append(logo)
-            story.append(Spacer(1, 0.3 * cm))
+    def get_informe(self, request, pk):
+        informes = InformePDF.objects.all()
+        if not request.user.is_staff:
+            informes = informes.filter(usuario=request.user)
+        return get_object_or_404(informes, pk=pk)
 
-        # --- Portada / título ---
-        titulo = "Informe Gerencial de Órdenes"
-        story.append(Paragraph(titulo, styles['Title']))
-        story.append(Spacer(1, 0.4 * cm))
+    def get(self, request, pk=None, format=None):
+        return Response(datos_informe(self.get_informe(request, pk), request))
 
-        subtitulo = f"Período: {desde.strftime('%d-%m-%Y')} a {hasta.strftime('%d-%m-%Y')}"
-        story.append(Paragraph(subtitulo, styles['Normal']))
 
-        # Nueva línea: fecha y hora de generación del informe
-        generado = f"Generado el {timezone.now().strftime('%d-%m-%Y %H:%M')}"
-        story.append(Paragraph(generado, styles['Normal']))
+class InformePDFDescargaView(InformePDFDetalleView):
+    """Descarga el PDF de un trabajo LISTO."""
 
-        story.append(Spacer(1, 0.5 * cm))
+    def get(self, request, pk=None, format=None):
+        informe = self.get_informe(request, pk)
+        if informe.estado != 'LISTO' or not os.path.exists(informe.archivo):
+            return Response({"error": "El informe aún no está listo", "estado": informe.estado}, status=409)
 
-        # Texto según técnicos filtrados
-        if tecnicos_ids:
-            nombres = list(
-                Tecnico.objects.filter(pk__in=tecnicos_ids)
-                .values_list('nombre', flat=True)
-            )
-            if nombres:
-                if len(nombres) == 1:
-                    story.append(Paragraph(f"Técnico filtrado: {nombres[0]}", styles['Normal']))
-                else:
-                    story.append(Paragraph("Técnicos filtrados: " + ", ".join(nombres), styles['Normal']))
-            else:
-                story.append(Paragraph("Técnicos filtrados: (no encontrados)", styles['Normal']))
-
-        story.append(Spacer(1, 0.5 * cm))
-
-        # --- KPIs principales ---
-        story.append(Paragraph("KPIs principales", styles['Heading2']))
-        story.append(Spacer(1, 0.2 * cm))
-
-        tabla_kpis_data = [
-            ["KPI", "Valor"],
-            ["Total de órdenes", str(total_periodo)],
-            ["Pendientes", f"{pendientes} ({porcentaje_pendientes}%)"],
-            ["En ejecución", f"{en_proceso} ({porcentaje_en_proceso}%)"],
-            ["Terminadas", f"{terminadas} ({porcentaje_terminadas}%)"],
-            ["Productividad técnica", f"{productividad_tecnica}%"],
-            ["Tiempo prom. cierre", f"{avg_hours:.1f} h"],
-            ["SLA OK", f"{sla_porcentaje}%"],
-            ["Fuera de SLA", str(sla_fuera)],
-        ]
-        tabla_kpis = Table(tabla_kpis_data, hAlign='LEFT')
-        tabla_kpis.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f1f5f9")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#0f172a")),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ]))
-        story.append(tabla_kpis)
-        story.append(Spacer(1, 0.5 * cm))
-
-        # --- Gráfico: Órdenes por técnico ---
-        if categorias_tecnicos:
-            story.append(Paragraph("Órdenes por técnico", styles['Heading2']))
-            story.append(Spacer(1, 0.2 * cm))
-
-            drawing = Drawing(16 * cm, 8 * cm)
-            bc = VerticalBarChart()
-            bc.x = 1 * cm
-            bc.y = 1 * cm
-            bc.height = 6 * cm
-            bc.width = 14 * cm
-            bc.data = [valores_tecnicos]
-            bc.categoryAxis.categoryNames = categorias_tecnicos
-            bc.categoryAxis.labels.angle = 45
-            bc.categoryAxis.labels.dy = -10
-            bc.barSpacing = 0.5
-            bc.valueAxis.valueMin = 0
-            drawing.add(bc)
-            story.append(drawing)
-            story.append(Spacer(1, 0.5 * cm))
-
-        # --- Ranking de técnicos ---
-        story.append(Paragraph("Ranking de técnicos (solo órdenes terminadas)", styles['Heading2']))
-        story.append(Spacer(1, 0.2 * cm))
-
-        ranking_data = [["Técnico", "Terminadas", "% SLA OK", "T. prom. (h)"]]
-        for r in ranking_tecnicos:
-            ranking_data.append([
-                r["nombre"],
-                str(r["terminadas"]),
-                f"{r['sla_porcentaje']}%",
-                f"{r['tiempo_promedio_cierre_horas']:.1f}",
-            ])
-
-        tabla_ranking = Table(ranking_data, hAlign='LEFT')
-        tabla_ranking.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ]))
-        story.append(tabla_ranking)
-        story.append(PageBreak())
-
-        # --- Historial de órdenes cerradas ---
-        story.append(Paragraph("Últimas órdenes cerradas", styles['Heading2']))
-        story.append(Spacer(1, 0.2 * cm))
-
-        historial_data = [["ID", "Técnico", "Cliente", "Fecha cierre"]] + historial
-        tabla_historial = Table(
-            historial_data,
-            repeatRows=1,
-            hAlign='LEFT',
-            colWidths=[2 * cm, 5 * cm, 6 * cm, 3 * cm]
+        return FileResponse(
+            open(informe.archivo, 'rb'),
+            as_attachment=True,
+            filename=nombre_descarga(filtros_desde_json(informe.filtros)),
+            content_type='application/pdf',
         )
-        tabla_historial.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ]))
-        story.append(tabla_historial)
-        story.append(Spacer(1, 0.5 * cm))
-
-        # --- Alertas operacionales ---
-        story.append(Paragraph("Alertas operacionales", styles['Heading2']))
-        story.append(Spacer(1, 0.2 * cm))
-
-        if alertas:
-            for a in alertas:
-                story.append(Paragraph(f"• {a}", styles['Normal']))
-        else:
-            story.append(Paragraph("No se detectaron alertas en este período.", styles['Normal']))
-
-        # --- Construir PDF ---
-        doc.build(story)
-
-        pdf_value = buffer.getvalue()
-        buffer.close()
-
-        filename = f"informe_dashboard_{desde.strftime('%Y%m%d')}_{hasta.strftime('%Y%m%d')}.pdf"
-        response = HttpResponse(pdf_value, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
 
 
 # ==========================================
@@ -951,39 +629,116 @@ class CambiarEstadoOrdenView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk=None):
-        # 1. Buscamos la orden por ID
-        orden = get_object_or_404(OrdenTrabajo, pk=pk)
-
-        # 2. Obtenemos el estado que envía el JavaScript
+        # 1. Obtenemos el estado que envía el JavaScript (y el que mostraba)
         nuevo_estado = request.data.get('estado')
 
         if not nuevo_estado:
             return Response({"error": "Falta el estado"}, status=400)
 
-        # 3. Lógica para LIBERAR AL TÉCNICO si se termina el trabajo
-        if nuevo_estado == 'TERMINADO':
-            orden.estado = 'TERMINADO'
-
-            if orden.tecnico:
-                tecnico = orden.tecnico
-                tecnico.disponible = True
-                tecnico.save()
-
-        # Lógica inversa: Si reactivamos una orden, ocupamos al técnico
-        elif nuevo_estado in ['ASIGNADA', 'EN_CAMINO', 'EN_PROCESO']:
-            orden.estado = nuevo_estado
-            if orden.tecnico:
-                tecnico = orden.tecnico
-                tecnico.disponible = False
-                tecnico.save()
-        else:
-            # Cualquier otro estado (ej: PENDIENTE)
-            orden.estado = nuevo_estado
+        # 2. Un solo UPDATE condicional: estado, fechas y disponibilidad del
+        #    técnico (se libera al terminar, se ocupa al reactivar)
+        try:
+            orden = cambiar_estado(
+                pk, nuevo_estado, usuario=request.user, esperado=request.data.get('estado_actual'),
+            )
+        except OrdenTrabajo.DoesNotExist:
+            raise Http404
+        except ConflictoEstado as e:
+            return Response({"error": str(e), "estado_actual": e.estado_actual}, status=409)
+        except TransicionNoPermitida as e:
+            return Response({"error": str(e)}, status=400)
 
-        orden.save()
+        disponible = DISPONIBILIDAD_TECNICO.get(orden.estado)
+        if orden.tecnico_id and disponible is None:
+            disponible = Tecnico.objects.filter(pk=orden.tecnico_id).values_list('disponible', flat=True).first()
 
         return Response({
             "status": "ok",
             "mensaje": f"Orden actualizada a {orden.get_estado_display()}",
-            "tecnico_liberado": orden.tecnico.disponible if orden.tecnico else None
+            "tecnico_liberado": disponible if orden.tecnico_id else None
+        })
+
+
+class OrdenesLoteView(APIView):
+    """
+    Asignaciones / cambios de estado en lote para el despacho:
+        POST {"operaciones": [{"orden": 12, "tecnico": 3, "estado": "ASIGNADA"}, ...]}
+    Responde un resultado por operación (ver transiciones.cambiar_estados).
+    """
+    permission_classes = [IsAuthenticated]
+    # Fijo: no crece con el tamaño del lote
+    presupuesto_consultas = {"POST": 15}
+
+    def post(self, request, format=None):
+        operaciones = request.data.get('operaciones') if isinstance(request.data, dict) else None
+        if not isinstance(operaciones, list) or not operaciones:
+            return Response({"error": "Falta la lista de operaciones"}, status=400)
+        if len(operaciones) > LOTE_MAXIMO:
+            return Response({"error": f"Máximo {LOTE_MAXIMO} operaciones por lote"}, status=400)
+
+        resultados = cambiar_estados(operaciones, usuario=request.user)
+        aplicadas = sum(1 for resultado in resultados if resultado['ok'])
+        return Response({
+            "resultados": resultados,
+            "aplicadas": aplicadas,
+            "rechazadas": len(resultados) - aplicadas,
         })
+
+
+# ==========================================
+# 4. EVENTOS EN VIVO (SSE)
+# ==========================================
+
+class EventosOrdenesView(View):
+    """
+    Stream text/event-stream con los cambios de órdenes (ver ordenes/eventos.py).
+    Reanuda desde la cabecera Last-Event-ID (o ?ultimo=) al reconectar.
+    Vista async de Django: con ASGI cada conexión es una corrutina y no
+    bloquea un worker. Con WSGI responde lo pendiente y cierra (el navegador
+    reconecta solo), para no dejar un worker tomado por cada dashboard abierto.
+    """
+    # Sin presupuesto: la conexión consulta la tabla de eventos en cada vuelta
+    presupuesto_consultas = None
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "No autenticado"}, status=401)
+
+        ultimo = request.headers.get('Last-Event-ID') or request.GET.get('ultimo')
+        try:
+            ultimo_id = int(ultimo) if ultimo else None
+        except ValueError:
+            ultimo_id = None
+
+        cursor = CursorEventos(ultimo_id)
+        if isinstance(request, ASGIRequest):
+            contenido = stream_async(cursor)
+        else:
+            contenido = stream_sync(cursor)
+
+        response = StreamingHttpResponse(contenido, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # sin buffer en nginx
+        return response
+
+
+# ==========================================
+# 5. TABLERO KANBAN
+# ==========================================
+
+class KanbanView(APIView):
+    """
+    Tablero de despacho completo en una petición: tarjetas por columna,
+    contadores y flota de técnicos (ver ordenes/kanban.py). Con ?since=<token>
+    de la respuesta anterior sólo trae lo que cambió.
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = 4
+
+    def get(self, request, format=None):
+        try:
+            data = kanban.tablero(request.query_params.get('since'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(data)
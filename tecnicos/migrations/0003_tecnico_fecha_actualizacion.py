@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tecnicos", "0002_tecnico_user"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tecnico",
+            name="fecha_actualizacion",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Última actualización",
+            ),
+            preserve_default=False,
+        ),
+    ]
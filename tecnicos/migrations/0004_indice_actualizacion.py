@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tecnicos", "0003_tecnico_fecha_actualizacion"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tecnico",
+            index=models.Index(
+                fields=["fecha_actualizacion"], name="tecnico_actualizacion_idx"
+            ),
+        ),
+    ]
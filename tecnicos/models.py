@@ -10,6 +10,7 @@ class Tecnico(models.Model):
     disponible = models.BooleanField(default=True, verbose_name="¿Está disponible?")
     # Guardaremos la ubicación como "latitud,longitud" en texto por ahora para simplificar
     ubicacion_actual = models.CharField(max_length=100, blank=True, null=True, verbose_name="Ubicación GPS actual")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
 
     def __str__(self):
         return f"{self.nombre} ({self.especialidad})"
@@ -17,4 +18,8 @@ class Tecnico(models.Model):
     class Meta:
         verbose_name = "Técnico"
         verbose_name_plural = "Técnicos"
+        indexes = [
+            # Feed de cambios (?updated_since=) y ETag del listado
+            models.Index(fields=['fecha_actualizacion'], name='tecnico_actualizacion_idx'),
+        ]
 
@@ -1,7 +1,18 @@
 from rest_framework import serializers
+from core.campos import CamposDinamicosSerializerMixin
 from .models import Tecnico
 
-class TecnicoSerializer(serializers.ModelSerializer):
+class TecnicoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tecnico
-        fields = '__all__' # Envía todos los campos al frontend
\ No newline at end of file
+        # Sin `user`: la cuenta de login no se expone en la API
+        fields = [
+            'id',
+            'nombre',
+            'rut',
+            'telefono',
+            'especialidad',
+            'disponible',
+            'ubicacion_actual',
+            'fecha_actualizacion',
+        ]
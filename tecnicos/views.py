@@ -1,5 +1,6 @@
 from django.shortcuts import render
 
+from django.db.models import Count, Max
 from rest_framework import viewsets
 from .models import Tecnico
 from .serializers import TecnicoSerializer
@@ -10,16 +11,21 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from ordenes.cambios import FeedCambiosMixin
 from ordenes.models import OrdenTrabajo
 from ordenes.serializers import OrdenTrabajoSerializer
+from core.campos import CamposDinamicosViewMixin
+from core.mixins import ConditionalListMixin, calcular_etag, respuesta_condicional
 
 
-class TecnicoViewSet(viewsets.ModelViewSet):
+class TecnicoViewSet(CamposDinamicosViewMixin, ConditionalListMixin, FeedCambiosMixin, viewsets.ModelViewSet):
     queryset = Tecnico.objects.all()
     serializer_class = TecnicoSerializer
+    campos_siempre = ('fecha_actualizacion',)
     filterset_fields = ['disponible', 'especialidad']
     filter_backends = [DjangoFilterBackend]
     ordering_fields = ['nombre', 'especialidad']
+    presupuesto_consultas = {"GET": 3, "POST": 3, "PUT": 3, "PATCH": 3, "DELETE": 10}
 
 
 class MisOrdenesView(APIView):
@@ -28,6 +34,7 @@ class MisOrdenesView(APIView):
     SOLO sus órdenes asignadas (Asignadas, En Camino, En Proceso).
     """
     permission_classes = [IsAuthenticated] # ¡Solo usuarios logueados!
+    presupuesto_consultas = 3
 
     def get(self, request, *args, **kwargs):
         try:
@@ -39,11 +46,31 @@ class MisOrdenesView(APIView):
 
         # 2. Filtra las órdenes asignadas a ESE técnico
         estados_activos = ['ASIGNADA', 'EN_CAMINO', 'EN_PROCESO']
-        ordenes = OrdenTrabajo.objects.filter(
+        ordenes = OrdenTrabajo.objects.select_related('tecnico', 'cliente').filter(
             tecnico=tecnico,
             estado__in=estados_activos
         ).order_by('fecha_actualizacion')
-        
-        # 3. Serializa y devuelve los datos
-        serializer = OrdenTrabajoSerializer(ordenes, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+
+        # 3. Si el técnico ya tiene esta versión, 304 sin serializar. Los datos
+        # del cliente van anidados: su última edición también cuenta (en la
+        # misma consulta que la firma de las órdenes)
+        firma = ordenes.order_by().aggregate(
+            total=Count('pk'),
+            ultima=Max('fecha_actualizacion'),
+            ultimo_cliente=Max('cliente__fecha_actualizacion'),
+        )
+        etag = calcular_etag(
+            'mis-ordenes',
+            tecnico.pk,
+            firma['total'],
+            firma['ultima'],
+            firma['ultimo_cliente'],
+            tecnico.fecha_actualizacion,
+        )
+
+        # 4. Serializa y devuelve los datos
+        def construir():
+            serializer = OrdenTrabajoSerializer(ordenes, many=True)
+            return Response(serializer.data)
+
+        return respuesta_condicional(request, etag, construir)
\ No newline at end of file
@@ -1,3 +1,28 @@
 from django.test import TestCase
 
-# Create your tests here.
+from ordenes.models import Cliente
+from ordenes.pruebas import crear_cliente
+from .views import _clientes_recientes, resolver_cliente
+
+
+class ResolverClienteTests(TestCase):
+    """Resolución del cliente que escribe por WhatsApp, por teléfono E.164."""
+
+    def setUp(self):
+        _clientes_recientes.clear()
+        self.cliente = crear_cliente(nombre='María Pérez', direccion='x', telefono='+56 9 8765 4321')
+
+    def test_resuelve_por_telefono_normalizado(self):
+        self.assertEqual(resolver_cliente('+56987654321').pk, self.cliente.pk)
+        with self.assertNumQueries(1):  # reciente: sólo se carga por pk
+            self.assertEqual(resolver_cliente('+56987654321').pk, self.cliente.pk)
+
+        # Con otro teléfono el recuerdo ya no vale
+        Cliente.objects.filter(pk=self.cliente.pk).update(telefono='+56911111111', telefono_e164='+56911111111')
+        nuevo = resolver_cliente('+56987654321')
+        self.assertNotEqual(nuevo.pk, self.cliente.pk)
+        self.assertEqual((nuevo.nombre, nuevo.telefono_e164), ('Cliente +56987654321', '+56987654321'))
+
+        response = self.client.post('/webhook/twilio/', {'From': 'whatsapp:+56987654321', 'Body': 'Hola'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Cliente.objects.filter(telefono_e164='+56987654321').count(), 1)
@@ -1,9 +1,14 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
 from django.shortcuts import render
 
 # Create your views here.
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from ordenes.models import Cliente, OrdenTrabajo
+from ordenes.telefonos import normalizar_telefono
 from twilio.twiml.messaging_response import MessagingResponse
 from ordenes.models import SystemState
 
@@ -68,6 +73,58 @@ Un daño físico (fibra/cable cortado o poste caído) requiere sí o sí la visi
 # --- FIN DE LOS MENÚS ---
 
 
+# --- CLIENTES RECIENTES ---
+# Teléfono E.164 -> id del cliente, de las últimas conversaciones (en memoria
+# de cada proceso). Un acierto se confirma igual al cargar el cliente por su
+# pk, así un cliente eliminado o con otro teléfono no se cuela.
+_clientes_recientes = OrderedDict()
+_clientes_recientes_lock = threading.Lock()
+
+
+def _recordar_cliente(e164, cliente_id):
+    with _clientes_recientes_lock:
+        _clientes_recientes[e164] = cliente_id
+        _clientes_recientes.move_to_end(e164)
+        while len(_clientes_recientes) > settings.WEBHOOK_CLIENTES_EN_CACHE:
+            _clientes_recientes.popitem(last=False)
+
+
+def _cliente_reciente(e164):
+    with _clientes_recientes_lock:
+        cliente_id = _clientes_recientes.get(e164)
+        if cliente_id is not None:
+            _clientes_recientes.move_to_end(e164)
+        return cliente_id
+
+
+def _olvidar_cliente(e164):
+    with _clientes_recientes_lock:
+        _clientes_recientes.pop(e164, None)
+
+
+def resolver_cliente(telefono):
+    """
+    Cliente del número que escribe (lo crea si es nuevo). Se busca por el
+    teléfono normalizado (índice único), antes en los clientes recientes.
+    """
+    defaults = {'nombre': f'Cliente {telefono}', 'direccion': 'Desconocida', 'chat_state': 'START'}
+    e164 = normalizar_telefono(telefono)
+    if e164 is None:
+        cliente, _ = Cliente.objects.get_or_create(telefono=telefono, defaults=defaults)
+        return cliente
+
+    cliente_id = _cliente_reciente(e164)
+    if cliente_id is not None:
+        cliente = Cliente.objects.filter(pk=cliente_id, telefono_e164=e164).first()
+        if cliente is not None:
+            return cliente
+        _olvidar_cliente(e164)
+
+    cliente, _ = Cliente.objects.get_or_create(telefono_e164=e164, defaults={'telefono': telefono, **defaults})
+    _recordar_cliente(e164, cliente.pk)
+    return cliente
+
+
 @csrf_exempt
 def twilio_webhook(request):
     if request.method == 'POST':
@@ -88,10 +145,7 @@ def twilio_webhook(request):
             return HttpResponse(str(response), content_type="application/xml")
         # --- FIN DEL CHEQUEO ---
         
-        cliente, created = Cliente.objects.get_or_create(
-            telefono=sender_phone,
-            defaults={'nombre': f'Cliente {sender_phone}', 'direccion': 'Desconocida', 'chat_state': 'START'}
-        )
+        cliente = resolver_cliente(sender_phone)
         
         if body != '0' and cliente.chat_state != 'START':
             cliente.temp_data['previous_state'] = cliente.chat_state